@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+import polars as pl
+
+from constants import BATCH_JOB_STATUSES
+from data.compression import estimate_uncompressed_size, resolve_input_files
+from models import BatchJobDict, BatchJobResultDict
+from reconciliation_engine import run_reconciliation_engine
+from utils import (
+    get_project_root,
+    ensure_directory_exists,
+    parse_memory_size,
+    format_memory_size,
+)
+
+# Rough ratio between the size of a CSV on disk and the peak memory needed to
+# load, validate and reconcile it (parsed frames, join hash tables, report).
+CSV_MEMORY_EXPANSION_FACTOR = 4
+
+MANIFEST_COLUMNS = [
+    "name",
+    "claims_file_path",
+    "invoices_file_path",
+    "output_file_path",
+]
+
+
+class MemoryBudget:
+    def __init__(self, max_bytes: Optional[int]):
+        self._max_bytes = max_bytes
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, num_bytes: int) -> None:
+        if self._max_bytes is None:
+            return
+
+        with self._condition:
+            # A job larger than the whole budget is still allowed to run, but
+            # only once nothing else is holding memory
+            self._condition.wait_for(
+                lambda: self._in_use == 0 or self._in_use + num_bytes <= self._max_bytes
+            )
+            self._in_use += num_bytes
+
+    def release(self, num_bytes: int) -> None:
+        if self._max_bytes is None:
+            return
+
+        with self._condition:
+            self._in_use -= num_bytes
+            self._condition.notify_all()
+
+
+def load_manifest(manifest_file_path: str) -> List[BatchJobDict]:
+    absolute_manifest_path = os.path.join(get_project_root(), manifest_file_path)
+
+    if absolute_manifest_path.endswith(".json"):
+        with open(absolute_manifest_path, encoding="utf-8") as f:
+            jobs = json.load(f)
+    else:
+        jobs = pl.read_csv(absolute_manifest_path, infer_schema=False).to_dicts()
+
+    for index, job in enumerate(jobs):
+        missing = {"claims_file_path", "invoices_file_path", "output_file_path"} - set(
+            job
+        )
+        if missing:
+            raise ValueError(f"Manifest job #{index + 1} is missing fields: {missing}")
+        job.setdefault("name", f"job-{index + 1}")
+
+    return [BatchJobDict(**{col: job[col] for col in MANIFEST_COLUMNS}) for job in jobs]
+
+
+def estimate_job_memory(job: BatchJobDict) -> int:
+    project_root = get_project_root()
+    input_bytes = 0
+
+    for path in [job["claims_file_path"], job["invoices_file_path"]]:
+        input_files = resolve_input_files(os.path.join(project_root, path))
+        input_bytes += estimate_uncompressed_size(input_files)
+
+    return input_bytes * CSV_MEMORY_EXPANSION_FACTOR
+
+
+def _run_job(
+    job: BatchJobDict,
+    estimated_memory: int,
+    memory_budget: MemoryBudget,
+    report_assets_dir: Optional[str],
+) -> BatchJobResultDict:
+    memory_budget.acquire(estimated_memory)
+    start_time = time.perf_counter()
+
+    try:
+        report_path = run_reconciliation_engine(
+            job["claims_file_path"],
+            job["invoices_file_path"],
+            job["output_file_path"],
+            report_assets_dir=report_assets_dir,
+        )
+        status, error = BATCH_JOB_STATUSES["SUCCEEDED"], None
+    except Exception as e:
+        # Isolate failures so a single broken drop does not abort the batch
+        report_path = None
+        status, error = BATCH_JOB_STATUSES["FAILED"], f"{type(e).__name__}: {e}"
+    finally:
+        memory_budget.release(estimated_memory)
+
+    return BatchJobResultDict(
+        name=job["name"],
+        status=status,
+        estimated_memory_bytes=estimated_memory,
+        duration_seconds=round(time.perf_counter() - start_time, 3),
+        report_path=report_path,
+        error=error,
+    )
+
+
+def run_batch(
+    jobs: List[BatchJobDict],
+    summary_file_path: str,
+    max_workers: Optional[int] = None,
+    max_memory: Optional[str] = None,
+    report_assets_dir: Optional[str] = None,
+) -> List[BatchJobResultDict]:
+    print(f"🚀 Starting batch reconciliation of {len(jobs)} jobs...")
+
+    memory_budget = MemoryBudget(parse_memory_size(max_memory) if max_memory else None)
+
+    # Schedule the largest jobs first so the long tail is made of small jobs
+    estimated_jobs = sorted(
+        ((job, estimate_job_memory(job)) for job in jobs),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+    batch_start_time = time.perf_counter()
+    results: List[BatchJobResultDict] = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                _run_job, job, estimated_memory, memory_budget, report_assets_dir
+            )
+            for job, estimated_memory in estimated_jobs
+        ]
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+
+            icon = "✅" if result["status"] == BATCH_JOB_STATUSES["SUCCEEDED"] else "❌"
+            print(
+                f"{icon} [{len(results)}/{len(jobs)}] {result['name']} "
+                f"{result['status']} in {result['duration_seconds']}s "
+                f"(~{format_memory_size(result['estimated_memory_bytes'])})"
+            )
+
+    succeeded = sum(
+        1 for r in results if r["status"] == BATCH_JOB_STATUSES["SUCCEEDED"]
+    )
+    summary = {
+        "total_jobs": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "duration_seconds": round(time.perf_counter() - batch_start_time, 3),
+        "jobs": sorted(results, key=lambda r: r["name"]),
+    }
+
+    absolute_summary_path = os.path.join(get_project_root(), summary_file_path)
+    ensure_directory_exists(absolute_summary_path)
+    with open(absolute_summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(
+        f"✅ Batch completed: {summary['succeeded']} succeeded, "
+        f"{summary['failed']} failed"
+    )
+    print(f"📄 Batch summary available at: {absolute_summary_path}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reconcile many payer datasets on a shared worker pool"
+    )
+    parser.add_argument("manifest", help="CSV or JSON manifest of jobs")
+    parser.add_argument("--summary", default="output/batch_summary.json")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-memory", default=None, help="e.g. 8G")
+    parser.add_argument(
+        "--report-assets-dir",
+        default=None,
+        help="Have every report link one shared copy of report.css and report.js",
+    )
+    args = parser.parse_args()
+
+    run_batch(
+        load_manifest(args.manifest),
+        args.summary,
+        max_workers=args.workers,
+        max_memory=args.max_memory,
+        report_assets_dir=args.report_assets_dir,
+    )
@@ -1,9 +1,43 @@
 from .constants import (
     RECONCILIATION_STATUSES,
     VALID_TYPE_OF_BILL,
+    BILL_TYPE_COLUMN_PREFIXES,
+    EXECUTION_MODES,
+    RUN_DIFF_CHANGE_TYPES,
+    INVOICE_MATCH_METHODS,
+    FUZZY_MATCH_DATE_TOLERANCE_DAYS,
+    FUZZY_MATCH_AMOUNT_TOLERANCE,
+    FUZZY_MATCH_MIN_CONFIDENCE,
+    BATCH_JOB_STATUSES,
+    INBOX_FILE_STATUSES,
+    CUBE_DIMENSIONS,
+    CUBE_GROUPING_SETS,
+    TOP_DISCREPANCY_CLAIMS,
+    TOP_DISCREPANCY_PATIENTS,
+    PARETO_CLAIM_PERCENTAGES,
+    AGING_BUCKETS,
+    WORKLOAD_PROFILES,
+    REPORT_COMPRESSION_SUFFIXES,
 )
 
 __all__ = [
     "RECONCILIATION_STATUSES",
     "VALID_TYPE_OF_BILL",
+    "BILL_TYPE_COLUMN_PREFIXES",
+    "EXECUTION_MODES",
+    "RUN_DIFF_CHANGE_TYPES",
+    "INVOICE_MATCH_METHODS",
+    "FUZZY_MATCH_DATE_TOLERANCE_DAYS",
+    "FUZZY_MATCH_AMOUNT_TOLERANCE",
+    "FUZZY_MATCH_MIN_CONFIDENCE",
+    "BATCH_JOB_STATUSES",
+    "INBOX_FILE_STATUSES",
+    "CUBE_DIMENSIONS",
+    "CUBE_GROUPING_SETS",
+    "TOP_DISCREPANCY_CLAIMS",
+    "TOP_DISCREPANCY_PATIENTS",
+    "PARETO_CLAIM_PERCENTAGES",
+    "AGING_BUCKETS",
+    "WORKLOAD_PROFILES",
+    "REPORT_COMPRESSION_SUFFIXES",
 ]
@@ -1,7 +1,160 @@
 VALID_TYPE_OF_BILL = {"fee", "procedure payment"}
 
+# Column name prefix used for the per-type totals of each type_of_bill
+BILL_TYPE_COLUMN_PREFIXES = {
+    "fee": "fee",
+    "procedure payment": "procedure_payment",
+}
+
 RECONCILIATION_STATUSES = {
     "BALANCED": "BALANCED",
     "OVERPAID": "OVERPAID",
     "UNDERPAID": "UNDERPAID",
 }
+
+EXECUTION_MODES = {
+    "EAGER": "eager",
+    "STREAMING": "streaming",
+    "PARTITIONED": "partitioned",
+}
+
+# How an invoice was attributed to a claim: by its own claim_id, or by the
+# secondary patient, date and amount match for invoices whose claim_id is
+# missing or does not exist
+INVOICE_MATCH_METHODS = {
+    "EXACT": "exact",
+    "AMOUNT": "patient_amount_date",
+    "DATE": "patient_date",
+}
+
+# An unmatched invoice is only attributed to a claim of the same patient
+# serviced at most this many days before the payment
+FUZZY_MATCH_DATE_TOLERANCE_DAYS = 90
+# Relative difference between an invoice and a claim's benefit amount for
+# the invoice to count as that claim's full payment
+FUZZY_MATCH_AMOUNT_TOLERANCE = 0.01
+# Matches with a lower confidence leave the invoice unmatched
+FUZZY_MATCH_MIN_CONFIDENCE = 0.5
+
+# How a claim changed between two reconciliation runs; claims whose total and
+# status are both unchanged are left out of a run diff
+RUN_DIFF_CHANGE_TYPES = {
+    "NEW": "NEW",
+    "REMOVED": "REMOVED",
+    "RESOLVED": "RESOLVED",
+    "NEWLY_DISCREPANT": "NEWLY_DISCREPANT",
+    "STATUS_CHANGED": "STATUS_CHANGED",
+    "AMOUNT_CHANGED": "AMOUNT_CHANGED",
+}
+
+BATCH_JOB_STATUSES = {
+    "SUCCEEDED": "SUCCEEDED",
+    "FAILED": "FAILED",
+}
+
+# What became of a file picked up from the watched invoice inbox; files whose
+# content was already processed are archived as duplicates, not reapplied
+INBOX_FILE_STATUSES = {
+    "PROCESSED": "PROCESSED",
+    "REJECTED": "REJECTED",
+    "DUPLICATE": "DUPLICATE",
+}
+
+# Dimensions of the aggregate cube, in the order of their grouping_id bits,
+# and the combinations it is rolled up to. patient_id is only crossed with a
+# single other dimension, which keeps the cube a small fraction of the claims.
+CUBE_DIMENSIONS = [
+    "patient_id",
+    "service_month",
+    "reconciliation_status",
+    "type_of_bill",
+]
+CUBE_GROUPING_SETS = [
+    [],
+    ["patient_id"],
+    ["service_month"],
+    ["reconciliation_status"],
+    ["type_of_bill"],
+    ["patient_id", "service_month"],
+    ["patient_id", "reconciliation_status"],
+    ["patient_id", "type_of_bill"],
+    ["service_month", "reconciliation_status"],
+    ["service_month", "type_of_bill"],
+    ["reconciliation_status", "type_of_bill"],
+    ["service_month", "reconciliation_status", "type_of_bill"],
+]
+
+# Number of claims and patients listed in the top discrepancy report sections
+TOP_DISCREPANCY_CLAIMS = 100
+TOP_DISCREPANCY_PATIENTS = 20
+
+# Shares of claims (largest discrepancy first) used for the Pareto analysis
+PARETO_CLAIM_PERCENTAGES = [1, 5, 10, 20]
+
+# Outstanding balance aging bands, as (label, upper bound in days since service)
+AGING_BUCKETS = [
+    ("0-30", 30),
+    ("31-60", 60),
+    ("61-90", 90),
+    ("90+", None),
+]
+
+# Synthetic data workload profiles. "uniform" reproduces the original
+# generator; "skewed" has heavy-tailed claim and invoice counts (a few hot
+# patients and claims with thousands of rows), orphan and duplicate invoices,
+# a winter peak in dates of service and late-arriving payments. Invoices of
+# profiles with unlinked invoices carry the patient_id, and that share of
+# them has a missing or mistyped claim_id.
+# payment_lag_mean_days=None draws payment dates independently of service.
+WORKLOAD_PROFILES = {
+    "uniform": {
+        "claims_per_patient": {
+            "distribution": "uniform",
+            "min": 2,
+            "max": 20,
+            "shape": 0.0,
+        },
+        "invoices_per_claim": {
+            "distribution": "uniform",
+            "min": 1,
+            "max": 5,
+            "shape": 0.0,
+        },
+        "orphan_invoice_rate": 0.0,
+        "duplicate_invoice_rate": 0.0,
+        "unlinked_invoice_rate": 0.0,
+        "seasonality_amplitude": 0.0,
+        "seasonality_peak_month": 1,
+        "payment_lag_mean_days": None,
+        "late_payment_rate": 0.0,
+        "late_payment_min_days": 90,
+        "late_payment_max_days": 365,
+    },
+    "skewed": {
+        "claims_per_patient": {
+            "distribution": "zipf",
+            "min": 1,
+            "max": 5000,
+            "shape": 1.6,
+        },
+        "invoices_per_claim": {
+            "distribution": "lognormal",
+            "min": 1,
+            "max": 5000,
+            "shape": 1.5,
+        },
+        "orphan_invoice_rate": 0.01,
+        "duplicate_invoice_rate": 0.02,
+        "unlinked_invoice_rate": 0.01,
+        "seasonality_amplitude": 0.5,
+        "seasonality_peak_month": 1,
+        "payment_lag_mean_days": 30.0,
+        "late_payment_rate": 0.05,
+        "late_payment_min_days": 90,
+        "late_payment_max_days": 365,
+    },
+}
+
+# A report written to e.g. report.html.gz or report.html.br is compressed,
+# ready to be served with the matching Content-Encoding
+REPORT_COMPRESSION_SUFFIXES = {".gz": "gzip", ".br": "brotli"}
@@ -1,17 +1,22 @@
 from .generator import PatientGenerator, ClaimGenerator, InvoiceGenerator
 from .loader import (
     DataLoader,
+    PatientsLoader,
     ClaimsLoader,
     InvoicesLoader,
     DataValidationError,
 )
+from .compression import read_csv_input, write_csv_output
 
 __all__ = [
     "PatientGenerator",
     "ClaimGenerator",
     "InvoiceGenerator",
     "DataLoader",
+    "PatientsLoader",
     "ClaimsLoader",
     "InvoicesLoader",
     "DataValidationError",
+    "read_csv_input",
+    "write_csv_output",
 ]
@@ -0,0 +1,218 @@
+import bz2
+import glob
+import gzip
+import io
+import os
+import queue
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+import polars as pl
+
+try:
+    import zstandard
+except ImportError:  # zstd inputs are optional
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd"}
+
+# Raised while reading a truncated or corrupt input, or one that cannot be read
+DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+# Decompressed bytes are handed to the parser in blocks of this size; a small
+# bounded queue lets decompression run ahead of parsing without buffering the
+# whole file in memory
+DECOMPRESSION_BLOCK_BYTES = 16 * 1024 * 1024
+DECOMPRESSION_QUEUE_BLOCKS = 2
+DECOMPRESSION_PUT_TIMEOUT_SECONDS = 0.1
+
+# Typical compression ratio of claims and invoices CSVs, used to estimate the
+# decompressed size of .gz/.bz2/.zst inputs without reading them
+COMPRESSED_CSV_EXPANSION_FACTOR = 5
+
+_END_OF_STREAM = object()
+
+
+def detect_compression(file_path: Path) -> Optional[str]:
+    return COMPRESSION_SUFFIXES.get(Path(file_path).suffix.lower())
+
+
+def resolve_input_files(file_path: str) -> List[Path]:
+    # A glob pattern reads every matching part, e.g. "input/invoices_*.csv.gz"
+    if glob.has_magic(file_path):
+        return [Path(path) for path in sorted(glob.glob(file_path))]
+    path = Path(file_path)
+    return [path] if path.exists() else []
+
+
+def estimate_uncompressed_size(file_paths: List[Path]) -> int:
+    return sum(
+        os.path.getsize(path)
+        * (COMPRESSED_CSV_EXPANSION_FACTOR if detect_compression(path) else 1)
+        for path in file_paths
+    )
+
+
+def _require_zstandard() -> None:
+    if zstandard is None:
+        raise ImportError(
+            "Reading or writing .zst files requires the zstandard package "
+            "(pip install zstandard)"
+        )
+
+
+def open_decompressed(file_path: Path) -> BinaryIO:
+    compression = detect_compression(file_path)
+    if compression == "gzip":
+        # Transparently reads every member of a multi-member gzip file
+        return gzip.open(file_path, "rb")
+    if compression == "bz2":
+        return bz2.open(file_path, "rb")
+    if compression == "zstd":
+        _require_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), read_across_frames=True
+        )
+    return open(file_path, "rb")
+
+
+def open_compressed(file_path: Path) -> BinaryIO:
+    compression = detect_compression(file_path)
+    if compression == "gzip":
+        return gzip.open(file_path, "wb")
+    if compression == "bz2":
+        return bz2.open(file_path, "wb")
+    if compression == "zstd":
+        _require_zstandard()
+        return zstandard.ZstdCompressor().stream_writer(open(file_path, "wb"))
+    return open(file_path, "wb")
+
+
+def _put_block(blocks: queue.Queue, block: object, stop: threading.Event) -> bool:
+    # Gives up once the consumer has stopped reading, so the thread never
+    # blocks on a full queue nobody drains
+    while not stop.is_set():
+        try:
+            blocks.put(block, timeout=DECOMPRESSION_PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _decompress_blocks(
+    file_path: Path, blocks: queue.Queue, stop: threading.Event
+) -> None:
+    # Runs on its own thread; zlib, bz2 and zstd all release the GIL while
+    # decompressing, so this overlaps with parsing of the previous block
+    try:
+        with open_decompressed(file_path) as f:
+            remainder = b""
+            while True:
+                data = f.read(DECOMPRESSION_BLOCK_BYTES)
+                if not data:
+                    break
+                data = remainder + data
+                # Cut at the last complete line so every block parses alone
+                cut = data.rfind(b"\n") + 1
+                remainder = data[cut:]
+                if cut and not _put_block(blocks, data[:cut], stop):
+                    return
+            if remainder and not _put_block(blocks, remainder, stop):
+                return
+        _put_block(blocks, _END_OF_STREAM, stop)
+    except Exception as error:
+        _put_block(blocks, error, stop)
+
+
+def iter_decompressed_blocks(file_path: Path) -> Iterator[bytes]:
+    # Blocks of whole lines, decompressed ahead on a background thread
+    blocks: queue.Queue = queue.Queue(maxsize=DECOMPRESSION_QUEUE_BLOCKS)
+    stop = threading.Event()
+    threading.Thread(
+        target=_decompress_blocks, args=(file_path, blocks, stop), daemon=True
+    ).start()
+
+    try:
+        while True:
+            block = blocks.get()
+            if block is _END_OF_STREAM:
+                return
+            if isinstance(block, Exception):
+                raise block
+            yield block
+    finally:
+        # A consumer stopping early (e.g. on a parse error) releases the
+        # thread and with it the open file
+        stop.set()
+        while not blocks.empty():
+            blocks.get_nowait()
+
+
+def _read_compressed_csv(
+    file_path: Path, schema_overrides: Dict[str, pl.DataType]
+) -> pl.DataFrame:
+    header = b""
+    frames = []
+    for block in iter_decompressed_blocks(file_path):
+        if not header:
+            header_end = block.find(b"\n") + 1 or len(block)
+            header, block = block[:header_end], block[header_end:]
+            if not block:
+                continue
+
+        # Every block gets the header, so each one is parsed with the same
+        # column names and schema overrides
+        frames.append(
+            pl.read_csv(io.BytesIO(header + block), schema_overrides=schema_overrides)
+        )
+
+    if not frames:
+        return pl.read_csv(io.BytesIO(header), schema_overrides=schema_overrides)
+    return pl.concat(frames, how="vertical_relaxed", rechunk=True)
+
+
+def read_csv_input(
+    file_paths: List[Path],
+    schema_overrides: Dict[str, pl.DataType],
+    max_workers: Optional[int] = None,
+) -> pl.DataFrame:
+    def read_file(file_path: Path) -> pl.DataFrame:
+        if detect_compression(file_path) is None:
+            return pl.read_csv(file_path, schema_overrides=schema_overrides)
+        return _read_compressed_csv(file_path, schema_overrides)
+
+    if len(file_paths) == 1:
+        return read_file(file_paths[0])
+
+    # Parts of a multi-file input are decompressed and parsed in parallel
+    max_workers = max_workers or min(len(file_paths), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read_file, file_paths))
+
+    return pl.concat(frames, how="vertical_relaxed", rechunk=True)
+
+
+def scan_csv_input(
+    file_paths: List[Path], schema_overrides: Dict[str, pl.DataType]
+) -> pl.LazyFrame:
+    # Only plain CSV files can be scanned lazily; compressed inputs are
+    # streamed through the decompressor first
+    if all(detect_compression(path) is None for path in file_paths):
+        return pl.scan_csv(file_paths, schema_overrides=schema_overrides)
+    return read_csv_input(file_paths, schema_overrides).lazy()
+
+
+def write_csv_output(df: pl.DataFrame, file_path: str) -> None:
+    # The compression is chosen by the file suffix (.gz, .bz2 or .zst)
+    if detect_compression(Path(file_path)) is None:
+        df.write_csv(file_path)
+        return
+
+    with open_compressed(Path(file_path)) as f:
+        df.write_csv(f)
@@ -1,18 +1,59 @@
-import random
 from abc import ABC, abstractmethod
-from typing import List
+from datetime import date
+from typing import List, Optional, Union
 
+import numpy as np
+import polars as pl
 from faker import Faker
 
-from constants import VALID_TYPE_OF_BILL
+from constants import VALID_TYPE_OF_BILL, WORKLOAD_PROFILES
 from models import (
     PatientDict,
     ClaimDict,
     InvoiceDict,
+    CountDistributionDict,
+    WorkloadProfileDict,
+    CLAIMS_SCHEMA,
+    INVOICES_SCHEMA,
+    INVOICES_OPTIONAL_SCHEMA,
 )
-from strategies import choose_strategy
+from strategies import calculate_amounts
 
-fake = Faker()
+# Dates of service and payment dates fall within the last two years
+DATE_RANGE_DAYS = 730
+
+
+def _draw_counts(
+    distribution: CountDistributionDict, size: int, rng: np.random.Generator
+) -> np.ndarray:
+    low, high = distribution["min"], distribution["max"]
+    if distribution["distribution"] == "uniform":
+        return rng.integers(low, high + 1, size=size)
+    if distribution["distribution"] == "zipf":
+        counts = low - 1 + rng.zipf(distribution["shape"], size=size)
+    elif distribution["distribution"] == "lognormal":
+        counts = low + np.floor(rng.lognormal(0.0, distribution["shape"], size=size))
+    else:
+        raise ValueError(
+            f"Unknown count distribution {distribution['distribution']!r}, "
+            "expected 'uniform', 'zipf' or 'lognormal'"
+        )
+    return np.clip(counts, low, high).astype(np.int64)
+
+
+def _draw_dates_of_service(
+    size: int, profile: WorkloadProfileDict, rng: np.random.Generator
+) -> np.ndarray:
+    today = np.datetime64(date.today())
+    days = today - np.arange(DATE_RANGE_DAYS + 1).astype("timedelta64[D]")
+
+    # Seasonality raises the density of days around the peak month
+    months = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    weights = 1 + profile["seasonality_amplitude"] * np.cos(
+        2 * np.pi * (months - profile["seasonality_peak_month"]) / 12
+    )
+
+    return rng.choice(days, size=size, p=weights / weights.sum())
 
 
 class DataGenerator(ABC):
@@ -22,8 +63,11 @@ class DataGenerator(ABC):
 
 
 class PatientGenerator(DataGenerator):
-    def __init__(self, num_of_patients: int):
+    def __init__(self, num_of_patients: int, seed: Optional[int] = None):
         self.num_of_patients = num_of_patients
+        # A Faker of its own, so seeding it leaves other Faker users alone
+        self.fake = Faker()
+        self.fake.seed_instance(seed)
 
     def generate(self) -> List[PatientDict]:
         patients: List[PatientDict] = []
@@ -32,7 +76,7 @@ class PatientGenerator(DataGenerator):
             patients.append(
                 PatientDict(
                     patient_id=i + 1,
-                    name=fake.name(),
+                    name=self.fake.name(),
                 )
             )
 
@@ -40,76 +84,245 @@ class PatientGenerator(DataGenerator):
 
 
 class ClaimGenerator(DataGenerator):
-    def __init__(self, patients: List[PatientDict]):
+    def __init__(
+        self,
+        patients: List[PatientDict],
+        seed: Optional[int] = None,
+        profile: Optional[WorkloadProfileDict] = None,
+    ):
         self.patients = patients
+        self.rng = np.random.default_rng(seed)
+        self.profile = profile or WORKLOAD_PROFILES["uniform"]
 
-    def generate(self) -> List[ClaimDict]:
-        claims: List[ClaimDict] = []
-        claim_id = 1
-
-        for patient in self.patients:
-            random_claim_number = random.randint(2, 20)
-
-            for _ in range(random_claim_number):
-                charges_amount = round(random.uniform(0.000001, 10000), 2)
-                benefit_amount = round(random.uniform(0, charges_amount), 2)
-                date_of_service = fake.date_between(start_date="-2y", end_date="today")
-
-                claims.append(
-                    ClaimDict(
-                        claim_id=f"C{claim_id}",
-                        patient_id=patient["patient_id"],
-                        date_of_service=date_of_service,
-                        charges_amount=charges_amount,
-                        benefit_amount=benefit_amount,
-                    )
-                )
-                claim_id += 1
+    def generate_frame(self) -> pl.DataFrame:
+        patient_ids = np.array(
+            [patient["patient_id"] for patient in self.patients], dtype=np.int64
+        )
+        claim_counts = _draw_counts(
+            self.profile["claims_per_patient"], len(patient_ids), self.rng
+        )
+        num_of_claims = int(claim_counts.sum())
 
-        return claims
+        charges_amounts = np.round(
+            self.rng.uniform(0.000001, 10000, size=num_of_claims), 2
+        )
+        benefit_amounts = np.round(self.rng.uniform(0, charges_amounts), 2)
 
+        return pl.DataFrame(
+            {
+                "claim_id": [f"C{i}" for i in range(1, num_of_claims + 1)],
+                "patient_id": np.repeat(patient_ids, claim_counts),
+                "date_of_service": _draw_dates_of_service(
+                    num_of_claims, self.profile, self.rng
+                ),
+                "charges_amount": charges_amounts,
+                "benefit_amount": benefit_amounts,
+            },
+            schema=CLAIMS_SCHEMA,
+        )
 
-class InvoiceGenerator(DataGenerator):
-    def __init__(self, claims: List[ClaimDict]):
-        self.claims = claims
+    def generate(self) -> List[ClaimDict]:
+        return self.generate_frame().to_dicts()
 
-    def _distribute_amount(self, total: float, num_of_invoices: int) -> List[float]:
-        amount_parts = []
-        remaining = total
 
-        while len(amount_parts) < num_of_invoices - 1:
-            portion = random.uniform(0.2, 0.6)
-            value = round(remaining * portion, 2)
-            amount_parts.append(value)
-            remaining -= value
-        amount_parts.append(round(remaining, 2))
+class InvoiceGenerator(DataGenerator):
+    def __init__(
+        self,
+        claims: Union[List[ClaimDict], pl.DataFrame],
+        seed: Optional[int] = None,
+        profile: Optional[WorkloadProfileDict] = None,
+    ):
+        self.claims = (
+            claims
+            if isinstance(claims, pl.DataFrame)
+            else pl.DataFrame(claims, schema=CLAIMS_SCHEMA)
+        )
+        self.rng = np.random.default_rng(seed)
+        self.profile = profile or WORKLOAD_PROFILES["uniform"]
 
-        return amount_parts
+    def _distribute_amounts(
+        self, transaction_values: np.ndarray, invoice_counts: np.ndarray
+    ) -> np.ndarray:
+        # Each invoice takes 20-60% of what is still unpaid on its claim and
+        # the last one takes the rest. Rounding the running paid total rather
+        # than each part keeps the parts non-negative and summing to the total
+        claim_index = np.repeat(np.arange(len(invoice_counts)), invoice_counts)
+        is_last = np.zeros(len(claim_index), dtype=bool)
+        is_last[np.cumsum(invoice_counts) - 1] = True
+        # Claims with many invoices pay out in proportionally smaller steps,
+        # so hot claims do not end in a long run of zero-value invoices
+        step_scale = np.minimum(1.0, 5 / invoice_counts)[claim_index]
+        portions = np.where(
+            is_last,
+            1.0,
+            self.rng.uniform(0.2, 0.6, size=len(claim_index)) * step_scale,
+        )
 
-    def generate(self) -> List[InvoiceDict]:
-        invoices: List[InvoiceDict] = []
-        invoice_id = 1
-
-        for claim in self.claims:
-            random_invoice_number = random.randint(1, 5)
-            total_amount = claim["benefit_amount"]
-            payment_status = choose_strategy()
-            transaction_value = payment_status.calculate_amount(total_amount)
-            invoice_amount_parts = self._distribute_amount(
-                transaction_value, random_invoice_number
+        parts_df = (
+            pl.DataFrame(
+                {
+                    "claim_index": claim_index,
+                    "total": transaction_values[claim_index],
+                    "portion": portions,
+                }
+            )
+            .with_columns(
+                (pl.col("total") * (1 - (1 - pl.col("portion")).cum_prod()))
+                .round(2)
+                .over("claim_index")
+                .alias("paid_so_far")
             )
-            transaction_date = fake.date_between(start_date="-2y", end_date="today")
-
-            for amount_part in invoice_amount_parts:
-                invoices.append(
-                    InvoiceDict(
-                        invoice_id=f"I{invoice_id}",
-                        claim_id=claim["claim_id"],
-                        type_of_bill=random.choice(list(VALID_TYPE_OF_BILL)),
-                        transaction_value=amount_part,
-                        date_of_transaction=transaction_date,
+            .with_columns(
+                (pl.col("paid_so_far") - pl.col("paid_so_far").shift(1, fill_value=0.0))
+                .over("claim_index")
+                .round(2)
+                .abs()
+                .alias("amount")
+            )
+        )
+
+        return parts_df["amount"].to_numpy()
+
+    def _draw_transaction_dates(self, dates_of_service: np.ndarray) -> np.ndarray:
+        today = np.datetime64(date.today())
+        lag_mean_days = self.profile["payment_lag_mean_days"]
+        if lag_mean_days is None:
+            # Payment dates independent of the date of service
+            return today - self.rng.integers(
+                0, DATE_RANGE_DAYS + 1, size=len(dates_of_service)
+            ).astype("timedelta64[D]")
+
+        lag_days = self.rng.exponential(lag_mean_days, size=len(dates_of_service))
+        # Late-arriving payments land months after the date of service
+        is_late = (
+            self.rng.random(len(dates_of_service)) < self.profile["late_payment_rate"]
+        )
+        lag_days[is_late] = self.rng.integers(
+            self.profile["late_payment_min_days"],
+            self.profile["late_payment_max_days"] + 1,
+            size=int(is_late.sum()),
+        )
+        transaction_dates = dates_of_service + lag_days.astype("timedelta64[D]")
+
+        return np.minimum(transaction_dates, today)
+
+    def _inject_anomalies(self, invoices_df: pl.DataFrame) -> pl.DataFrame:
+        num_of_invoices = invoices_df.height
+        num_of_orphans = round(num_of_invoices * self.profile["orphan_invoice_rate"])
+        num_of_duplicates = round(
+            num_of_invoices * self.profile["duplicate_invoice_rate"]
+        )
+        if not num_of_orphans and not num_of_duplicates:
+            return invoices_df
+
+        # Duplicates resend an existing payment under a new invoice_id
+        duplicates_df = invoices_df.select(pl.exclude("invoice_id"))[
+            self.rng.choice(num_of_invoices, size=num_of_duplicates, replace=False)
+        ]
+
+        # Orphans reference claims that do not exist in the claims file
+        num_of_claims = self.claims.height
+        orphans_df = pl.DataFrame(
+            {
+                "claim_id": [
+                    f"C{i}"
+                    for i in range(
+                        num_of_claims + 1, num_of_claims + num_of_orphans + 1
                     )
-                )
-                invoice_id += 1
+                ],
+                "type_of_bill": self.rng.choice(
+                    sorted(VALID_TYPE_OF_BILL), size=num_of_orphans
+                ),
+                "transaction_value": np.round(
+                    self.rng.uniform(0, 10000, size=num_of_orphans), 2
+                ),
+                "date_of_transaction": np.datetime64(date.today())
+                - self.rng.integers(0, DATE_RANGE_DAYS + 1, size=num_of_orphans).astype(
+                    "timedelta64[D]"
+                ),
+            },
+            schema={k: v for k, v in INVOICES_SCHEMA.items() if k != "invoice_id"},
+        )
+
+        # Orphans carry no patient_id, so they stay unmatched
+        extra_df = pl.concat([duplicates_df, orphans_df], how="diagonal")
+        return pl.concat(
+            [
+                invoices_df,
+                extra_df.select(
+                    pl.format(
+                        "I{}",
+                        pl.int_range(
+                            num_of_invoices + 1, num_of_invoices + 1 + pl.len()
+                        ),
+                    ).alias("invoice_id"),
+                    pl.all(),
+                ),
+            ]
+        )
 
-        return invoices
+    def _unlink_claim_ids(self, invoices_df: pl.DataFrame) -> pl.DataFrame:
+        num_of_unlinked = round(
+            invoices_df.height * self.profile["unlinked_invoice_rate"]
+        )
+        if not num_of_unlinked:
+            return invoices_df
+
+        # Half of the unlinked invoices lose their claim_id, the other half
+        # drop its "C" prefix, a keying error that never hits another claim
+        unlinked = self.rng.choice(
+            invoices_df.height, size=num_of_unlinked, replace=False
+        )
+        is_missing = pl.Series(np.isin(np.arange(invoices_df.height), unlinked[::2]))
+        is_mistyped = pl.Series(np.isin(np.arange(invoices_df.height), unlinked[1::2]))
+        return invoices_df.with_columns(
+            pl.when(is_missing)
+            .then(None)
+            .when(is_mistyped)
+            .then(pl.col("claim_id").str.strip_prefix("C"))
+            .otherwise(pl.col("claim_id"))
+            .alias("claim_id")
+        )
+
+    def generate_frame(self) -> pl.DataFrame:
+        num_of_claims = self.claims.height
+        invoice_counts = _draw_counts(
+            self.profile["invoices_per_claim"], num_of_claims, self.rng
+        )
+        transaction_values = calculate_amounts(self.claims["benefit_amount"], self.rng)
+        # All invoices of a claim share one transaction date
+        transaction_dates = self._draw_transaction_dates(
+            self.claims["date_of_service"].to_numpy()
+        )
+        bill_types = sorted(VALID_TYPE_OF_BILL)
+        num_of_invoices = int(invoice_counts.sum())
+
+        invoices_df = pl.DataFrame(
+            {
+                "invoice_id": [f"I{i}" for i in range(1, num_of_invoices + 1)],
+                "claim_id": np.repeat(
+                    self.claims["claim_id"].to_numpy(), invoice_counts
+                ),
+                "type_of_bill": self.rng.choice(bill_types, size=num_of_invoices),
+                "transaction_value": self._distribute_amounts(
+                    transaction_values, invoice_counts
+                ),
+                "date_of_transaction": np.repeat(transaction_dates, invoice_counts),
+            },
+            schema=INVOICES_SCHEMA,
+        )
+        # Remittances that may lack a usable claim_id name the patient
+        if self.profile["unlinked_invoice_rate"] > 0:
+            invoices_df = invoices_df.insert_column(
+                2,
+                pl.Series(
+                    "patient_id",
+                    np.repeat(self.claims["patient_id"].to_numpy(), invoice_counts),
+                    dtype=INVOICES_OPTIONAL_SCHEMA["patient_id"],
+                ),
+            )
+
+        return self._unlink_claim_ids(self._inject_anomalies(invoices_df))
+
+    def generate(self) -> List[InvoiceDict]:
+        return self.generate_frame().to_dicts()
@@ -0,0 +1,199 @@
+import csv
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import polars as pl
+
+from models import CSV_DATE_FORMAT, IngestStatsDict
+from .compression import detect_compression, iter_decompressed_blocks, open_decompressed
+
+# Plain files are split into byte ranges of about this size, each parsed on
+# its own thread; smaller files are parsed as a single range
+INGEST_CHUNK_BYTES = 64 * 1024 * 1024
+
+HEADER_READ_BYTES = 64 * 1024
+
+
+def read_csv_header(file_path: Path) -> List[str]:
+    # Only the head of the file is read (and decompressed), so a wrong header
+    # is reported before any of the body is parsed
+    head = b""
+    with open_decompressed(file_path) as f:
+        while b"\n" not in head:
+            data = f.read(HEADER_READ_BYTES)
+            if not data:
+                break
+            head += data
+
+    line = head.split(b"\n", 1)[0].rstrip(b"\r").decode("utf-8-sig")
+    return next(csv.reader([line]), [])
+
+
+def _read_schema(
+    header: List[str], schema: Dict[str, pl.DataType]
+) -> Dict[str, pl.DataType]:
+    # The full schema in header order, so nothing is inferred. Dates are read
+    # as strings and parsed with the known format instead of being detected.
+    return {
+        column: pl.Utf8 if schema[column] == pl.Date else schema[column]
+        for column in header
+    }
+
+
+def _parse_dates(df: pl.DataFrame, schema: Dict[str, pl.DataType]) -> pl.DataFrame:
+    return df.with_columns(
+        pl.col(column).str.to_date(CSV_DATE_FORMAT)
+        for column in df.columns
+        if schema[column] == pl.Date
+    )
+
+
+def _parse_block(
+    data: bytes,
+    read_schema: Dict[str, pl.DataType],
+    projection: List[int],
+    schema: Dict[str, pl.DataType],
+) -> pl.DataFrame:
+    # Blocks never include the header; the columns are projected by their
+    # position while parsing
+    block_df = pl.read_csv(
+        io.BytesIO(data), has_header=False, schema=read_schema, columns=projection
+    )
+    return _parse_dates(block_df, schema)
+
+
+def _byte_ranges(file_path: Path, chunk_bytes: int) -> List[Tuple[int, int]]:
+    # Ranges start right after a newline, so every range holds whole rows.
+    # This assumes no quoted field spans lines, which holds for every input.
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        f.readline()
+        offsets = [f.tell()]
+        while offsets[-1] + chunk_bytes < size:
+            f.seek(offsets[-1] + chunk_bytes)
+            f.readline()
+            if f.tell() >= size:
+                break
+            offsets.append(f.tell())
+    offsets.append(size)
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if end > start]
+
+
+def _read_byte_range(
+    file_path: Path,
+    start: int,
+    end: int,
+    read_schema: Dict[str, pl.DataType],
+    projection: List[int],
+    schema: Dict[str, pl.DataType],
+) -> List[pl.DataFrame]:
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return [_parse_block(data, read_schema, projection, schema)]
+
+
+def _read_compressed_file(
+    file_path: Path,
+    read_schema: Dict[str, pl.DataType],
+    projection: List[int],
+    schema: Dict[str, pl.DataType],
+) -> List[pl.DataFrame]:
+    # Decompression runs ahead on its own thread; the header line was already
+    # checked, so it is dropped from the first block
+    frames = []
+    is_first_block = True
+    for block in iter_decompressed_blocks(file_path):
+        if is_first_block:
+            block = block[block.find(b"\n") + 1 :]
+            is_first_block = False
+        if block:
+            frames.append(_parse_block(block, read_schema, projection, schema))
+    return frames
+
+
+def read_csv_strict(
+    file_paths: List[Path],
+    schema: Dict[str, pl.DataType],
+    columns: Sequence[str],
+    max_workers: Optional[int] = None,
+    chunk_bytes: int = INGEST_CHUNK_BYTES,
+) -> Tuple[pl.DataFrame, IngestStatsDict]:
+    tasks: List[Callable[[], List[pl.DataFrame]]] = []
+    for file_path in file_paths:
+        header = read_csv_header(file_path)
+        read_schema = _read_schema(header, schema)
+        projection = [header.index(column) for column in columns if column in header]
+
+        if detect_compression(file_path) is not None:
+            tasks.append(
+                partial(
+                    _read_compressed_file, file_path, read_schema, projection, schema
+                )
+            )
+            continue
+
+        tasks.extend(
+            partial(
+                _read_byte_range,
+                file_path,
+                start,
+                end,
+                read_schema,
+                projection,
+                schema,
+            )
+            for start, end in _byte_ranges(file_path, chunk_bytes)
+        )
+
+    max_workers = max_workers or min(len(tasks), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = [
+            frame
+            for result in executor.map(lambda task: task(), tasks)
+            for frame in result
+        ]
+
+    if frames:
+        # Parts without an optional column get it as nulls
+        df = pl.concat(frames, how="diagonal_relaxed", rechunk=True)
+    else:
+        df = pl.DataFrame(schema={column: schema[column] for column in columns})
+    df = df.select(column for column in columns if column in df.columns)
+
+    stats = IngestStatsDict(
+        files=len(file_paths),
+        chunks=len(frames),
+        rows=df.height,
+        bytes=sum(os.path.getsize(file_path) for file_path in file_paths),
+    )
+    return df, stats
+
+
+def scan_csv_strict(
+    file_paths: List[Path],
+    schema: Dict[str, pl.DataType],
+    columns: Sequence[str],
+) -> pl.LazyFrame:
+    # Plain files sharing one header are scanned lazily with the full schema;
+    # anything else is parsed up front
+    headers = [read_csv_header(file_path) for file_path in file_paths]
+    if any(detect_compression(path) is not None for path in file_paths) or any(
+        header != headers[0] for header in headers
+    ):
+        return read_csv_strict(file_paths, schema, columns)[0].lazy()
+
+    file_columns = [column for column in columns if column in headers[0]]
+    return (
+        pl.scan_csv(file_paths, schema=_read_schema(headers[0], schema))
+        .select(file_columns)
+        .with_columns(
+            pl.col(column).str.to_date(CSV_DATE_FORMAT)
+            for column in file_columns
+            if schema[column] == pl.Date
+        )
+    )
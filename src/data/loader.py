@@ -1,17 +1,51 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
 
 import polars as pl
 
 from constants import VALID_TYPE_OF_BILL
+from .compression import resolve_input_files, read_csv_input, scan_csv_input
+from .ingest import read_csv_header, read_csv_strict, scan_csv_strict
 from models import (
+    PATIENT_SCHEMA,
     CLAIMS_SCHEMA,
     INVOICES_SCHEMA,
+    INVOICES_OPTIONAL_SCHEMA,
+    PATIENT_REQUIRED_COLUMNS,
     CLAIMS_REQUIRED_COLUMNS,
     INVOICES_REQUIRED_COLUMNS,
+    IngestStatsDict,
 )
 
 
+# Sampled claims are chosen by hashing claim_id into this many buckets, so a
+# claim and every one of its invoices always land in the same sample
+SAMPLE_HASH_BUCKETS = 10_000
+
+INVOICES_READ_SCHEMA = {**INVOICES_SCHEMA, **INVOICES_OPTIONAL_SCHEMA}
+
+
+def claim_sample_filter(fraction: float, seed: int = 0) -> pl.Expr:
+    threshold = round(fraction * SAMPLE_HASH_BUCKETS)
+    return pl.col("claim_id").hash(seed) % SAMPLE_HASH_BUCKETS < threshold
+
+
+def _null_rules(columns: Set[str], message: str) -> List[Tuple[pl.Expr, str]]:
+    return [
+        (
+            pl.col(column).null_count(),
+            "Found " + message.replace("{column}", column),
+        )
+        for column in sorted(columns)
+    ]
+
+
+def _duplicate_count(column: str) -> pl.Expr:
+    # Number of distinct values that occur more than once
+    return pl.col(column).filter(pl.col(column).is_duplicated()).n_unique()
+
+
 class DataValidationError(Exception):
     """Raised when data validation fails."""
 
@@ -19,125 +53,284 @@ class DataValidationError(Exception):
 
 
 class DataLoader(ABC):
+    # With strict ingest the header of every file is checked before anything
+    # is parsed, and the files are read with the full schema in parallel
+    # byte-range chunks; ingest_stats then holds what was read
+    _file_path: Path
+    _file_paths: List[Path]
+    _strict: bool = False
+    ingest_stats: Optional[IngestStatsDict] = None
+
+    def _check_header(self, schema: Dict[str, pl.DataType]) -> None:
+        """Fail on missing or unknown columns. Raise DataValidationError if invalid."""
+        for file_path in self._file_paths:
+            header = read_csv_header(file_path)
+            missing = self._required_columns() - set(header)
+            if missing:
+                raise DataValidationError(
+                    f"Missing required columns in {file_path.name}: {missing}"
+                )
+            unknown = set(header) - set(schema)
+            if unknown:
+                raise DataValidationError(
+                    f"Unknown columns in {file_path.name}: {unknown}"
+                )
+
+    def _check_required_columns(self, columns: List[str]) -> None:
+        """Fail on missing required columns. Raise DataValidationError if invalid."""
+        missing = self._required_columns() - set(columns)
+        if missing:
+            raise DataValidationError(
+                f"Missing required columns in {self._file_path.name}: {missing}"
+            )
+
+    def _read_strict(
+        self, schema: Dict[str, pl.DataType], columns: List[str]
+    ) -> pl.DataFrame:
+        self._check_header(schema)
+        try:
+            df, self.ingest_stats = read_csv_strict(self._file_paths, schema, columns)
+        except pl.exceptions.PolarsError as e:
+            raise DataValidationError(
+                f"Could not parse {self._file_path.name} with its schema: {e}"
+            ) from e
+        return df
+
+    def _scan_strict(
+        self, schema: Dict[str, pl.DataType], columns: List[str]
+    ) -> pl.LazyFrame:
+        self._check_header(schema)
+        return scan_csv_strict(self._file_paths, schema, columns)
+
     @abstractmethod
-    def _validate_data(self, df: pl.DataFrame) -> None:
-        """Validate the loaded data. Raise DataValidationError if invalid."""
+    def _required_columns(self) -> Set[str]:
+        """Columns every input file must have."""
         pass
 
+    @abstractmethod
+    def _validation_rules(self) -> List[Tuple[pl.Expr, str]]:
+        """Expressions counting invalid rows, each with the message to raise."""
+        pass
+
+    def _validate_data(self, data: Union[pl.DataFrame, pl.LazyFrame]) -> None:
+        """Validate the loaded data. Raise DataValidationError if invalid."""
+        rules = self._validation_rules()
+
+        # Every rule is counted in a single pass; a lazy scan is validated
+        # with the streaming engine, without materializing it
+        counts = (
+            data.lazy()
+            .select(expr.alias(f"rule_{i}") for i, (expr, _) in enumerate(rules))
+            .collect(engine="streaming" if isinstance(data, pl.LazyFrame) else "auto")
+            .row(0)
+        )
+        for count, (_, message) in zip(counts, rules):
+            if count > 0:
+                raise DataValidationError(message.format(count=count))
+
     @abstractmethod
     def load(self) -> pl.DataFrame:
         """Load and validate data from CSV file."""
         pass
 
 
-class ClaimsLoader(DataLoader):
-    def __init__(self, file_path: str):
+class PatientsLoader(DataLoader):
+    def __init__(self, file_path: str, strict: bool = False):
+        self._strict = strict
         self._file_path = Path(file_path)
-        if not self._file_path.exists():
-            raise FileNotFoundError(f"Claims file not found: {file_path}")
+        self._file_paths = resolve_input_files(file_path)
+        if not self._file_paths:
+            raise FileNotFoundError(f"Patients file not found: {file_path}")
 
-    def _validate_data(self, df: pl.DataFrame) -> None:
-        for col in CLAIMS_REQUIRED_COLUMNS:
-            null_count = df.filter(pl.col(col).is_null()).height
-            if null_count > 0:
-                raise DataValidationError(
-                    f"Found {null_count} rows with null {col} in claims!"
-                )
+    def _required_columns(self) -> Set[str]:
+        return PATIENT_REQUIRED_COLUMNS
 
-        invalid_patient_ids = df.filter(pl.col("patient_id") <= 0).height
-        if invalid_patient_ids > 0:
-            raise DataValidationError(
-                f"Found {invalid_patient_ids} claims with non-positive patient_id"
-            )
+    def _validation_rules(self) -> List[Tuple[pl.Expr, str]]:
+        return [
+            *_null_rules(
+                PATIENT_REQUIRED_COLUMNS, "{count} rows with null {column} in patients!"
+            ),
+            (
+                (pl.col("patient_id") <= 0).sum(),
+                "Found {count} patients with non-positive patient_id",
+            ),
+            (_duplicate_count("patient_id"), "Found {count} duplicate patient_ids"),
+        ]
 
-        negative_charges = df.filter(pl.col("charges_amount") < 0).height
-        if negative_charges > 0:
-            raise DataValidationError(
-                f"Found {negative_charges} claims with negative charges_amount"
+    def load(self) -> pl.DataFrame:
+        if self._strict:
+            patients_df = self._read_strict(PATIENT_SCHEMA, list(PATIENT_SCHEMA))
+        else:
+            patients_df = read_csv_input(
+                self._file_paths, schema_overrides=PATIENT_SCHEMA
             )
 
-        negative_benefits = df.filter(pl.col("benefit_amount") < 0).height
-        if negative_benefits > 0:
-            raise DataValidationError(
-                f"Found {negative_benefits} claims with negative benefit_amount"
-            )
+        self._check_required_columns(patients_df.columns)
 
-        invalid_benefits = df.filter(
-            pl.col("benefit_amount") > pl.col("charges_amount")
-        ).height
-        if invalid_benefits > 0:
-            raise DataValidationError(
-                f"Found {invalid_benefits} claims where benefit_amount > charges_amount"
-            )
+        self._validate_data(patients_df)
+
+        return patients_df
 
-        duplicate_claims = (
-            df.group_by("claim_id").agg(pl.count()).filter(pl.col("count") > 1).height
-        )
-        if duplicate_claims > 0:
-            raise DataValidationError(f"Found {duplicate_claims} duplicate claim_ids")
+
+class ClaimsLoader(DataLoader):
+    def __init__(self, file_path: str, strict: bool = False):
+        self._strict = strict
+        self._file_path = Path(file_path)
+        self._file_paths = resolve_input_files(file_path)
+        if not self._file_paths:
+            raise FileNotFoundError(f"Claims file not found: {file_path}")
+
+    def _required_columns(self) -> Set[str]:
+        return CLAIMS_REQUIRED_COLUMNS
+
+    def _validation_rules(self) -> List[Tuple[pl.Expr, str]]:
+        return [
+            *_null_rules(
+                CLAIMS_REQUIRED_COLUMNS, "{count} rows with null {column} in claims!"
+            ),
+            (
+                (pl.col("patient_id") <= 0).sum(),
+                "Found {count} claims with non-positive patient_id",
+            ),
+            (
+                (pl.col("charges_amount") < 0).sum(),
+                "Found {count} claims with negative charges_amount",
+            ),
+            (
+                (pl.col("benefit_amount") < 0).sum(),
+                "Found {count} claims with negative benefit_amount",
+            ),
+            (
+                (pl.col("benefit_amount") > pl.col("charges_amount")).sum(),
+                "Found {count} claims where benefit_amount > charges_amount",
+            ),
+            (_duplicate_count("claim_id"), "Found {count} duplicate claim_ids"),
+        ]
 
     def load(self) -> pl.DataFrame:
-        claims_df = pl.read_csv(self._file_path, schema_overrides=CLAIMS_SCHEMA)
+        if self._strict:
+            claims_df = self._read_strict(CLAIMS_SCHEMA, list(CLAIMS_SCHEMA))
+        else:
+            claims_df = read_csv_input(self._file_paths, schema_overrides=CLAIMS_SCHEMA)
 
-        required_columns = CLAIMS_REQUIRED_COLUMNS
-        if not required_columns.issubset(claims_df.columns):
-            missing = required_columns - set(claims_df.columns)
-            raise DataValidationError(
-                f"Missing required columns in {self._file_path.name}: {missing}"
-            )
+        self._check_required_columns(claims_df.columns)
 
         self._validate_data(claims_df)
 
         return claims_df
 
+    def scan(self) -> pl.LazyFrame:
+        # Validated without being materialized, for plans that stream the
+        # input instead of loading it
+        if self._strict:
+            claims_lf = self._scan_strict(CLAIMS_SCHEMA, list(CLAIMS_SCHEMA))
+        else:
+            claims_lf = scan_csv_input(self._file_paths, schema_overrides=CLAIMS_SCHEMA)
+
+        self._check_required_columns(claims_lf.collect_schema().names())
+
+        self._validate_data(claims_lf)
+
+        return claims_lf
+
+    def load_sample(self, fraction: float, seed: int = 0) -> pl.DataFrame:
+        if self._strict:
+            claims_lf = self._scan_strict(CLAIMS_SCHEMA, list(CLAIMS_SCHEMA))
+        else:
+            claims_lf = scan_csv_input(self._file_paths, schema_overrides=CLAIMS_SCHEMA)
+
+        self._check_required_columns(claims_lf.collect_schema().names())
+
+        claims_df = claims_lf.filter(claim_sample_filter(fraction, seed)).collect()
+        self._validate_data(claims_df)
+
+        return claims_df
+
 
 class InvoicesLoader(DataLoader):
-    def __init__(self, file_path: str):
+    def __init__(
+        self, file_path: str, allow_unmatched: bool = False, strict: bool = False
+    ):
+        # With allow_unmatched, invoices without a claim_id are kept for the
+        # secondary patient, date and amount match instead of being rejected
+        self._allow_unmatched = allow_unmatched
+        self._strict = strict
         self._file_path = Path(file_path)
-        if not self._file_path.exists():
+        self._file_paths = resolve_input_files(file_path)
+        if not self._file_paths:
             raise FileNotFoundError(f"Invoices file not found: {file_path}")
 
-    def _validate_data(self, df: pl.DataFrame) -> None:
-        for col in INVOICES_REQUIRED_COLUMNS:
-            null_count = df.filter(pl.col(col).is_null()).height
-            if null_count > 0:
-                raise DataValidationError(
-                    f"Found {null_count} rows with null {col} in invoices - data quality issue!"
-                )
+    def _required_columns(self) -> Set[str]:
+        return INVOICES_REQUIRED_COLUMNS
 
-        invalid_types = df.filter(
-            ~pl.col("type_of_bill").is_in(VALID_TYPE_OF_BILL)
-        ).height
-        if invalid_types > 0:
-            raise DataValidationError(
-                f"Found {invalid_types} invoices with invalid type_of_bill (must be 'fee' or 'procedure payment')"
-            )
+    def _columns(self) -> List[str]:
+        # The optional patient_id is only read for the secondary match
+        if self._allow_unmatched:
+            return list(INVOICES_READ_SCHEMA)
+        return list(INVOICES_SCHEMA)
 
-        negative_transactions = df.filter(pl.col("transaction_value") < 0).height
-        if negative_transactions > 0:
-            raise DataValidationError(
-                f"Found {negative_transactions} invoices with negative transaction_value"
+    def _validation_rules(self) -> List[Tuple[pl.Expr, str]]:
+        return [
+            *_null_rules(
+                (
+                    INVOICES_REQUIRED_COLUMNS - {"claim_id"}
+                    if self._allow_unmatched
+                    else INVOICES_REQUIRED_COLUMNS
+                ),
+                "{count} rows with null {column} in invoices - data quality issue!",
+            ),
+            (
+                (~pl.col("type_of_bill").is_in(VALID_TYPE_OF_BILL)).sum(),
+                "Found {count} invoices with invalid type_of_bill (must be 'fee' or 'procedure payment')",
+            ),
+            (
+                (pl.col("transaction_value") < 0).sum(),
+                "Found {count} invoices with negative transaction_value",
+            ),
+            (_duplicate_count("invoice_id"), "Found {count} duplicate invoice_ids"),
+        ]
+
+    def load(self) -> pl.DataFrame:
+        if self._strict:
+            invoices_df = self._read_strict(INVOICES_READ_SCHEMA, self._columns())
+        else:
+            invoices_df = read_csv_input(
+                self._file_paths, schema_overrides=INVOICES_READ_SCHEMA
             )
 
-        duplicate_invoices = (
-            df.group_by("invoice_id").agg(pl.count()).filter(pl.col("count") > 1).height
-        )
-        if duplicate_invoices > 0:
-            raise DataValidationError(
-                f"Found {duplicate_invoices} duplicate invoice_ids"
+        self._check_required_columns(invoices_df.columns)
+
+        self._validate_data(invoices_df)
+
+        return invoices_df
+
+    def scan(self) -> pl.LazyFrame:
+        # Validated without being materialized, for plans that stream the
+        # input instead of loading it
+        if self._strict:
+            invoices_lf = self._scan_strict(INVOICES_READ_SCHEMA, self._columns())
+        else:
+            invoices_lf = scan_csv_input(
+                self._file_paths, schema_overrides=INVOICES_READ_SCHEMA
             )
 
-    def load(self) -> pl.DataFrame:
-        invoices_df = pl.read_csv(self._file_path, schema_overrides=INVOICES_SCHEMA)
+        self._check_required_columns(invoices_lf.collect_schema().names())
 
-        required_columns = INVOICES_REQUIRED_COLUMNS
-        if not required_columns.issubset(invoices_df.columns):
-            missing = required_columns - set(invoices_df.columns)
+        self._validate_data(invoices_lf)
 
-            raise DataValidationError(
-                f"Missing required columns in {self._file_path.name}: {missing}"
+        return invoices_lf
+
+    def load_sample(self, fraction: float, seed: int = 0) -> pl.DataFrame:
+        if self._strict:
+            invoices_lf = self._scan_strict(INVOICES_READ_SCHEMA, self._columns())
+        else:
+            invoices_lf = scan_csv_input(
+                self._file_paths, schema_overrides=INVOICES_READ_SCHEMA
             )
 
+        self._check_required_columns(invoices_lf.collect_schema().names())
+
+        invoices_df = invoices_lf.filter(claim_sample_filter(fraction, seed)).collect()
         self._validate_data(invoices_df)
 
         return invoices_df
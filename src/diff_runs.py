@@ -0,0 +1,50 @@
+import argparse
+import json
+import os
+import time
+
+from processing import analyze_run_diff, diff_reconciliation_runs
+from storage import scan_reconciled_results
+from utils import get_project_root
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare the reconciled results of two runs claim by claim"
+    )
+    parser.add_argument(
+        "previous", help="Export directory, .arrow or Parquet of the earlier run"
+    )
+    parser.add_argument(
+        "current", help="Export directory, .arrow or Parquet of the later run"
+    )
+    parser.add_argument(
+        "--output-parquet", help="Write every changed claim to this Parquet file"
+    )
+    parser.add_argument(
+        "--output-csv", help="Write every changed claim to this CSV file"
+    )
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    try:
+        diff_df = diff_reconciliation_runs(
+            scan_reconciled_results(args.previous),
+            scan_reconciled_results(args.current),
+        )
+    except FileNotFoundError as e:
+        parser.exit(1, f"❌ {e}\n")
+
+    if args.output_parquet:
+        diff_df.write_parquet(os.path.join(get_project_root(), args.output_parquet))
+    if args.output_csv:
+        diff_df.write_csv(os.path.join(get_project_root(), args.output_csv))
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    print(json.dumps(analyze_run_diff(diff_df), indent=2))
+    print(f"⏱️ Diff completed in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
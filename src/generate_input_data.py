@@ -1,19 +1,35 @@
 import os
+from typing import Optional
 
+import numpy as np
 import polars as pl
 
 from data import (
     PatientGenerator,
     ClaimGenerator,
     InvoiceGenerator,
+    write_csv_output,
 )
-from models import CLAIMS_SCHEMA, INVOICES_SCHEMA
+from constants import WORKLOAD_PROFILES
+from models import PATIENT_SCHEMA
 from utils import get_project_root, ensure_directory_exists
 
 
 def generate_input_data(
-    num_of_patients: int, claims_file_path: str, invoices_file_path: str
+    num_of_patients: int,
+    claims_file_path: str,
+    invoices_file_path: str,
+    patients_file_path: Optional[str] = None,
+    profile_name: str = "uniform",
+    seed: Optional[int] = None,
 ):
+    if profile_name not in WORKLOAD_PROFILES:
+        raise ValueError(
+            f"Unknown workload profile {profile_name!r}, "
+            f"expected one of {sorted(WORKLOAD_PROFILES)}"
+        )
+    profile = WORKLOAD_PROFILES[profile_name]
+
     # Convert relative paths to absolute paths
     project_root = get_project_root()
     absolute_claims_path = os.path.join(project_root, claims_file_path)
@@ -23,16 +39,24 @@ def generate_input_data(
     ensure_directory_exists(absolute_claims_path)
     ensure_directory_exists(absolute_invoices_path)
 
-    print(f"📊 Generating patients...")
-    patients = PatientGenerator(num_of_patients).generate()
-    claims = ClaimGenerator(patients).generate()
-    invoices = InvoiceGenerator(claims).generate()
+    print(f"📊 Generating patients ({profile_name} workload profile)...")
+    patients = PatientGenerator(num_of_patients, seed).generate()
+    # Separate seeds keep claims and invoices reproducible independently
+    claim_seed, invoice_seed = np.random.SeedSequence(seed).generate_state(2).tolist()
+    claims_df = ClaimGenerator(patients, claim_seed, profile).generate_frame()
+    invoices_df = InvoiceGenerator(claims_df, invoice_seed, profile).generate_frame()
+
+    # A .gz, .bz2 or .zst suffix writes the file compressed
+    write_csv_output(claims_df, absolute_claims_path)
+    write_csv_output(invoices_df, absolute_invoices_path)
 
-    claims_df = pl.DataFrame(claims, schema=CLAIMS_SCHEMA)
-    invoices_df = pl.DataFrame(invoices, schema=INVOICES_SCHEMA)
+    if patients_file_path:
+        absolute_patients_path = os.path.join(project_root, patients_file_path)
+        ensure_directory_exists(absolute_patients_path)
 
-    claims_df.write_csv(absolute_claims_path)
-    invoices_df.write_csv(absolute_invoices_path)
+        patients_df = pl.DataFrame(patients, schema=PATIENT_SCHEMA)
+        write_csv_output(patients_df, absolute_patients_path)
+        print(f"✅ Generated patients -> {absolute_patients_path}")
 
     print(f"✅ Generated claims -> {absolute_claims_path}")
     print(f"✅ Generated invoices -> {absolute_invoices_path}")
@@ -1,15 +1,191 @@
-from generate_input_data import generate_input_data
-from reconciliation_engine import run_reconciliation_engine
+import argparse
+import sys
+from contextlib import redirect_stdout
+
+from constants import REPORT_COMPRESSION_SUFFIXES, WORKLOAD_PROFILES
+from resource_control import apply_cpu_budget, parse_cpu_list
+from utils import parse_memory_size
+
+# Where checkpoints are kept when --resume is given without --checkpoint-dir
+DEFAULT_CHECKPOINT_DIR = "output/runs"
+
+# The preview gets its own report so it never overwrites a full one
+PREVIEW_FILE_PATH = "output/preview.html"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate input data and run the reconciliation engine"
+    )
+    parser.add_argument(
+        "--profile",
+        default="uniform",
+        choices=sorted(WORKLOAD_PROFILES),
+        help="Workload profile of the generated input data",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed for reproducible patients, claims and invoices",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=parse_memory_size,
+        help="Memory budget (e.g. 8G) used to choose eager, streaming or partitioned execution",
+    )
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        help="Threads for Polars and the numeric libraries, and the CPU budget the heavy stages share (defaults to every available CPU)",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=parse_cpu_list,
+        metavar="LIST",
+        help="Pin the run to these CPUs (e.g. 0-15,32-47)",
+    )
+    parser.add_argument(
+        "--numa-node",
+        type=int,
+        help="Pin the run to the CPUs of this NUMA node",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse the existing input data and skip every stage with a valid checkpoint",
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Checkpoint run ID (defaults to a fingerprint of the inputs)",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        help=f"Checkpoint every stage in this directory so the run can be resumed (with --resume it defaults to {DEFAULT_CHECKPOINT_DIR})",
+    )
+    parser.add_argument(
+        "--export-dir",
+        help="Write the results as Arrow IPC files and Parquet partitioned by status",
+    )
+    parser.add_argument(
+        "--fuzzy-match",
+        action="store_true",
+        help="Match invoices with a missing or unknown claim_id by patient, date and amount",
+    )
+    parser.add_argument(
+        "--cube",
+        metavar="PATH",
+        help="Write the aggregate cube for drill-downs to this Parquet file",
+    )
+    parser.add_argument(
+        "--preview",
+        type=float,
+        metavar="FRACTION",
+        help=f"Only reconcile this fraction of the claims (e.g. 0.01) and write estimates to {PREVIEW_FILE_PATH}",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="PATH",
+        help="Write an indexed SQLite store of every claim and its invoices for query_claims.py",
+    )
+    parser.add_argument(
+        "--strict-ingest",
+        action="store_true",
+        help="Check input headers up front and parse with the full schema in parallel chunks",
+    )
+    parser.add_argument(
+        "--previous-results",
+        metavar="PATH",
+        help="Export directory of an earlier run to diff the results against",
+    )
+    parser.add_argument(
+        "--stream",
+        metavar="PATH",
+        help='Stream the results as Arrow IPC to a file or named pipe ("-" for stdout)',
+    )
+    parser.add_argument(
+        "--report-assets-dir",
+        help="Link shared, content-hashed report.css and report.js from this directory",
+    )
+    parser.add_argument(
+        "--report-compression",
+        choices=sorted(REPORT_COMPRESSION_SUFFIXES.values()),
+        help="Write the HTML report gzip- or brotli-compressed",
+    )
+    parser.add_argument(
+        "--no-html-report",
+        action="store_true",
+        help="Skip rendering the HTML report",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
     NUM_OF_PATIENTS = 200
+    PATIENTS_FILE_PATH = "input/patients.csv"
     CLAIMS_FILE_PATH = "input/claims.csv"
     INVOICES_FILE_PATH = "input/invoices.csv"
     OUTPUT_FILE_PATH = "output/report.html"
 
-    # Generate input data
-    generate_input_data(NUM_OF_PATIENTS, CLAIMS_FILE_PATH, INVOICES_FILE_PATH)
+    args = parse_args()
+    # Keep stdout clean for the consumer when the results stream there
+    progress_stream = sys.stderr if args.stream == "-" else sys.stdout
+
+    cpu_threads = None
+    if any(
+        option is not None for option in (args.cpu_threads, args.cpus, args.numa_node)
+    ):
+        with redirect_stdout(progress_stream):
+            cpu_threads = apply_cpu_budget(args.cpu_threads, args.cpus, args.numa_node)
+
+    # Imported only now: Polars sizes its thread pool on import
+    from generate_input_data import generate_input_data
+    from reconciliation_engine import run_reconciliation_engine
+
+    if args.report_compression:
+        OUTPUT_FILE_PATH += {
+            compression: suffix
+            for suffix, compression in REPORT_COMPRESSION_SUFFIXES.items()
+        }[args.report_compression]
+
+    # Generate input data; a resumed run keeps the inputs its checkpoints
+    # were fingerprinted against
+    if not args.resume:
+        with redirect_stdout(progress_stream):
+            generate_input_data(
+                NUM_OF_PATIENTS,
+                CLAIMS_FILE_PATH,
+                INVOICES_FILE_PATH,
+                PATIENTS_FILE_PATH,
+                profile_name=args.profile,
+                seed=args.seed,
+            )
+
+    # Profiles that write invoices with a missing claim_id need the fuzzy
+    # match to accept them, so it is turned on for those profiles
+    fuzzy_matching = (
+        args.fuzzy_match or WORKLOAD_PROFILES[args.profile]["unlinked_invoice_rate"] > 0
+    )
 
     # Run the reconciliation engine
-    run_reconciliation_engine(CLAIMS_FILE_PATH, INVOICES_FILE_PATH, OUTPUT_FILE_PATH)
+    run_reconciliation_engine(
+        CLAIMS_FILE_PATH,
+        INVOICES_FILE_PATH,
+        PREVIEW_FILE_PATH if args.preview is not None else OUTPUT_FILE_PATH,
+        patients_file_path=PATIENTS_FILE_PATH,
+        checkpoint_dir=args.checkpoint_dir
+        or (DEFAULT_CHECKPOINT_DIR if args.resume else None),
+        run_id=args.run_id,
+        resume=args.resume,
+        export_dir=args.export_dir,
+        stream_path=args.stream,
+        html_report=not args.no_html_report,
+        max_memory=args.max_memory,
+        previous_results_path=args.previous_results,
+        report_assets_dir=args.report_assets_dir,
+        fuzzy_matching=fuzzy_matching,
+        strict_ingest=args.strict_ingest,
+        cube_file_path=args.cube,
+        store_file_path=args.store,
+        preview_fraction=args.preview,
+        cpu_threads=cpu_threads,
+    )
@@ -2,6 +2,8 @@ from .schemas import (
     PATIENT_SCHEMA,
     CLAIMS_SCHEMA,
     INVOICES_SCHEMA,
+    INVOICES_OPTIONAL_SCHEMA,
+    CSV_DATE_FORMAT,
     PATIENT_REQUIRED_COLUMNS,
     CLAIMS_REQUIRED_COLUMNS,
     INVOICES_REQUIRED_COLUMNS,
@@ -10,6 +12,14 @@ from .types import (
     PatientDict,
     ClaimDict,
     InvoiceDict,
+    BatchJobDict,
+    BatchJobResultDict,
+    InboxFileDict,
+    InboxBatchLogDict,
+    ExecutionPlanDict,
+    IngestStatsDict,
+    CountDistributionDict,
+    WorkloadProfileDict,
 )
 
 __all__ = [
@@ -17,6 +27,8 @@ __all__ = [
     "PATIENT_SCHEMA",
     "CLAIMS_SCHEMA",
     "INVOICES_SCHEMA",
+    "INVOICES_OPTIONAL_SCHEMA",
+    "CSV_DATE_FORMAT",
     "PATIENT_REQUIRED_COLUMNS",
     "CLAIMS_REQUIRED_COLUMNS",
     "INVOICES_REQUIRED_COLUMNS",
@@ -24,4 +36,12 @@ __all__ = [
     "PatientDict",
     "ClaimDict",
     "InvoiceDict",
+    "BatchJobDict",
+    "BatchJobResultDict",
+    "InboxFileDict",
+    "InboxBatchLogDict",
+    "ExecutionPlanDict",
+    "IngestStatsDict",
+    "CountDistributionDict",
+    "WorkloadProfileDict",
 ]
@@ -21,6 +21,16 @@ INVOICES_SCHEMA = {
     "date_of_transaction": pl.Date,
 }
 
+# Read when present; lets invoices without a usable claim_id be matched to a
+# claim of the same patient
+INVOICES_OPTIONAL_SCHEMA = {
+    "patient_id": pl.Int64,
+}
+
+# Every date column of the inputs is written in ISO format; strict ingest
+# parses them with this format instead of detecting it
+CSV_DATE_FORMAT = "%Y-%m-%d"
+
 PATIENT_REQUIRED_COLUMNS = set(PATIENT_SCHEMA.keys())
 CLAIMS_REQUIRED_COLUMNS = set(CLAIMS_SCHEMA.keys())
 INVOICES_REQUIRED_COLUMNS = set(INVOICES_SCHEMA.keys())
@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import List, NotRequired, Optional, TypedDict
 from datetime import date
 
 
@@ -17,7 +17,93 @@ class ClaimDict(TypedDict):
 
 class InvoiceDict(TypedDict):
     invoice_id: str
-    claim_id: str
+    claim_id: Optional[str]
+    patient_id: NotRequired[Optional[int]]
     type_of_bill: str
     transaction_value: float
     date_of_transaction: date
+
+
+class BatchJobDict(TypedDict):
+    name: str
+    claims_file_path: str
+    invoices_file_path: str
+    output_file_path: str
+
+
+class BatchJobResultDict(TypedDict):
+    name: str
+    status: str
+    estimated_memory_bytes: int
+    duration_seconds: float
+    report_path: Optional[str]
+    error: Optional[str]
+
+
+class InboxFileDict(TypedDict):
+    name: str
+    sha256: str
+    bytes: int
+    status: str
+    invoices: int
+    # Invoices skipped because their invoice_id was already applied, and
+    # invoices without a claim_id, which the watcher does not match
+    repeated_invoices: int
+    unmatched_invoices: int
+    error: Optional[str]
+
+
+class InboxBatchLogDict(TypedDict):
+    batch: int
+    committed_at: str
+    files: List[InboxFileDict]
+    invoices: int
+    bytes: int
+    affected_claims: int
+    processing_seconds: float
+    invoices_per_second: float
+    # Seconds from the arrival (last modification) of the oldest and the
+    # newest file of the batch until its results were committed
+    max_latency_seconds: float
+    min_latency_seconds: float
+
+
+class ExecutionPlanDict(TypedDict):
+    mode: str
+    reason: str
+    memory_budget_bytes: Optional[int]
+    estimated_claims: int
+    estimated_invoices: int
+    estimated_eager_bytes: int
+    estimated_streaming_bytes: int
+    partitions: int
+
+
+class IngestStatsDict(TypedDict):
+    files: int
+    chunks: int
+    rows: int
+    bytes: int
+
+
+class CountDistributionDict(TypedDict):
+    # "uniform", "zipf" or "lognormal"; shape is the Zipf exponent or the
+    # lognormal sigma, and every draw is clipped to [min, max]
+    distribution: str
+    min: int
+    max: int
+    shape: float
+
+
+class WorkloadProfileDict(TypedDict):
+    claims_per_patient: CountDistributionDict
+    invoices_per_claim: CountDistributionDict
+    orphan_invoice_rate: float
+    duplicate_invoice_rate: float
+    unlinked_invoice_rate: float
+    seasonality_amplitude: float
+    seasonality_peak_month: int
+    payment_lag_mean_days: Optional[float]
+    late_payment_rate: float
+    late_payment_min_days: int
+    late_payment_max_days: int
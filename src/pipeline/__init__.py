@@ -0,0 +1,18 @@
+from .executor import PipelineStage, PipelineExecutor
+from .planner import plan_execution
+from .checkpoint import (
+    CheckpointStore,
+    fingerprint_file,
+    fingerprint_run,
+    default_run_id,
+)
+
+__all__ = [
+    "PipelineStage",
+    "PipelineExecutor",
+    "plan_execution",
+    "CheckpointStore",
+    "fingerprint_file",
+    "fingerprint_run",
+    "default_run_id",
+]
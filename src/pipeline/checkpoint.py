@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict
+
+import polars as pl
+
+from data.compression import resolve_input_files
+from utils import get_project_root
+
+MANIFEST_FILE_NAME = "manifest.json"
+
+# Only the head and tail of each input are hashed; together with the size and
+# modification time this catches rewritten files without reading them in full
+FINGERPRINT_SAMPLE_BYTES = 1024 * 1024
+
+
+def fingerprint_file(file_path: str) -> dict:
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(
+                max(stat.st_size - FINGERPRINT_SAMPLE_BYTES, FINGERPRINT_SAMPLE_BYTES)
+            )
+            digest.update(f.read())
+
+    return {
+        "size": stat.st_size,
+        "modified_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def fingerprint_run(input_file_paths: Dict[str, str], parameters: dict) -> dict:
+    return {
+        # A glob pattern is fingerprinted part by part
+        "inputs": {
+            name: [fingerprint_file(part) for part in resolve_input_files(path)]
+            for name, path in input_file_paths.items()
+        },
+        "parameters": parameters,
+    }
+
+
+def default_run_id(fingerprints: dict) -> str:
+    encoded = json.dumps(fingerprints, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class CheckpointStore:
+    def __init__(self, checkpoint_dir: str, run_id: str, fingerprints: dict):
+        self.run_id = run_id
+        self.run_dir = os.path.join(get_project_root(), checkpoint_dir, run_id)
+        self._fingerprints = fingerprints
+        self._manifest_path = os.path.join(self.run_dir, MANIFEST_FILE_NAME)
+        self._lock = threading.Lock()
+
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self) -> dict:
+        empty_manifest = {
+            "run_id": self.run_id,
+            "fingerprints": self._fingerprints,
+            "stages": {},
+        }
+        if not os.path.exists(self._manifest_path):
+            return empty_manifest
+
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        # Checkpoints of a run over different inputs or parameters are stale
+        if manifest.get("fingerprints") != self._fingerprints:
+            return empty_manifest
+        return manifest
+
+    def _write_manifest(self) -> None:
+        temp_path = f"{self._manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(temp_path, self._manifest_path)
+
+    def has(self, stage_name: str) -> bool:
+        entry = self._manifest["stages"].get(stage_name)
+        return entry is not None and os.path.exists(
+            os.path.join(self.run_dir, entry["file"])
+        )
+
+    def load(self, stage_name: str) -> Any:
+        entry = self._manifest["stages"][stage_name]
+        path = os.path.join(self.run_dir, entry["file"])
+        if entry["format"] == "ipc":
+            return pl.read_ipc(path, memory_map=False)
+
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, stage_name: str, value: Any) -> None:
+        if isinstance(value, pl.DataFrame):
+            entry = {"format": "ipc", "file": f"{stage_name}.arrow"}
+        else:
+            entry = {"format": "json", "file": f"{stage_name}.json"}
+
+        # Write to a temporary file first so an interrupted write never
+        # leaves a truncated checkpoint behind
+        path = os.path.join(self.run_dir, entry["file"])
+        temp_path = f"{path}.tmp"
+        if entry["format"] == "ipc":
+            value.write_ipc(temp_path)
+        else:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._manifest["stages"][stage_name] = entry
+            self._write_manifest()
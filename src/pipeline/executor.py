@@ -0,0 +1,215 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from .checkpoint import CheckpointStore
+
+# Polars releases the GIL while it works, so a few threads are enough to keep
+# independent stages busy without oversubscribing its own thread pool
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class PipelineStage:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        dependencies: Sequence[str] = (),
+        checkpoint: bool = True,
+        cpu_threads: int = 0,
+    ):
+        self.name = name
+        self.func = func
+        self.dependencies = list(dependencies)
+        # Stages whose effect must be repeated on every run (e.g. streaming
+        # to a consumer) opt out of checkpointing, so a resume reruns them
+        self.checkpoint = checkpoint
+        # Threads of the run's CPU budget the stage keeps busy; stages that
+        # mostly wait on I/O or do little work claim none
+        self.cpu_threads = cpu_threads
+
+
+class CpuBudget:
+    def __init__(self, max_threads: Optional[int]):
+        self._max_threads = max_threads
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, threads: int) -> int:
+        if self._max_threads is None or threads == 0:
+            return 0
+
+        # A stage never waits for more threads than the whole budget
+        threads = min(threads, self._max_threads)
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._in_use + threads <= self._max_threads
+            )
+            self._in_use += threads
+        return threads
+
+    def release(self, threads: int) -> None:
+        if threads == 0:
+            return
+
+        with self._condition:
+            self._in_use -= threads
+            self._condition.notify_all()
+
+
+class StageCpuClock:
+    # Polars does a stage's work on its own pool threads, so per-thread CPU
+    # time misses most of it. Instead the process CPU time of every interval
+    # is split evenly between the stages running in it, so the stage times
+    # add up to the run's total even when stages overlap.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running: Set[str] = set()
+        self._charged: Dict[str, float] = {}
+        self._last_cpu_time = time.process_time()
+
+    def _advance(self) -> None:
+        cpu_time = time.process_time()
+        for name in self._running:
+            self._charged[name] += (cpu_time - self._last_cpu_time) / len(self._running)
+        self._last_cpu_time = cpu_time
+
+    def start(self, name: str) -> None:
+        with self._lock:
+            self._advance()
+            self._running.add(name)
+            self._charged[name] = 0.0
+
+    def stop(self, name: str) -> float:
+        with self._lock:
+            self._advance()
+            self._running.discard(name)
+            return self._charged.pop(name)
+
+
+class PipelineExecutor:
+    def __init__(
+        self,
+        stages: List[PipelineStage],
+        max_concurrency: Optional[int] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        resume: bool = False,
+        cpu_threads: Optional[int] = None,
+    ):
+        self._stages = {stage.name: stage for stage in stages}
+        self._max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY
+        self._checkpoint_store = checkpoint_store
+        self._resume = resume
+        # Without a budget stages run as soon as they are ready
+        self._cpu_budget = CpuBudget(cpu_threads)
+        self.stage_timings: Dict[str, float] = {}
+        self._cpu_clock = StageCpuClock()
+        self.stage_cpu_seconds: Dict[str, float] = {}
+        self.restored_stages: List[str] = []
+
+        if len(self._stages) != len(stages):
+            raise ValueError("Pipeline stage names must be unique")
+        self._validate_graph()
+
+    def _validate_graph(self) -> None:
+        for stage in self._stages.values():
+            unknown = set(stage.dependencies) - set(self._stages)
+            if unknown:
+                raise ValueError(
+                    f"Stage {stage.name} depends on unknown stages: {unknown}"
+                )
+
+        # Kahn's algorithm: every stage must become ready at some point
+        self._topological_order: List[str] = []
+        remaining = {
+            name: set(stage.dependencies) for name, stage in self._stages.items()
+        }
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle: {set(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+            self._topological_order.extend(ready)
+
+    def _plan_resume(self) -> Tuple[Set[str], Set[str]]:
+        # Walk the graph from its sinks: a stage with a valid checkpoint is
+        # restored instead of run, so its own dependencies are only needed if
+        # another stage that does run still consumes them
+        needed = set()
+        restored = set()
+        consumers: Dict[str, List[str]] = {name: [] for name in self._stages}
+        for stage in self._stages.values():
+            for dep in stage.dependencies:
+                consumers[dep].append(stage.name)
+
+        for name in reversed(self._topological_order):
+            if consumers[name] and not any(
+                consumer in needed and consumer not in restored
+                for consumer in consumers[name]
+            ):
+                continue
+            needed.add(name)
+            if self._stages[name].checkpoint and self._checkpoint_store.has(name):
+                restored.add(name)
+
+        return restored, set(self._stages) - needed
+
+    def _run_stage(self, stage: PipelineStage, inputs: List[Any]) -> Any:
+        threads = self._cpu_budget.acquire(stage.cpu_threads)
+        self._cpu_clock.start(stage.name)
+        try:
+            start_time = time.perf_counter()
+            result = stage.func(*inputs)
+            if self._checkpoint_store is not None and stage.checkpoint:
+                self._checkpoint_store.save(stage.name, result)
+            self.stage_timings[stage.name] = round(time.perf_counter() - start_time, 3)
+        finally:
+            cpu_seconds = self._cpu_clock.stop(stage.name)
+            self._cpu_budget.release(threads)
+        self.stage_cpu_seconds[stage.name] = round(cpu_seconds, 3)
+        return result
+
+    def run(self) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        submitted = set()
+
+        if self._checkpoint_store is not None and self._resume:
+            restored, skipped = self._plan_resume()
+            for name in [n for n in self._topological_order if n in restored]:
+                results[name] = self._checkpoint_store.load(name)
+                self.restored_stages.append(name)
+            submitted.update(restored, skipped)
+
+        with ThreadPoolExecutor(max_workers=self._max_concurrency) as pool:
+            running: Dict[Future, PipelineStage] = {}
+
+            def submit_ready_stages() -> None:
+                for name, stage in self._stages.items():
+                    if name in submitted or not all(
+                        dep in results for dep in stage.dependencies
+                    ):
+                        continue
+                    inputs = [results[dep] for dep in stage.dependencies]
+                    running[pool.submit(self._run_stage, stage, inputs)] = stage
+                    submitted.add(name)
+
+            submit_ready_stages()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        results[stage.name] = future.result()
+                    except Exception:
+                        # Stop scheduling; stages already running are allowed
+                        # to finish before the original error propagates
+                        for pending in running:
+                            pending.cancel()
+                        raise
+                submit_ready_stages()
+
+        return results
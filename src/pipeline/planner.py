@@ -0,0 +1,128 @@
+import io
+import math
+from typing import Dict, Optional, Tuple
+
+import polars as pl
+
+from constants import EXECUTION_MODES
+from data.compression import (
+    estimate_uncompressed_size,
+    open_decompressed,
+    resolve_input_files,
+)
+from models import CLAIMS_SCHEMA, INVOICES_SCHEMA, ExecutionPlanDict
+from utils import format_memory_size
+
+# Row counts and in-memory row widths are extrapolated from the head of each
+# input, parsed with the same schema the loaders use
+SAMPLE_BYTES = 1024 * 1024
+
+# Peak memory of the eager plan relative to its parsed inputs: the frames
+# themselves plus the invoice aggregation, the join and the derived columns
+EAGER_WORKING_SET_FACTOR = 3
+
+# A reconciled row carries the claim plus about twice as many derived columns
+RECONCILED_ROW_WIDTH_FACTOR = 3
+
+# Streaming keeps per-claim aggregation state about the size of the output
+STREAMING_STATE_FACTOR = 2
+
+MAX_PARTITIONS = 256
+
+
+def _sample_input(
+    file_path: str, schema: Dict[str, pl.DataType], label: str
+) -> Tuple[int, float]:
+    # Planning runs before the loaders, so a missing input is reported here
+    # the same way the loaders would
+    file_paths = resolve_input_files(file_path)
+    if not file_paths:
+        raise FileNotFoundError(f"{label} file not found: {file_path}")
+
+    with open_decompressed(file_paths[0]) as f:
+        sample = f.read(SAMPLE_BYTES)
+    if len(sample) == SAMPLE_BYTES:
+        sample = sample[: sample.rfind(b"\n") + 1]
+
+    sample_df = pl.read_csv(io.BytesIO(sample), schema_overrides=schema)
+    if sample_df.height == 0:
+        return 0, 0.0
+
+    csv_bytes_per_row = len(sample) / sample_df.height
+    estimated_rows = round(estimate_uncompressed_size(file_paths) / csv_bytes_per_row)
+    memory_bytes_per_row = sample_df.estimated_size() / sample_df.height
+
+    return estimated_rows, memory_bytes_per_row
+
+
+def plan_execution(
+    claims_file_path: str,
+    invoices_file_path: str,
+    memory_budget: Optional[int] = None,
+) -> ExecutionPlanDict:
+    claims_rows, claims_row_bytes = _sample_input(
+        claims_file_path, CLAIMS_SCHEMA, "Claims"
+    )
+    invoices_rows, invoices_row_bytes = _sample_input(
+        invoices_file_path, INVOICES_SCHEMA, "Invoices"
+    )
+
+    input_bytes = claims_rows * claims_row_bytes + invoices_rows * invoices_row_bytes
+    reconciled_bytes = claims_rows * claims_row_bytes * RECONCILED_ROW_WIDTH_FACTOR
+    eager_bytes = round(input_bytes * EAGER_WORKING_SET_FACTOR + reconciled_bytes)
+    streaming_bytes = round(reconciled_bytes * (1 + STREAMING_STATE_FACTOR))
+
+    plan = ExecutionPlanDict(
+        mode=EXECUTION_MODES["EAGER"],
+        reason="",
+        memory_budget_bytes=memory_budget,
+        estimated_claims=claims_rows,
+        estimated_invoices=invoices_rows,
+        estimated_eager_bytes=eager_bytes,
+        estimated_streaming_bytes=streaming_bytes,
+        partitions=1,
+    )
+
+    if memory_budget is None:
+        plan["reason"] = "no memory budget given"
+        return plan
+
+    budget = format_memory_size(memory_budget)
+    if eager_bytes <= memory_budget:
+        plan["reason"] = (
+            f"eager working set ~{format_memory_size(eager_bytes)} fits in {budget}"
+        )
+        return plan
+
+    if streaming_bytes <= memory_budget:
+        plan["mode"] = EXECUTION_MODES["STREAMING"]
+        plan["reason"] = (
+            f"eager working set ~{format_memory_size(eager_bytes)} exceeds {budget}, "
+            f"streaming needs ~{format_memory_size(streaming_bytes)}"
+        )
+        return plan
+
+    # The reconciled output stays resident; each pass only has to hold the
+    # aggregation state of its own slice of claims
+    state_bytes = reconciled_bytes * STREAMING_STATE_FACTOR
+    headroom = memory_budget - reconciled_bytes
+    partitions = (
+        MAX_PARTITIONS
+        if headroom <= 0
+        else min(
+            2 ** math.ceil(math.log2(max(state_bytes / headroom, 2))), MAX_PARTITIONS
+        )
+    )
+    plan["mode"] = EXECUTION_MODES["PARTITIONED"]
+    plan["partitions"] = partitions
+    plan["reason"] = (
+        f"streaming needs ~{format_memory_size(streaming_bytes)}, more than {budget}; "
+        f"splitting claims into {partitions} hash partitions"
+    )
+    if headroom <= 0:
+        plan["reason"] += (
+            f" (the reconciled output alone needs "
+            f"~{format_memory_size(round(reconciled_bytes))})"
+        )
+
+    return plan
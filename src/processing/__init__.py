@@ -1,11 +1,40 @@
 from .reconciliation import (
     reconcile_claims,
+    reconcile_claims_partitioned,
     analyze_reconciliation_results,
     get_reconciliation_filters,
 )
+from .aging import analyze_payment_aging
+from .duplicates import (
+    detect_duplicate_payments,
+    analyze_duplicate_payments,
+)
+from .matching import match_unmatched_invoices, analyze_invoice_matching
+from .run_diff import diff_reconciliation_runs, analyze_run_diff
+from .cube import build_aggregate_cube, query_aggregate_cube
+from .preview import estimate_reconciliation_results
+from .patients import (
+    attach_patient_attributes,
+    build_patient_rollup,
+    analyze_patients,
+)
 
 __all__ = [
     "reconcile_claims",
+    "reconcile_claims_partitioned",
     "analyze_reconciliation_results",
     "get_reconciliation_filters",
+    "analyze_payment_aging",
+    "detect_duplicate_payments",
+    "analyze_duplicate_payments",
+    "match_unmatched_invoices",
+    "analyze_invoice_matching",
+    "diff_reconciliation_runs",
+    "analyze_run_diff",
+    "build_aggregate_cube",
+    "query_aggregate_cube",
+    "estimate_reconciliation_results",
+    "attach_patient_attributes",
+    "build_patient_rollup",
+    "analyze_patients",
 ]
@@ -0,0 +1,163 @@
+from datetime import date
+from typing import List
+
+import polars as pl
+
+from constants import AGING_BUCKETS
+
+
+def _days_between(start: pl.Expr, end: pl.Expr) -> pl.Expr:
+    return (end - start).dt.total_days()
+
+
+def _aging_bucket(days: pl.Expr) -> pl.Expr:
+    first_label, first_max_days = AGING_BUCKETS[0]
+    bucket = pl.when(days <= first_max_days).then(pl.lit(first_label))
+
+    for label, max_days in AGING_BUCKETS[1:]:
+        if max_days is None:
+            return bucket.otherwise(pl.lit(label))
+        bucket = bucket.when(days <= max_days).then(pl.lit(label))
+
+    return bucket
+
+
+def payment_band_prefix(label: str) -> str:
+    # "0-30" -> "paid_0_to_30_days", "90+" -> "paid_90_plus_days"
+    return f"paid_{label.replace('-', '_to_').replace('+', '_plus')}_days"
+
+
+PAYMENT_BAND_COLUMNS = [
+    f"{payment_band_prefix(label)}_{measure}"
+    for label, _ in AGING_BUCKETS
+    for measure in ["total", "count"]
+]
+
+
+def payment_days_column() -> pl.Expr:
+    # Needs the claim's date_of_service joined onto each invoice
+    return _days_between(
+        pl.col("date_of_service"), pl.col("date_of_transaction")
+    ).alias("days_to_payment")
+
+
+def payment_aging_aggregations() -> List[pl.Expr]:
+    # Each invoice is banded by its own payment date, so a claim paid in
+    # several installments spreads its payments over several bands
+    payment_band = _aging_bucket(pl.col("days_to_payment"))
+    aggregations = [
+        pl.col("days_to_payment").mean().round(1).alias("avg_days_to_payment")
+    ]
+    for label, _ in AGING_BUCKETS:
+        prefix = payment_band_prefix(label)
+        in_band = payment_band == label
+        aggregations += [
+            pl.col("transaction_value")
+            .filter(in_band)
+            .sum()
+            .round(2)
+            .alias(f"{prefix}_total"),
+            in_band.sum().cast(pl.UInt32).alias(f"{prefix}_count"),
+        ]
+    return aggregations
+
+
+def payment_aging_columns(as_of_date: date) -> List[pl.Expr]:
+    days_outstanding = _days_between(pl.col("date_of_service"), pl.lit(as_of_date))
+
+    return [
+        _days_between(pl.col("date_of_service"), pl.col("last_transaction_date")).alias(
+            "days_to_last_payment"
+        ),
+        days_outstanding.alias("days_outstanding"),
+        (pl.col("benefit_amount") - pl.col("total_transaction_value"))
+        .clip(lower_bound=0)
+        .alias("outstanding_balance"),
+        _aging_bucket(days_outstanding).alias("aging_bucket"),
+    ]
+
+
+def analyze_payment_aging(reconciliation_df: pl.DataFrame, as_of_date: date) -> dict:
+    discrepancy = pl.col("total_transaction_value") - pl.col("benefit_amount")
+    has_balance = pl.col("outstanding_balance") > 0
+
+    buckets = (
+        reconciliation_df.filter(has_balance)
+        .group_by("aging_bucket")
+        .agg(
+            pl.len().alias("claims"),
+            (pl.col("total_transaction_value") == 0).sum().alias("unpaid_claims"),
+            pl.col("outstanding_balance").sum().alias("balance"),
+        )
+    )
+    bucket_rows = {row["aging_bucket"]: row for row in buckets.iter_rows(named=True)}
+    total_balance = buckets["balance"].sum() or 0.0
+
+    monthly = (
+        reconciliation_df.group_by(
+            pl.col("date_of_service").dt.truncate("1mo").alias("service_month")
+        )
+        .agg(
+            pl.len().alias("claims"),
+            pl.col("benefit_amount").sum().alias("benefit_amount"),
+            pl.col("total_transaction_value").sum().alias("paid_amount"),
+            discrepancy.clip(lower_bound=0).sum().alias("overpaid_amount"),
+            (-discrepancy).clip(lower_bound=0).sum().alias("underpaid_amount"),
+            discrepancy.sum().alias("net_discrepancy"),
+        )
+        .sort("service_month")
+        .with_columns(pl.col("service_month").dt.strftime("%Y-%m"))
+    )
+
+    payment_bands = reconciliation_df.select(pl.col(PAYMENT_BAND_COLUMNS).sum()).row(
+        0, named=True
+    )
+    total_paid = sum(
+        payment_bands[f"{payment_band_prefix(label)}_total"]
+        for label, _ in AGING_BUCKETS
+    )
+
+    payment_timing = reconciliation_df.select(
+        pl.col("avg_days_to_payment").mean(),
+        pl.col("days_to_last_payment").mean().alias("avg_days_to_last_payment"),
+    ).row(0, named=True)
+
+    return {
+        "as_of_date": as_of_date.isoformat(),
+        "avg_days_to_payment": payment_timing["avg_days_to_payment"],
+        "avg_days_to_last_payment": payment_timing["avg_days_to_last_payment"],
+        "total_balance": total_balance,
+        "buckets": [
+            {
+                "bucket": label,
+                "claims": bucket_rows.get(label, {}).get("claims", 0),
+                "unpaid_claims": bucket_rows.get(label, {}).get("unpaid_claims", 0),
+                "balance": bucket_rows.get(label, {}).get("balance", 0.0),
+                "percentage": (
+                    round(bucket_rows[label]["balance"] / total_balance * 100, 2)
+                    if label in bucket_rows and total_balance
+                    else 0
+                ),
+            }
+            for label, _ in AGING_BUCKETS
+        ],
+        "payment_buckets": [
+            {
+                "bucket": label,
+                "invoices": payment_bands[f"{payment_band_prefix(label)}_count"],
+                "amount": payment_bands[f"{payment_band_prefix(label)}_total"],
+                "percentage": (
+                    round(
+                        payment_bands[f"{payment_band_prefix(label)}_total"]
+                        / total_paid
+                        * 100,
+                        2,
+                    )
+                    if total_paid
+                    else 0
+                ),
+            }
+            for label, _ in AGING_BUCKETS
+        ],
+        "monthly": monthly.to_dicts(),
+    }
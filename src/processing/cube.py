@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+import polars as pl
+
+from constants import BILL_TYPE_COLUMN_PREFIXES, CUBE_DIMENSIONS, CUBE_GROUPING_SETS
+
+CLAIM_DIMENSIONS = ["patient_id", "service_month", "reconciliation_status"]
+
+CLAIM_MEASURES = [
+    "claims",
+    "invoices",
+    "benefit_amount",
+    "paid_amount",
+    "overpaid_amount",
+    "underpaid_amount",
+]
+# A claim's benefit and discrepancy cannot be split by the type of its
+# invoices, so cells broken down by type_of_bill only count and sum payments.
+# Their claims count the claims with at least one invoice of the type.
+BILL_TYPE_MEASURES = ["claims", "invoices", "paid_amount"]
+
+AMOUNT_MEASURES = [
+    "benefit_amount",
+    "paid_amount",
+    "overpaid_amount",
+    "underpaid_amount",
+]
+
+
+def cube_grouping_id(dimensions: Sequence[str]) -> int:
+    # One bit per grouped dimension, so a cell's grouping set is never
+    # confused with a null value of a dimension
+    return sum(1 << CUBE_DIMENSIONS.index(dimension) for dimension in dimensions)
+
+
+def build_aggregate_cube(reconciled_df: pl.DataFrame) -> pl.DataFrame:
+    paid_over_benefit = pl.col("total_transaction_value") - pl.col("benefit_amount")
+    benefit_over_paid = pl.col("benefit_amount") - pl.col("total_transaction_value")
+
+    # One pass over the claims into the finest cells; every grouping set is
+    # then rolled up from these cells instead of from the claims
+    bill_type_aggregations = []
+    for prefix in BILL_TYPE_COLUMN_PREFIXES.values():
+        bill_type_aggregations += [
+            (pl.col(f"{prefix}_count") > 0).sum().alias(f"{prefix}_claims"),
+            pl.col(f"{prefix}_count").sum().alias(f"{prefix}_invoices"),
+            pl.col(f"{prefix}_total").sum().alias(f"{prefix}_paid_amount"),
+        ]
+    cells_lf = (
+        reconciled_df.lazy()
+        .with_columns(
+            pl.col("date_of_service").dt.truncate("1mo").alias("service_month")
+        )
+        .group_by(CLAIM_DIMENSIONS)
+        .agg(
+            pl.len().alias("claims"),
+            pl.col("invoice_count").sum().alias("invoices"),
+            pl.col("benefit_amount").sum(),
+            pl.col("total_transaction_value").sum().alias("paid_amount"),
+            paid_over_benefit.clip(lower_bound=0).sum().alias("overpaid_amount"),
+            benefit_over_paid.clip(lower_bound=0).sum().alias("underpaid_amount"),
+            *bill_type_aggregations,
+        )
+        .cache()
+    )
+    bill_type_cells_lf = pl.concat(
+        cells_lf.select(
+            *CLAIM_DIMENSIONS,
+            pl.lit(bill_type).alias("type_of_bill"),
+            *[
+                pl.col(f"{prefix}_{measure}").alias(measure)
+                for measure in BILL_TYPE_MEASURES
+            ],
+        )
+        for bill_type, prefix in BILL_TYPE_COLUMN_PREFIXES.items()
+    )
+
+    dimension_dtypes = {**cells_lf.collect_schema(), "type_of_bill": pl.Utf8}
+    grouping_sets_lf = []
+    for dimensions in CUBE_GROUPING_SETS:
+        if "type_of_bill" in dimensions:
+            source_lf, measures = bill_type_cells_lf, BILL_TYPE_MEASURES
+        else:
+            source_lf, measures = cells_lf, CLAIM_MEASURES
+        aggregations = [
+            pl.col(measure)
+            .sum()
+            .cast(pl.Float64 if measure in AMOUNT_MEASURES else pl.Int64)
+            for measure in measures
+        ]
+        grouped_lf = (
+            source_lf.group_by(dimensions).agg(aggregations)
+            if dimensions
+            else source_lf.select(aggregations)
+        )
+        grouping_sets_lf.append(
+            grouped_lf.with_columns(
+                pl.lit(cube_grouping_id(dimensions)).alias("grouping_id"),
+                *[
+                    pl.lit(None, dtype=dimension_dtypes[dimension]).alias(dimension)
+                    for dimension in CUBE_DIMENSIONS
+                    if dimension not in dimensions
+                ],
+                *[
+                    pl.lit(None, dtype=pl.Float64).alias(measure)
+                    for measure in CLAIM_MEASURES
+                    if measure not in measures
+                ],
+            ).select("grouping_id", *CUBE_DIMENSIONS, *CLAIM_MEASURES)
+        )
+
+    return (
+        pl.concat(grouping_sets_lf)
+        .with_columns(pl.col(AMOUNT_MEASURES).round(2))
+        .sort("grouping_id", *CUBE_DIMENSIONS)
+        .collect()
+    )
+
+
+def query_aggregate_cube(
+    cube_df: pl.DataFrame,
+    group_by: Sequence[str],
+    filters: Optional[Dict[str, Any]] = None,
+) -> pl.DataFrame:
+    filters = filters or {}
+    needed = {*group_by, *filters}
+    unknown = needed - set(CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(
+            f"Unknown cube dimensions {sorted(unknown)}, expected any of "
+            f"{CUBE_DIMENSIONS}"
+        )
+
+    # The smallest grouping set holding every dimension asked for is read
+    # and rolled up further; sets split by type_of_bill are only used when
+    # it is asked for, since a claim can appear under both bill types
+    grouping_set_sizes = dict(cube_df["grouping_id"].value_counts().iter_rows())
+    candidates: List[List[str]] = [
+        dimensions
+        for dimensions in CUBE_GROUPING_SETS
+        if needed <= set(dimensions)
+        and ("type_of_bill" in needed or "type_of_bill" not in dimensions)
+    ]
+    if not candidates:
+        raise ValueError(
+            f"No grouping set of the cube covers {sorted(needed)}; available sets "
+            f"are {CUBE_GROUPING_SETS}"
+        )
+    dimensions = min(
+        candidates,
+        key=lambda dimensions: grouping_set_sizes.get(cube_grouping_id(dimensions), 0),
+    )
+    measures = BILL_TYPE_MEASURES if "type_of_bill" in dimensions else CLAIM_MEASURES
+
+    cells_lf = cube_df.lazy().filter(
+        pl.col("grouping_id") == cube_grouping_id(dimensions),
+        *[pl.col(dimension) == value for dimension, value in filters.items()],
+    )
+    aggregations = [
+        (
+            pl.col(measure).sum().round(2)
+            if measure in AMOUNT_MEASURES
+            else pl.col(measure).sum()
+        )
+        for measure in measures
+    ]
+    if not group_by:
+        return cells_lf.select(aggregations).collect()
+    return cells_lf.group_by(group_by).agg(aggregations).sort(group_by).collect()
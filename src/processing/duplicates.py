@@ -0,0 +1,117 @@
+from typing import Union
+
+import polars as pl
+
+# Invoices that agree on all of these (and on the date, within a window) are
+# treated as the same payment being sent more than once
+DUPLICATE_PAYMENT_KEYS = ["claim_id", "transaction_value", "type_of_bill"]
+
+TOP_DUPLICATE_CLAIMS = 20
+
+DUPLICATE_COLUMNS = [
+    "invoice_id",
+    "duplicate_of_invoice_id",
+    "claim_id",
+    "type_of_bill",
+    "transaction_value",
+    "date_of_transaction",
+    "days_since_previous_payment",
+]
+
+
+def detect_duplicate_payments(
+    invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+    date_window_days: int = 0,
+    engine: str = "auto",
+) -> pl.DataFrame:
+    if date_window_days == 0:
+        # Exact duplicates only need a single hash partition on the full key
+        payment_keys = [*DUPLICATE_PAYMENT_KEYS, "date_of_transaction"]
+        duplicates = (
+            invoices_df.lazy()
+            .with_columns(
+                pl.col("invoice_id")
+                .first()
+                .over(payment_keys)
+                .alias("duplicate_of_invoice_id"),
+                pl.lit(0, dtype=pl.Int64).alias("days_since_previous_payment"),
+            )
+            .filter(~pl.struct(payment_keys).is_first_distinct())
+        )
+    else:
+        # Sorting puts every repeated payment directly after the one it
+        # repeats, so near-duplicates are found by comparing neighbouring rows
+        # in one linear pass instead of comparing invoices pairwise
+        same_payment_as_previous = pl.all_horizontal(
+            [pl.col(key) == pl.col(key).shift() for key in DUPLICATE_PAYMENT_KEYS]
+        )
+        duplicates = (
+            invoices_df.lazy()
+            .sort([*DUPLICATE_PAYMENT_KEYS, "date_of_transaction", "invoice_id"])
+            .with_columns(
+                pl.col("invoice_id").shift().alias("duplicate_of_invoice_id"),
+                (pl.col("date_of_transaction") - pl.col("date_of_transaction").shift())
+                .dt.total_days()
+                .alias("days_since_previous_payment"),
+            )
+            .filter(
+                same_payment_as_previous
+                & (pl.col("days_since_previous_payment") <= date_window_days)
+            )
+        )
+
+    return duplicates.select(DUPLICATE_COLUMNS).collect(engine=engine)
+
+
+def analyze_duplicate_payments(
+    duplicates_df: pl.DataFrame,
+    reconciliation_df: pl.DataFrame,
+    date_window_days: int = 0,
+) -> dict:
+    duplicates_by_claim = duplicates_df.group_by("claim_id").agg(
+        pl.len().alias("duplicate_invoices"),
+        pl.col("transaction_value").sum().alias("duplicate_amount"),
+    )
+
+    # A duplicate can only explain the part of a claim that was overpaid
+    attributed = (
+        reconciliation_df.select(
+            "claim_id",
+            "patient_id",
+            (pl.col("total_transaction_value") - pl.col("benefit_amount"))
+            .clip(lower_bound=0)
+            .alias("overpaid_amount"),
+        )
+        .join(duplicates_by_claim, on="claim_id", how="inner")
+        .with_columns(
+            pl.min_horizontal("duplicate_amount", "overpaid_amount").alias(
+                "explained_overpaid_amount"
+            )
+        )
+    )
+
+    total_overpaid_amount = (
+        reconciliation_df.select(
+            (pl.col("total_transaction_value") - pl.col("benefit_amount"))
+            .clip(lower_bound=0)
+            .sum()
+        ).item()
+        or 0.0
+    )
+    explained_overpaid_amount = attributed["explained_overpaid_amount"].sum() or 0.0
+
+    return {
+        "date_window_days": date_window_days,
+        "count": duplicates_df.height,
+        "claims": duplicates_by_claim.height,
+        "amount": duplicates_df["transaction_value"].sum() or 0.0,
+        "explained_overpaid_amount": explained_overpaid_amount,
+        "explained_overpaid_percentage": (
+            round(explained_overpaid_amount / total_overpaid_amount * 100, 2)
+            if total_overpaid_amount
+            else 0
+        ),
+        "top_claims": attributed.top_k(TOP_DUPLICATE_CLAIMS, by="duplicate_amount")
+        .sort("duplicate_amount", descending=True)
+        .to_dicts(),
+    }
@@ -0,0 +1,304 @@
+import math
+from datetime import timedelta
+from typing import List, Union
+
+import polars as pl
+
+from constants import (
+    INVOICE_MATCH_METHODS,
+    FUZZY_MATCH_DATE_TOLERANCE_DAYS,
+    FUZZY_MATCH_AMOUNT_TOLERANCE,
+    FUZZY_MATCH_MIN_CONFIDENCE,
+)
+
+# Confidence of a same-day match to a patient's only claim in the window. It
+# falls off linearly to half with the days between service and payment, and
+# drops with the number of the patient's other claims that could also have
+# been paid in the window.
+AMOUNT_MATCH_CONFIDENCE = 1.0
+DATE_MATCH_CONFIDENCE = 0.7
+MIN_DATE_SCORE = 0.5
+# Applied when another claim of the same patient has a matching open balance
+AMBIGUOUS_AMOUNT_FACTOR = 0.5
+
+MATCH_COLUMNS = ["submitted_claim_id", "match_method", "match_confidence"]
+
+
+def _amount_bucket(amount: pl.Expr, amount_tolerance: float) -> pl.Expr:
+    # Log-scale buckets one tolerance wide: amounts within the tolerance of
+    # each other always fall into the same or an adjacent bucket
+    return (amount.log() / math.log1p(amount_tolerance)).floor().cast(pl.Int64)
+
+
+def _asof_match(
+    invoices_lf: pl.LazyFrame,
+    claims_lf: pl.LazyFrame,
+    block_keys: List[str],
+    date_tolerance_days: int,
+) -> pl.LazyFrame:
+    # For every invoice, the latest claim of the same block serviced on or
+    # before the payment date and within the tolerance
+    date_score = 1 - (
+        (pl.col("date_of_transaction") - pl.col("date_of_service")).dt.total_days()
+        / (date_tolerance_days + 1)
+    ) * (1 - MIN_DATE_SCORE)
+
+    return (
+        invoices_lf.sort("date_of_transaction")
+        .join_asof(
+            claims_lf.sort("date_of_service"),
+            left_on="date_of_transaction",
+            right_on="date_of_service",
+            by=block_keys,
+            strategy="backward",
+            tolerance=timedelta(days=date_tolerance_days),
+            # Both sides were just sorted on the dates
+            check_sortedness=False,
+        )
+        .filter(pl.col("matched_claim_id").is_not_null())
+        .with_columns(date_score.alias("date_score"))
+    )
+
+
+def _count_window_claims(
+    invoices_lf: pl.LazyFrame, claims_lf: pl.LazyFrame, date_tolerance_days: int
+) -> pl.LazyFrame:
+    # Number of the patient's claims serviced within the tolerance before each
+    # payment. The per-patient ranks of the first and the last claim in the
+    # window come from two as-of joins, instead of a range join.
+    ranked_claims_lf = (
+        claims_lf.select("patient_id", "date_of_service")
+        .sort("date_of_service")
+        .with_columns(pl.int_range(pl.len()).over("patient_id").alias("claim_rank"))
+    )
+    window_lf = (
+        invoices_lf.select("invoice_id", "patient_id", "date_of_transaction")
+        .sort("date_of_transaction")
+        .with_columns(
+            (
+                pl.col("date_of_transaction") - pl.duration(days=date_tolerance_days)
+            ).alias("window_start")
+        )
+        .join_asof(
+            ranked_claims_lf.rename({"claim_rank": "last_rank"}),
+            left_on="date_of_transaction",
+            right_on="date_of_service",
+            by="patient_id",
+            strategy="backward",
+            check_sortedness=False,
+        )
+        .drop("date_of_service")
+        .join_asof(
+            ranked_claims_lf.rename({"claim_rank": "first_rank"}),
+            left_on="window_start",
+            right_on="date_of_service",
+            by="patient_id",
+            strategy="forward",
+            check_sortedness=False,
+        )
+        .select(
+            "invoice_id",
+            (pl.col("last_rank") - pl.col("first_rank") + 1)
+            .clip(lower_bound=0)
+            .fill_null(0)
+            .alias("window_claims"),
+        )
+    )
+    return invoices_lf.join(window_lf, on="invoice_id", how="left")
+
+
+def match_unmatched_invoices(
+    claims_df: Union[pl.DataFrame, pl.LazyFrame],
+    invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+    date_tolerance_days: int = FUZZY_MATCH_DATE_TOLERANCE_DAYS,
+    amount_tolerance: float = FUZZY_MATCH_AMOUNT_TOLERANCE,
+    min_confidence: float = FUZZY_MATCH_MIN_CONFIDENCE,
+) -> Union[pl.DataFrame, pl.LazyFrame]:
+    invoice_columns = invoices_df.lazy().collect_schema().names()
+    claims_lf = claims_df.lazy().select(
+        pl.col("claim_id").alias("matched_claim_id"),
+        "patient_id",
+        "date_of_service",
+        "benefit_amount",
+    )
+
+    invoices_lf = (
+        invoices_df.lazy()
+        .with_columns(pl.col("claim_id").alias("submitted_claim_id"))
+        .join(
+            claims_lf.select(
+                pl.col("matched_claim_id").alias("claim_id"),
+                pl.lit(True).alias("is_exact_match"),
+            ),
+            on="claim_id",
+            how="left",
+        )
+    )
+    exact_lf = invoices_lf.filter(pl.col("is_exact_match")).with_columns(
+        pl.lit(INVOICE_MATCH_METHODS["EXACT"]).alias("match_method"),
+        pl.lit(1.0).alias("match_confidence"),
+    )
+    unmatched_lf = invoices_lf.filter(pl.col("is_exact_match").is_null())
+
+    # Without a patient_id there is nothing to block on, so invoices the
+    # exact join leaves unmatched stay unmatched
+    if "patient_id" in invoice_columns:
+        candidates_lf = _count_window_claims(
+            unmatched_lf.filter(pl.col("patient_id").is_not_null()).select(
+                "invoice_id", "patient_id", "transaction_value", "date_of_transaction"
+            ),
+            claims_lf,
+            date_tolerance_days,
+        ).cache()
+
+        # Pass 1: payments settling a claim's open balance (its benefit less
+        # what the exactly matched invoices already paid), blocked by patient
+        # and amount bucket. Claims are repeated into the neighbouring
+        # buckets so that a payment just across a bucket edge is still found.
+        exact_paid_lf = exact_lf.group_by("claim_id").agg(
+            pl.col("transaction_value").sum().alias("exact_paid_amount")
+        )
+        open_balances_lf = (
+            claims_lf.join(
+                exact_paid_lf,
+                left_on="matched_claim_id",
+                right_on="claim_id",
+                how="left",
+            )
+            .with_columns(
+                (
+                    pl.col("benefit_amount") - pl.col("exact_paid_amount").fill_null(0)
+                ).alias("open_balance")
+            )
+            .filter(pl.col("open_balance") > 0)
+            .with_columns(
+                _amount_bucket(pl.col("open_balance"), amount_tolerance).alias(
+                    "amount_bucket"
+                )
+            )
+        )
+        # The claim before the match in its block was also a candidate when it
+        # lies within the window too. Shifting the sorted frame is much
+        # cheaper than a window over millions of small blocks.
+        claim_buckets_lf = pl.concat(
+            open_balances_lf.with_columns(pl.col("amount_bucket") + offset)
+            for offset in (-1, 0, 1)
+        ).sort("patient_id", "amount_bucket", "date_of_service")
+        is_same_block = (pl.col("patient_id") == pl.col("patient_id").shift(1)) & (
+            pl.col("amount_bucket") == pl.col("amount_bucket").shift(1)
+        )
+        claim_buckets_lf = claim_buckets_lf.with_columns(
+            pl.when(is_same_block)
+            .then(pl.col("date_of_service").shift(1))
+            .alias("previous_date_of_service")
+        )
+        is_ambiguous = pl.col("previous_date_of_service") >= pl.col(
+            "date_of_transaction"
+        ) - pl.duration(days=date_tolerance_days)
+        # Chance that none of the other claims in the window has an open
+        # balance this close to the payment by coincidence
+        density_factor = 1 / (1 + (pl.col("window_claims") - 1) * 2 * amount_tolerance)
+        relative_difference = (
+            pl.col("transaction_value") - pl.col("open_balance")
+        ).abs() / pl.col("open_balance")
+        amount_matches_lf = (
+            _asof_match(
+                candidates_lf.filter(pl.col("transaction_value") > 0).with_columns(
+                    _amount_bucket(pl.col("transaction_value"), amount_tolerance).alias(
+                        "amount_bucket"
+                    )
+                ),
+                claim_buckets_lf,
+                ["patient_id", "amount_bucket"],
+                date_tolerance_days,
+            )
+            .filter(relative_difference <= amount_tolerance)
+            .select(
+                "invoice_id",
+                "matched_claim_id",
+                pl.lit(INVOICE_MATCH_METHODS["AMOUNT"]).alias("match_method"),
+                (
+                    AMOUNT_MATCH_CONFIDENCE
+                    * pl.col("date_score")
+                    * density_factor
+                    * pl.when(is_ambiguous).then(AMBIGUOUS_AMOUNT_FACTOR).otherwise(1.0)
+                ).alias("match_confidence"),
+            )
+            .filter(pl.col("match_confidence") >= min_confidence)
+        )
+
+        # Pass 2: partial payments, blocked by patient only and matched to the
+        # most recent claim serviced before the payment; any other claim in
+        # the window is equally likely
+        date_matches_lf = (
+            _asof_match(
+                candidates_lf.join(amount_matches_lf, on="invoice_id", how="anti"),
+                claims_lf,
+                ["patient_id"],
+                date_tolerance_days,
+            )
+            .select(
+                "invoice_id",
+                "matched_claim_id",
+                pl.lit(INVOICE_MATCH_METHODS["DATE"]).alias("match_method"),
+                (
+                    DATE_MATCH_CONFIDENCE
+                    * pl.col("date_score")
+                    / pl.col("window_claims")
+                ).alias("match_confidence"),
+            )
+            .filter(pl.col("match_confidence") >= min_confidence)
+        )
+
+        unmatched_lf = unmatched_lf.join(
+            pl.concat([amount_matches_lf, date_matches_lf]),
+            on="invoice_id",
+            how="left",
+        ).with_columns(
+            pl.coalesce("matched_claim_id", "claim_id").alias("claim_id"),
+            pl.col("match_confidence").round(3),
+        )
+    else:
+        unmatched_lf = unmatched_lf.with_columns(
+            pl.lit(None, dtype=pl.Utf8).alias("match_method"),
+            pl.lit(None, dtype=pl.Float64).alias("match_confidence"),
+        )
+
+    matched_lf = pl.concat(
+        [
+            exact_lf.select(*invoice_columns, *MATCH_COLUMNS),
+            unmatched_lf.select(*invoice_columns, *MATCH_COLUMNS),
+        ]
+    )
+    return matched_lf if isinstance(invoices_df, pl.LazyFrame) else matched_lf.collect()
+
+
+def analyze_invoice_matching(
+    matched_invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+) -> dict:
+    by_method = (
+        matched_invoices_df.lazy()
+        .group_by("match_method")
+        .agg(
+            pl.len().alias("invoices"),
+            pl.col("transaction_value").sum().round(2).alias("amount"),
+            pl.col("match_confidence").mean().round(3).alias("avg_confidence"),
+        )
+        .collect()
+    )
+    methods = {row["match_method"]: row for row in by_method.iter_rows(named=True)}
+    unmatched = methods.pop(None, {"invoices": 0, "amount": 0.0})
+
+    return {
+        "methods": [
+            {
+                "method": method,
+                "invoices": methods.get(method, {}).get("invoices", 0),
+                "amount": methods.get(method, {}).get("amount", 0.0),
+                "avg_confidence": methods.get(method, {}).get("avg_confidence"),
+            }
+            for method in INVOICE_MATCH_METHODS.values()
+        ],
+        "unmatched_invoices": unmatched["invoices"],
+        "unmatched_amount": unmatched["amount"],
+    }
@@ -0,0 +1,44 @@
+import polars as pl
+
+
+def attach_patient_attributes(
+    reconciliation_df: pl.DataFrame, patients_df: pl.DataFrame
+) -> pl.DataFrame:
+    # Joined onto the claim-level result rather than the raw invoices, so the
+    # hot invoice aggregation stays as narrow as possible
+    return reconciliation_df.join(
+        patients_df.select(pl.col("patient_id"), pl.col("name").alias("patient_name")),
+        on="patient_id",
+        how="left",
+    )
+
+
+def build_patient_rollup(reconciliation_df: pl.DataFrame) -> pl.DataFrame:
+    discrepancy = pl.col("total_transaction_value") - pl.col("benefit_amount")
+    patient_keys = ["patient_id"]
+    if "patient_name" in reconciliation_df.columns:
+        patient_keys.append("patient_name")
+
+    return reconciliation_df.group_by(patient_keys).agg(
+        pl.len().alias("claims"),
+        (discrepancy != 0).sum().alias("discrepant_claims"),
+        pl.col("benefit_amount").sum().alias("benefit_amount"),
+        pl.col("total_transaction_value").sum().alias("paid_amount"),
+        discrepancy.clip(lower_bound=0).sum().alias("overpaid_amount"),
+        (-discrepancy).clip(lower_bound=0).sum().alias("underpaid_amount"),
+    )
+
+
+def analyze_patients(reconciliation_df: pl.DataFrame) -> dict:
+    rollup = build_patient_rollup(reconciliation_df)
+    patients_with_discrepancies = rollup.filter(pl.col("discrepant_claims") > 0)
+
+    return {
+        "total_patients": rollup.height,
+        "with_discrepancies": patients_with_discrepancies.height,
+        "unknown_patients": (
+            rollup.filter(pl.col("patient_name").is_null()).height
+            if "patient_name" in rollup.columns
+            else 0
+        ),
+    }
@@ -0,0 +1,93 @@
+import math
+from statistics import NormalDist
+
+import polars as pl
+
+from constants import RECONCILIATION_STATUSES
+
+
+def _estimate(value: float, standard_error: float, z: float) -> dict:
+    return {
+        "estimate": value,
+        "low": max(value - z * standard_error, 0.0),
+        "high": value + z * standard_error,
+    }
+
+
+def _estimate_total(values: pl.Expr, fraction: float) -> pl.Expr:
+    # Horvitz-Thompson estimate of a population total under Bernoulli
+    # sampling, with its variance estimate packed alongside
+    return pl.struct(
+        (values.sum() / fraction).alias("total"),
+        ((1 - fraction) / fraction**2 * (values**2).sum()).alias("variance"),
+    )
+
+
+def estimate_reconciliation_results(
+    sample_reconciliation_df: pl.DataFrame,
+    sample_fraction: float,
+    sample_invoices: int,
+    confidence: float = 0.95,
+) -> dict:
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    sample_claims = sample_reconciliation_df.height
+    discrepancy = pl.col("total_transaction_value") - pl.col("benefit_amount")
+    status = pl.col("reconciliation_status")
+
+    measures = {
+        "total_claims": pl.col("claim_id").is_not_null().cast(pl.Float64),
+        "balanced_count": (status == RECONCILIATION_STATUSES["BALANCED"]).cast(
+            pl.Float64
+        ),
+        "overpaid_count": (status == RECONCILIATION_STATUSES["OVERPAID"]).cast(
+            pl.Float64
+        ),
+        "underpaid_count": (status == RECONCILIATION_STATUSES["UNDERPAID"]).cast(
+            pl.Float64
+        ),
+        "overpaid_amount": discrepancy.clip(lower_bound=0),
+        "underpaid_amount": (-discrepancy).clip(lower_bound=0),
+    }
+    totals = sample_reconciliation_df.select(
+        _estimate_total(expr, sample_fraction).alias(name)
+        for name, expr in measures.items()
+    ).row(0, named=True)
+
+    def total(name: str) -> dict:
+        return _estimate(
+            totals[name]["total"], math.sqrt(totals[name]["variance"] or 0.0), z
+        )
+
+    def percentage(name: str) -> dict:
+        if sample_claims == 0:
+            return _estimate(0.0, 0.0, z)
+        share = totals[name]["total"] / totals["total_claims"]["total"]
+        standard_error = math.sqrt(share * (1 - share) / sample_claims)
+        return {
+            key: round(value * 100, 2)
+            for key, value in _estimate(share, standard_error, z).items()
+        }
+
+    return {
+        "sample": {
+            "fraction": sample_fraction,
+            "claims": sample_claims,
+            "invoices": sample_invoices,
+            "confidence": confidence,
+        },
+        "total_claims": total("total_claims"),
+        "balanced": {
+            "count": total("balanced_count"),
+            "percentage": percentage("balanced_count"),
+        },
+        "overpaid": {
+            "count": total("overpaid_count"),
+            "percentage": percentage("overpaid_count"),
+            "amount": total("overpaid_amount"),
+        },
+        "underpaid": {
+            "count": total("underpaid_count"),
+            "percentage": percentage("underpaid_count"),
+            "amount": total("underpaid_amount"),
+        },
+    }
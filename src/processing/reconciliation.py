@@ -1,18 +1,91 @@
+import math
+from datetime import date
+from typing import Optional, Union
+
 import polars as pl
 
-from constants import RECONCILIATION_STATUSES
+from constants import (
+    BILL_TYPE_COLUMN_PREFIXES,
+    RECONCILIATION_STATUSES,
+    TOP_DISCREPANCY_CLAIMS,
+    TOP_DISCREPANCY_PATIENTS,
+    PARETO_CLAIM_PERCENTAGES,
+)
+from .aging import (
+    PAYMENT_BAND_COLUMNS,
+    payment_aging_aggregations,
+    payment_aging_columns,
+    payment_days_column,
+)
+
+# Fixed so that partition membership is stable across the passes of a run
+PARTITION_HASH_SEED = 0
 
 
 def reconcile_claims(
-    claims_df: pl.DataFrame, invoices_df: pl.DataFrame
+    claims_df: Union[pl.DataFrame, pl.LazyFrame],
+    invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+    as_of_date: Optional[date] = None,
+    engine: str = "auto",
 ) -> pl.DataFrame:
-    invoice_totals = invoices_df.group_by("claim_id").agg(
-        pl.col("transaction_value").sum().alias("total_transaction_value")
+    as_of_date = as_of_date or date.today()
+
+    # Per-type totals and counts are conditional aggregations within the same
+    # group_by, so the invoices are only scanned once
+    bill_type_aggregations = []
+    for bill_type, prefix in BILL_TYPE_COLUMN_PREFIXES.items():
+        is_bill_type = pl.col("type_of_bill") == bill_type
+        bill_type_aggregations += [
+            pl.col("transaction_value")
+            .filter(is_bill_type)
+            .sum()
+            .round(2)
+            .alias(f"{prefix}_total"),
+            is_bill_type.sum().cast(pl.UInt32).alias(f"{prefix}_count"),
+        ]
+
+    # Each invoice is aged from the date of service of its own claim
+    invoice_totals = (
+        invoices_df.lazy()
+        .join(
+            claims_df.lazy().select("claim_id", "date_of_service"),
+            on="claim_id",
+            how="left",
+        )
+        .with_columns(payment_days_column())
+        .group_by("claim_id")
+        .agg(
+            # Rounded to cents so the status does not depend on the order in
+            # which the invoices were summed (which differs between plans)
+            pl.col("transaction_value").sum().round(2).alias("total_transaction_value"),
+            pl.len().alias("invoice_count"),
+            *bill_type_aggregations,
+            pl.col("date_of_transaction").min().alias("first_transaction_date"),
+            pl.col("date_of_transaction").max().alias("last_transaction_date"),
+            *payment_aging_aggregations(),
+        )
     )
+    totals_columns = [
+        "total_transaction_value",
+        "invoice_count",
+        *[
+            f"{prefix}_{measure}"
+            for prefix in BILL_TYPE_COLUMN_PREFIXES.values()
+            for measure in ["total", "count"]
+        ],
+        *PAYMENT_BAND_COLUMNS,
+    ]
 
-    reconciled = (
-        claims_df.join(invoice_totals, on="claim_id", how="left")
-        .with_columns(pl.col("total_transaction_value").fill_null(0.0))
+    # The streaming engine does not keep the claims in their input order
+    # through the join, so it is restored from a row index as in the eager plan
+    claims_lf = claims_df.lazy()
+    if engine == "streaming":
+        claims_lf = claims_lf.with_row_index("claim_order")
+
+    # Aging is derived within the same lazy plan as the reconciliation itself
+    reconciled_lf = (
+        claims_lf.join(invoice_totals, on="claim_id", how="left")
+        .with_columns(pl.col(totals_columns).fill_null(0))
         .with_columns(
             pl.when(pl.col("total_transaction_value") == pl.col("benefit_amount"))
             .then(pl.lit(RECONCILIATION_STATUSES["BALANCED"]))
@@ -21,21 +94,68 @@ def reconcile_claims(
             .otherwise(pl.lit(RECONCILIATION_STATUSES["UNDERPAID"]))
             .alias("reconciliation_status")
         )
-        .select(
-            [
-                "claim_id",
-                "patient_id",
-                "charges_amount",
-                "benefit_amount",
-                "total_transaction_value",
-                "reconciliation_status",
-            ]
-        )
+        .with_columns(payment_aging_columns(as_of_date))
     )
+    if engine == "streaming":
+        reconciled_lf = reconciled_lf.sort("claim_order")
+
+    reconciled = reconciled_lf.select(
+        [
+            "claim_id",
+            "patient_id",
+            "charges_amount",
+            "benefit_amount",
+            "total_transaction_value",
+            "reconciliation_status",
+            *totals_columns[1:],
+            "first_transaction_date",
+            "last_transaction_date",
+            "date_of_service",
+            "avg_days_to_payment",
+            "days_to_last_payment",
+            "days_outstanding",
+            "outstanding_balance",
+            "aging_bucket",
+        ]
+    ).collect(engine=engine)
 
     return reconciled
 
 
+def reconcile_claims_partitioned(
+    claims_lf: pl.LazyFrame,
+    invoices_lf: pl.LazyFrame,
+    num_partitions: int,
+    as_of_date: Optional[date] = None,
+) -> pl.DataFrame:
+    # Hashing claim_id sends a claim and all of its invoices to the same
+    # partition, so each pass reconciles an independent slice of the input
+    # and only one slice of invoice aggregates is held at a time
+    partition = pl.col("claim_id").hash(PARTITION_HASH_SEED) % num_partitions
+    reconciled_partitions = [
+        reconcile_claims(
+            claims_lf.filter(partition == index),
+            invoices_lf.filter(partition == index),
+            as_of_date,
+            engine="streaming",
+        )
+        for index in range(num_partitions)
+    ]
+
+    # Restore the input order of the claims, as in the single-pass plans
+    claim_order = (
+        claims_lf.select("claim_id")
+        .with_row_index("claim_order")
+        .collect(engine="streaming")
+    )
+    return (
+        pl.concat(reconciled_partitions)
+        .join(claim_order, on="claim_id", how="left")
+        .sort("claim_order")
+        .drop("claim_order")
+    )
+
+
 def analyze_reconciliation_results(reconciliation_df: pl.DataFrame) -> dict:
     total_claims = reconciliation_df.height
 
@@ -45,6 +165,11 @@ def analyze_reconciliation_results(reconciliation_df: pl.DataFrame) -> dict:
             "balanced": {"count": 0, "percentage": 0},
             "overpaid": {"count": 0, "percentage": 0},
             "underpaid": {"count": 0, "percentage": 0},
+            "bill_types": {},
+            "top_overpaid_claims": [],
+            "top_underpaid_claims": [],
+            "top_patients": [],
+            "pareto": [],
         }
 
     balanced_count = reconciliation_df.filter(
@@ -108,9 +233,130 @@ def analyze_reconciliation_results(reconciliation_df: pl.DataFrame) -> dict:
             ),
             "amount": total_overpaid_amount + total_underpaid_amount,
         },
+        "bill_types": get_bill_type_breakdown(reconciliation_df),
+        "top_overpaid_claims": get_top_discrepancy_claims(
+            reconciliation_df, RECONCILIATION_STATUSES["OVERPAID"]
+        ),
+        "top_underpaid_claims": get_top_discrepancy_claims(
+            reconciliation_df, RECONCILIATION_STATUSES["UNDERPAID"]
+        ),
+        "top_patients": get_top_discrepancy_patients(reconciliation_df),
+        "pareto": get_discrepancy_pareto(reconciliation_df),
     }
 
 
+def get_bill_type_breakdown(reconciliation_df: pl.DataFrame) -> dict:
+    totals = reconciliation_df.select(
+        pl.col(f"{prefix}_{measure}").sum()
+        for prefix in BILL_TYPE_COLUMN_PREFIXES.values()
+        for measure in ["total", "count"]
+    ).row(0, named=True)
+    total_amount = sum(
+        totals[f"{prefix}_total"] for prefix in BILL_TYPE_COLUMN_PREFIXES.values()
+    )
+
+    return {
+        bill_type: {
+            "count": totals[f"{prefix}_count"],
+            "amount": totals[f"{prefix}_total"],
+            "percentage": (
+                round(totals[f"{prefix}_total"] / total_amount * 100, 2)
+                if total_amount
+                else 0
+            ),
+        }
+        for bill_type, prefix in BILL_TYPE_COLUMN_PREFIXES.items()
+    }
+
+
+def _discrepancy_amount() -> pl.Expr:
+    return (pl.col("total_transaction_value") - pl.col("benefit_amount")).abs()
+
+
+def get_top_discrepancy_claims(
+    reconciliation_df: pl.DataFrame, status: str, k: int = TOP_DISCREPANCY_CLAIMS
+) -> list:
+    # top_k does a partial selection; only the k selected rows get sorted
+    return (
+        reconciliation_df.filter(pl.col("reconciliation_status") == status)
+        .with_columns(_discrepancy_amount().alias("discrepancy_amount"))
+        .top_k(k, by="discrepancy_amount")
+        .sort("discrepancy_amount", descending=True)
+        .select(
+            [
+                "claim_id",
+                "patient_id",
+                "benefit_amount",
+                "total_transaction_value",
+                "discrepancy_amount",
+            ]
+        )
+        .to_dicts()
+    )
+
+
+def get_top_discrepancy_patients(
+    reconciliation_df: pl.DataFrame, k: int = TOP_DISCREPANCY_PATIENTS
+) -> list:
+    filters = get_reconciliation_filters()
+    discrepancy = _discrepancy_amount()
+
+    # Patient attributes, when attached, are constant within a patient
+    attribute_aggregations = []
+    if "patient_name" in reconciliation_df.columns:
+        attribute_aggregations.append(pl.col("patient_name").first())
+
+    return (
+        reconciliation_df.group_by("patient_id")
+        .agg(
+            *attribute_aggregations,
+            discrepancy.sum().alias("discrepancy_amount"),
+            discrepancy.filter(filters["overpaid_filter"])
+            .sum()
+            .alias("overpaid_amount"),
+            discrepancy.filter(filters["underpaid_filter"])
+            .sum()
+            .alias("underpaid_amount"),
+            (~filters["balanced_filter"]).sum().alias("discrepant_claims"),
+        )
+        .top_k(k, by="discrepancy_amount")
+        .sort("discrepancy_amount", descending=True)
+        .to_dicts()
+    )
+
+
+def get_discrepancy_pareto(reconciliation_df: pl.DataFrame) -> list:
+    total_claims = reconciliation_df.height
+    claim_counts = [
+        math.ceil(total_claims * percentage / 100)
+        for percentage in PARETO_CLAIM_PERCENTAGES
+    ]
+
+    # Only the largest share needs selecting; the smaller shares are prefixes
+    # of the same descending ranking
+    discrepancies = reconciliation_df.select(_discrepancy_amount().alias("amount"))
+    total_amount = discrepancies["amount"].sum()
+    top_amounts = (
+        discrepancies["amount"].top_k(max(claim_counts)).sort(descending=True)
+    ).cum_sum()
+
+    pareto = []
+    for percentage, claim_count in zip(PARETO_CLAIM_PERCENTAGES, claim_counts):
+        covered_amount = top_amounts[claim_count - 1]
+        pareto.append(
+            {
+                "claim_percentage": percentage,
+                "claim_count": claim_count,
+                "amount": covered_amount,
+                "amount_percentage": (
+                    round(covered_amount / total_amount * 100, 2) if total_amount else 0
+                ),
+            }
+        )
+
+    return pareto
+
+
 def get_reconciliation_filters():
     return {
         "balanced_filter": pl.col("reconciliation_status")
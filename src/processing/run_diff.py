@@ -0,0 +1,125 @@
+from typing import Union
+
+import polars as pl
+
+from constants import RECONCILIATION_STATUSES, RUN_DIFF_CHANGE_TYPES
+
+TOP_RUN_DIFF_CHANGES = 20
+
+# Stable codes for the two low bits of the fingerprint. Polars' own row hash
+# is not guaranteed to be stable across versions, so runs persisted by
+# different releases could never be compared with it
+STATUS_CODES = {
+    RECONCILIATION_STATUSES["BALANCED"]: 0,
+    RECONCILIATION_STATUSES["OVERPAID"]: 1,
+    RECONCILIATION_STATUSES["UNDERPAID"]: 2,
+}
+
+RUN_DIFF_COLUMNS = [
+    "claim_id",
+    "change_type",
+    "previous_status",
+    "current_status",
+    "previous_total",
+    "current_total",
+    "dollar_delta",
+]
+
+
+def claim_fingerprint() -> pl.Expr:
+    # (cents << 2) | status: one deterministic 64-bit integer per claim that
+    # changes whenever its paid total or its status does
+    cents = (pl.col("total_transaction_value") * 100).round().cast(pl.Int64)
+    status_code = pl.col("reconciliation_status").replace_strict(
+        STATUS_CODES, return_dtype=pl.Int64
+    )
+    return (cents * 4 + status_code).alias("fingerprint")
+
+
+def _fingerprints(
+    reconciled: Union[pl.DataFrame, pl.LazyFrame], suffix: str
+) -> pl.LazyFrame:
+    # Only three columns are read, so persisted runs are scanned cheaply
+    return reconciled.lazy().select(
+        "claim_id",
+        claim_fingerprint().alias(f"fingerprint_{suffix}"),
+        pl.col("reconciliation_status").alias(f"{suffix}_status"),
+        pl.col("total_transaction_value").alias(f"{suffix}_total"),
+    )
+
+
+def diff_reconciliation_runs(
+    previous: Union[pl.DataFrame, pl.LazyFrame],
+    current: Union[pl.DataFrame, pl.LazyFrame],
+) -> pl.DataFrame:
+    balanced = RECONCILIATION_STATUSES["BALANCED"]
+    previous_status = pl.col("previous_status")
+    current_status = pl.col("current_status")
+
+    return (
+        _fingerprints(previous, "previous")
+        .join(
+            _fingerprints(current, "current"),
+            on="claim_id",
+            how="full",
+            coalesce=True,
+        )
+        # Unchanged claims are dropped on the fingerprint alone
+        .filter(
+            pl.col("fingerprint_previous").ne_missing(pl.col("fingerprint_current"))
+        )
+        .with_columns(
+            pl.when(previous_status.is_null())
+            .then(pl.lit(RUN_DIFF_CHANGE_TYPES["NEW"]))
+            .when(current_status.is_null())
+            .then(pl.lit(RUN_DIFF_CHANGE_TYPES["REMOVED"]))
+            .when((previous_status != balanced) & (current_status == balanced))
+            .then(pl.lit(RUN_DIFF_CHANGE_TYPES["RESOLVED"]))
+            .when((previous_status == balanced) & (current_status != balanced))
+            .then(pl.lit(RUN_DIFF_CHANGE_TYPES["NEWLY_DISCREPANT"]))
+            .when(previous_status != current_status)
+            .then(pl.lit(RUN_DIFF_CHANGE_TYPES["STATUS_CHANGED"]))
+            .otherwise(pl.lit(RUN_DIFF_CHANGE_TYPES["AMOUNT_CHANGED"]))
+            .alias("change_type"),
+            (
+                pl.col("current_total").fill_null(0)
+                - pl.col("previous_total").fill_null(0)
+            )
+            .round(2)
+            .alias("dollar_delta"),
+        )
+        .select(RUN_DIFF_COLUMNS)
+        .sort("claim_id")
+        .collect()
+    )
+
+
+def analyze_run_diff(diff_df: pl.DataFrame) -> dict:
+    by_change_type = {
+        row["change_type"]: row
+        for row in diff_df.group_by("change_type")
+        .agg(
+            pl.len().alias("claims"),
+            pl.col("dollar_delta").sum().round(2).alias("dollar_delta"),
+        )
+        .iter_rows(named=True)
+    }
+
+    return {
+        "changed_claims": diff_df.height,
+        "net_dollar_delta": round(diff_df["dollar_delta"].sum(), 2),
+        "change_types": {
+            change_type: {
+                "claims": by_change_type.get(change_type, {}).get("claims", 0),
+                "dollar_delta": by_change_type.get(change_type, {}).get(
+                    "dollar_delta", 0.0
+                ),
+            }
+            for change_type in RUN_DIFF_CHANGE_TYPES.values()
+        },
+        "top_changes": diff_df.top_k(
+            TOP_RUN_DIFF_CHANGES, by=pl.col("dollar_delta").abs()
+        )
+        .sort(pl.col("dollar_delta").abs(), "claim_id", descending=[True, False])
+        .to_dicts(),
+    }
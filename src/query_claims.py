@@ -0,0 +1,43 @@
+import argparse
+import json
+import time
+
+from constants import RECONCILIATION_STATUSES
+from storage import ClaimStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Query the claim store written during reconciliation"
+    )
+    parser.add_argument("store", help="Path to the claim store, e.g. output/claims.db")
+    lookup = parser.add_mutually_exclusive_group(required=True)
+    lookup.add_argument("--claim", help="Show a claim with its invoices and totals")
+    lookup.add_argument("--patient", type=int, help="List a patient's claims")
+    lookup.add_argument(
+        "--status",
+        choices=sorted(RECONCILIATION_STATUSES.values()),
+        help="List claims with the given reconciliation status",
+    )
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    with ClaimStore(args.store) as store:
+        if args.claim:
+            result = store.get_claim(args.claim)
+            if result is None:
+                parser.exit(1, f"❌ Claim {args.claim} not found\n")
+        elif args.patient is not None:
+            result = store.get_patient_claims(args.patient)
+        else:
+            result = store.get_claims_by_status(args.status, args.limit)
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    print(json.dumps(result, indent=2))
+    print(f"⏱️ Query completed in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
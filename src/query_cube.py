@@ -0,0 +1,65 @@
+import argparse
+import json
+import time
+from datetime import date
+from typing import Any
+
+import polars as pl
+
+from constants import CUBE_DIMENSIONS
+from storage import AggregateCube
+
+
+def _parse_filter_value(value: str, dtype: pl.DataType) -> Any:
+    if dtype == pl.Date:
+        # A service month can be given as 2024-03 or as any day within it
+        return date.fromisoformat(value if len(value) > 7 else f"{value}-01").replace(
+            day=1
+        )
+    if dtype.is_integer():
+        return int(value)
+    return value
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Drill into the aggregate cube written during reconciliation"
+    )
+    parser.add_argument("cube", help="Path to the cube, e.g. output/cube.parquet")
+    parser.add_argument(
+        "--by",
+        nargs="*",
+        default=[],
+        choices=CUBE_DIMENSIONS,
+        help="Dimensions to break the totals down by",
+    )
+    parser.add_argument(
+        "--where",
+        action="append",
+        default=[],
+        metavar="DIMENSION=VALUE",
+        help="Only count cells with this value, e.g. service_month=2024-03",
+    )
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    try:
+        cube = AggregateCube(args.cube)
+        filters = {}
+        for condition in args.where:
+            dimension, _, value = condition.partition("=")
+            if dimension not in CUBE_DIMENSIONS:
+                parser.error(f"unknown dimension in --where {condition}")
+            filters[dimension] = _parse_filter_value(value, cube.schema[dimension])
+        result = cube.query(args.by, filters)
+    except (FileNotFoundError, ValueError) as e:
+        parser.exit(1, f"❌ {e}\n")
+
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+    print(json.dumps(result, indent=2, default=str))
+    print(f"⏱️ Query completed in {elapsed_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
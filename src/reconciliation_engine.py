@@ -1,42 +1,602 @@
 import os
-from reporting import generate_report
-from data.loader import ClaimsLoader, InvoicesLoader
+import sys
+import tempfile
+from contextlib import ExitStack, redirect_stdout
+from datetime import date
+from pathlib import Path
+from typing import BinaryIO, Optional, Sequence, Union
+
+import polars as pl
+
+from pipeline import (
+    PipelineStage,
+    PipelineExecutor,
+    CheckpointStore,
+    plan_execution,
+    fingerprint_run,
+    default_run_id,
+)
+from constants import EXECUTION_MODES
+from reporting import (
+    create_pie_chart,
+    generate_table_section_data,
+    render_html_report,
+    write_report,
+    write_report_assets,
+    generate_preview_report,
+    generate_patient_statements,
+)
+from data.loader import (
+    DataLoader,
+    PatientsLoader,
+    ClaimsLoader,
+    InvoicesLoader,
+    SAMPLE_HASH_BUCKETS,
+)
 from processing import (
     reconcile_claims,
+    reconcile_claims_partitioned,
     analyze_reconciliation_results,
+    analyze_payment_aging,
+    detect_duplicate_payments,
+    analyze_duplicate_payments,
+    attach_patient_attributes,
+    analyze_patients,
+    estimate_reconciliation_results,
+    diff_reconciliation_runs,
+    analyze_run_diff,
+    match_unmatched_invoices,
+    analyze_invoice_matching,
+    build_aggregate_cube,
+)
+from storage import (
+    write_claim_store,
+    write_ipc_stream,
+    export_reconciliation_results,
+    scan_reconciled_results,
+    write_aggregate_cube,
 )
-from utils import get_project_root
+from utils import format_memory_size, get_project_root
+
+# Passing "-" as the stream path writes the Arrow IPC stream to stdout
+STDOUT_STREAM_PATH = "-"
 
 
 def run_reconciliation_engine(
-    claims_file_path: str, invoices_file_path: str, output_file_path: str
-) -> str:
+    claims_file_path: str,
+    invoices_file_path: str,
+    output_file_path: str,
+    store_file_path: Optional[str] = None,
+    duplicate_date_window_days: int = 0,
+    as_of_date: Optional[date] = None,
+    patients_file_path: Optional[str] = None,
+    preview_fraction: Optional[float] = None,
+    statements_dir: Optional[str] = None,
+    statement_format: str = "html",
+    max_concurrency: Optional[int] = None,
+    checkpoint_dir: Optional[str] = None,
+    run_id: Optional[str] = None,
+    resume: bool = False,
+    export_dir: Optional[str] = None,
+    export_formats: Sequence[str] = ("ipc", "parquet"),
+    stream_path: Optional[str] = None,
+    html_report: bool = True,
+    max_memory: Optional[int] = None,
+    previous_results_path: Optional[str] = None,
+    report_assets_dir: Optional[str] = None,
+    fuzzy_matching: bool = False,
+    strict_ingest: bool = False,
+    cube_file_path: Optional[str] = None,
+    cpu_threads: Optional[int] = None,
+) -> Optional[str]:
+    if preview_fraction is not None:
+        return run_reconciliation_preview(
+            claims_file_path, invoices_file_path, output_file_path, preview_fraction
+        )
+
+    # When results stream to stdout, progress messages move to stderr so the
+    # stream stays readable by the consumer
+    stream_sink: Union[str, BinaryIO, None] = stream_path
+    with ExitStack() as stack:
+        if stream_path == STDOUT_STREAM_PATH:
+            stream_sink = sys.stdout.buffer
+            stack.enter_context(redirect_stdout(sys.stderr))
+
+        return _run_reconciliation_pipeline(
+            claims_file_path,
+            invoices_file_path,
+            output_file_path,
+            store_file_path=store_file_path,
+            duplicate_date_window_days=duplicate_date_window_days,
+            as_of_date=as_of_date,
+            patients_file_path=patients_file_path,
+            statements_dir=statements_dir,
+            statement_format=statement_format,
+            max_concurrency=max_concurrency,
+            checkpoint_dir=checkpoint_dir,
+            run_id=run_id,
+            resume=resume,
+            export_dir=export_dir,
+            export_formats=export_formats,
+            stream_sink=stream_sink,
+            html_report=html_report,
+            max_memory=max_memory,
+            previous_results_path=previous_results_path,
+            report_assets_dir=report_assets_dir,
+            fuzzy_matching=fuzzy_matching,
+            strict_ingest=strict_ingest,
+            cube_file_path=cube_file_path,
+            cpu_threads=cpu_threads,
+        )
+
+
+def _ingest_note(loader: DataLoader) -> str:
+    stats = loader.ingest_stats
+    if stats is None:
+        return ""
+    return (
+        f" ({format_memory_size(stats['bytes'])} from {stats['files']} file(s) "
+        f"in {stats['chunks']} chunk(s))"
+    )
+
+
+def _cpu_utilisation_note(executor: PipelineExecutor, threads: int) -> str:
+    # Share of the thread budget each stage kept busy while it ran; stages
+    # overlapping in time split the CPU time spent while they overlap
+    busiest_stages = sorted(
+        executor.stage_cpu_seconds.items(), key=lambda item: item[1], reverse=True
+    )
+    usage = [
+        f"{name} {cpu_seconds}s "
+        f"({cpu_seconds / max(executor.stage_timings[name] * threads, 1e-3):.0%})"
+        for name, cpu_seconds in busiest_stages
+    ]
+    return f"🧮 Stage CPU time (utilisation of {threads} threads): " + ", ".join(usage)
+
+
+def _run_reconciliation_pipeline(
+    claims_file_path: str,
+    invoices_file_path: str,
+    output_file_path: str,
+    store_file_path: Optional[str],
+    duplicate_date_window_days: int,
+    as_of_date: Optional[date],
+    patients_file_path: Optional[str],
+    statements_dir: Optional[str],
+    statement_format: str,
+    max_concurrency: Optional[int],
+    checkpoint_dir: Optional[str],
+    run_id: Optional[str],
+    resume: bool,
+    export_dir: Optional[str],
+    export_formats: Sequence[str],
+    stream_sink: Union[str, BinaryIO, None],
+    html_report: bool,
+    max_memory: Optional[int],
+    previous_results_path: Optional[str],
+    report_assets_dir: Optional[str],
+    fuzzy_matching: bool,
+    strict_ingest: bool,
+    cube_file_path: Optional[str],
+    cpu_threads: Optional[int],
+) -> Optional[str]:
     print("🚀 Starting full reconciliation workflow...")
+    as_of_date = as_of_date or date.today()
 
-    # Step 1: Load data using ClaimsLoader and InvoicesLoader
     project_root = get_project_root()
     claims_path = os.path.join(project_root, claims_file_path)
     invoices_path = os.path.join(project_root, invoices_file_path)
 
-    claims_loader = ClaimsLoader(claims_path)
-    invoices_loader = InvoicesLoader(invoices_path)
+    # Pick eager, streaming or partitioned execution for the memory budget
+    plan = plan_execution(claims_path, invoices_path, max_memory)
+    is_eager = plan["mode"] == EXECUTION_MODES["EAGER"]
+    collect_engine = "auto" if is_eager else "streaming"
+    print(f"🧭 Execution plan: {plan['mode']} ({plan['reason']})")
 
-    claims_df = claims_loader.load()
-    invoices_df = invoices_loader.load()
-    print(f"✅ Loaded {claims_df.height} claims and {invoices_df.height} invoices")
+    # Step 1: Load and validate claims and invoices side by side; streaming
+    # plans validate lazy scans instead of loading the files
+    def load_claims() -> Union[pl.DataFrame, pl.LazyFrame]:
+        claims_loader = ClaimsLoader(claims_path, strict=strict_ingest)
+        if not is_eager:
+            claims_lf = claims_loader.scan()
+            print(f"✅ Validated claims scan")
+            return claims_lf
+        claims_df = claims_loader.load()
+        print(f"✅ Loaded {claims_df.height} claims{_ingest_note(claims_loader)}")
+        return claims_df
 
-    # Step 2: Send the load results to reconcile_claims()
-    reconciled_df = reconcile_claims(claims_df, invoices_df)
-    print(f"✅ Reconciled {reconciled_df.height} claims")
+    def load_invoices() -> Union[pl.DataFrame, pl.LazyFrame]:
+        invoices_loader = InvoicesLoader(
+            invoices_path, allow_unmatched=fuzzy_matching, strict=strict_ingest
+        )
+        if not is_eager:
+            invoices_lf = invoices_loader.scan()
+            print(f"✅ Validated invoices scan")
+            return invoices_lf
+        invoices_df = invoices_loader.load()
+        print(f"✅ Loaded {invoices_df.height} invoices{_ingest_note(invoices_loader)}")
+        return invoices_df
+
+    # Step 1b: Optionally attribute invoices whose claim_id is missing or
+    # unknown to a claim of the same patient by payment date and amount
+    def match_invoices(
+        claims_df: Union[pl.DataFrame, pl.LazyFrame],
+        invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+    ) -> Union[pl.DataFrame, pl.LazyFrame]:
+        matched_invoices_df = match_unmatched_invoices(claims_df, invoices_df)
+        if not is_eager:
+            # Spilled once, so the partition passes and the other invoice
+            # consumers scan the matched invoices instead of each repeating
+            # the matching over every invoice
+            spill_dir = spill_stack.enter_context(
+                tempfile.TemporaryDirectory(prefix="matched-invoices-")
+            )
+            spill_path = os.path.join(spill_dir, "matched_invoices.parquet")
+            matched_invoices_df.sink_parquet(spill_path, engine="streaming")
+            matched_invoices_df = pl.scan_parquet(spill_path)
+        print(f"✅ Matched invoices without a known claim_id")
+        return matched_invoices_df
+
+    def load_patients() -> Optional[pl.DataFrame]:
+        if not patients_file_path:
+            return None
+        patients_path = os.path.join(project_root, patients_file_path)
+        return PatientsLoader(patients_path, strict=strict_ingest).load()
+
+    # Step 2: Reconcile, then join patient attributes onto the reconciled
+    # claims so they never widen the hot invoice join
+    def reconcile(
+        claims_df: Union[pl.DataFrame, pl.LazyFrame],
+        invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+        patients_df: Optional[pl.DataFrame],
+    ) -> pl.DataFrame:
+        if plan["mode"] == EXECUTION_MODES["PARTITIONED"]:
+            reconciled_df = reconcile_claims_partitioned(
+                claims_df.lazy(), invoices_df.lazy(), plan["partitions"], as_of_date
+            )
+        else:
+            reconciled_df = reconcile_claims(
+                claims_df, invoices_df, as_of_date, engine=collect_engine
+            )
+        print(f"✅ Reconciled {reconciled_df.height} claims")
+        if patients_df is not None:
+            reconciled_df = attach_patient_attributes(reconciled_df, patients_df)
+            print(f"✅ Attached attributes of {patients_df.height} patients")
+        return reconciled_df
+
+    # Optionally persist claims and their invoices for claim-level drill-down
+    def store(
+        invoices_df: Union[pl.DataFrame, pl.LazyFrame], reconciled_df: pl.DataFrame
+    ) -> Optional[str]:
+        if not store_file_path:
+            return None
+        store_path = write_claim_store(store_file_path, invoices_df, reconciled_df)
+        print(f"✅ Wrote claim store -> {store_path}")
+        return store_path
+
+    # Step 2b: Roll the reconciled claims up into the aggregate cube that the
+    # report's drill-downs and the cube query API read
+    def build_cube(reconciled_df: pl.DataFrame) -> pl.DataFrame:
+        cube_df = build_aggregate_cube(reconciled_df)
+        print(f"✅ Built aggregate cube of {cube_df.height} cells")
+        if cube_file_path:
+            cube_path = write_aggregate_cube(cube_df, cube_file_path)
+            print(f"✅ Wrote aggregate cube -> {cube_path}")
+        return cube_df
+
+    # Step 3: Analyze the results; each analysis only reads the reconciled
+    # frame, so they run concurrently and are merged afterwards
+    def analyze_summary(reconciled_df: pl.DataFrame) -> dict:
+        analyzed_data = analyze_reconciliation_results(reconciled_df)
+        analyzed_data["patients"] = analyze_patients(reconciled_df)
+        print(f"✅ Analyzed reconciliation results")
+        return analyzed_data
+
+    # Step 3b: Detect payments that were sent more than once
+    def analyze_duplicates(
+        invoices_df: Union[pl.DataFrame, pl.LazyFrame], reconciled_df: pl.DataFrame
+    ) -> dict:
+        duplicates_df = detect_duplicate_payments(
+            invoices_df, duplicate_date_window_days, engine=collect_engine
+        )
+        print(f"✅ Found {duplicates_df.height} duplicate payments")
+        return analyze_duplicate_payments(
+            duplicates_df, reconciled_df, duplicate_date_window_days
+        )
+
+    # Step 3c: Age outstanding balances as of the requested date
+    def analyze_aging(reconciled_df: pl.DataFrame) -> dict:
+        aging = analyze_payment_aging(reconciled_df, as_of_date)
+        print(f"✅ Aged outstanding balances as of {as_of_date.isoformat()}")
+        return aging
 
-    # Step 3: Send reconcile_claims() results to analyze_reconciliation_results()
-    analyzed_data = analyze_reconciliation_results(reconciled_df)
-    print(f"✅ Analyzed reconciliation results")
+    # Step 3d: Optionally compare against the exported results of an earlier
+    # run, joining the two runs once on claim_id by per-claim fingerprints
+    def diff_runs(reconciled_df: pl.DataFrame) -> Optional[dict]:
+        if not previous_results_path:
+            return None
+        diff_df = diff_reconciliation_runs(
+            scan_reconciled_results(previous_results_path), reconciled_df
+        )
+        print(
+            f"✅ {diff_df.height} claims changed since the run in "
+            f"{previous_results_path}"
+        )
+        return analyze_run_diff(diff_df)
 
-    # Step 4: Generate the report
-    report_path = generate_report(reconciled_df, analyzed_data, output_file_path)
+    def analyze_matching(
+        invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+    ) -> Optional[dict]:
+        if not fuzzy_matching:
+            return None
+        return analyze_invoice_matching(invoices_df)
 
+    def merge_analysis(
+        summary: dict,
+        duplicates: dict,
+        aging: dict,
+        run_diff: Optional[dict],
+        invoice_matching: Optional[dict],
+    ) -> dict:
+        analyzed_data = {
+            **summary,
+            "duplicate_payments": duplicates,
+            "aging": aging,
+            "execution_plan": plan,
+        }
+        if run_diff is not None:
+            analyzed_data["run_diff"] = run_diff
+        if invoice_matching is not None:
+            analyzed_data["invoice_matching"] = invoice_matching
+        return analyzed_data
+
+    # Step 4: Render the chart and the claims table independently, then
+    # assemble and write the report. With an assets directory the report
+    # links the shared, content-hashed report.css and report.js instead of
+    # embedding them
+    def render_report(
+        reconciled_df: pl.DataFrame,
+        analyzed_data: dict,
+        chart_image: str,
+        table_section_data: dict,
+        cube_df: pl.DataFrame,
+    ) -> str:
+        asset_urls = None
+        if report_assets_dir:
+            report_dir = os.path.dirname(os.path.join(project_root, output_file_path))
+            asset_urls = {
+                asset_type: Path(os.path.relpath(asset_path, report_dir)).as_posix()
+                for asset_type, asset_path in write_report_assets(
+                    report_assets_dir
+                ).items()
+            }
+        html_content = render_html_report(
+            reconciled_df,
+            analyzed_data,
+            chart_image,
+            table_section_data,
+            asset_urls,
+            cube_df,
+        )
+        return write_report(html_content, output_file_path)
+
+    # Step 5: Optionally write one reconciliation statement per patient
+    def write_statements(reconciled_df: pl.DataFrame) -> Optional[dict]:
+        if not statements_dir:
+            return None
+        statements = generate_patient_statements(
+            reconciled_df, statements_dir, statement_format
+        )
+        print(
+            f"✅ Wrote {statements['statements']} patient statements -> "
+            f"{statements['output_dir']}"
+        )
+        return statements
+
+    # Step 6: Optionally hand the results to downstream consumers as Arrow
+    # IPC files and status-partitioned Parquet, or as an IPC stream
+    def export_results(reconciled_df: pl.DataFrame, analyzed_data: dict) -> dict:
+        exported = export_reconciliation_results(
+            reconciled_df, analyzed_data, export_dir, export_formats
+        )
+        print(f"✅ Exported {', '.join(exported)} -> {export_dir}")
+        return exported
+
+    def stream_results(reconciled_df: pl.DataFrame, analyzed_data: dict) -> None:
+        write_ipc_stream(reconciled_df, analyzed_data, stream_sink)
+        print(f"✅ Streamed {reconciled_df.height} reconciled claims")
+
+    # Checkpoints are keyed by the run ID and by fingerprints of the inputs
+    # and parameters, so a resumed run never reuses results of other data
+    checkpoint_store = None
+    if checkpoint_dir:
+        input_file_paths = {"claims": claims_path, "invoices": invoices_path}
+        if patients_file_path:
+            input_file_paths["patients"] = os.path.join(
+                project_root, patients_file_path
+            )
+        fingerprints = fingerprint_run(
+            input_file_paths,
+            {
+                "as_of_date": as_of_date.isoformat(),
+                "duplicate_date_window_days": duplicate_date_window_days,
+                "output_file_path": output_file_path,
+                "store_file_path": store_file_path,
+                "statements_dir": statements_dir,
+                "statement_format": statement_format,
+                "export_dir": export_dir,
+                "export_formats": sorted(export_formats),
+                "html_report": html_report,
+                "previous_results_path": previous_results_path,
+                "report_assets_dir": report_assets_dir,
+                "fuzzy_matching": fuzzy_matching,
+                "strict_ingest": strict_ingest,
+                "cube_file_path": cube_file_path,
+            },
+        )
+        checkpoint_store = CheckpointStore(
+            checkpoint_dir, run_id or default_run_id(fingerprints), fingerprints
+        )
+        print(
+            f"💾 Checkpointing run {checkpoint_store.run_id} -> {checkpoint_store.run_dir}"
+        )
+
+    # Spill files written by the stages live until the pipeline has finished
+    spill_stack = ExitStack()
+
+    # With fuzzy matching every invoice consumer reads the matched invoices
+    invoices_stage = "matched_invoices" if fuzzy_matching else "invoices"
+    # With a CPU budget the Polars-heavy stages claim a share of it, so they
+    # never oversubscribe the shared thread pool together: the claims and
+    # invoices loads run side by side on half each, as does the claims table
+    # next to the analyses, while matching and reconciliation take all of it.
+    # Report rendering is mostly single-threaded Python and claims one thread.
+    full_share = cpu_threads or 0
+    half_share = max(1, full_share // 2) if cpu_threads else 0
+    stages = [
+        # Lazy scans cannot be checkpointed; they are cheap to recreate
+        PipelineStage(
+            "claims", load_claims, checkpoint=is_eager, cpu_threads=half_share
+        ),
+        PipelineStage(
+            "invoices", load_invoices, checkpoint=is_eager, cpu_threads=half_share
+        ),
+        PipelineStage("patients", load_patients),
+        PipelineStage(
+            "reconciled",
+            reconcile,
+            ["claims", invoices_stage, "patients"],
+            cpu_threads=full_share,
+        ),
+        PipelineStage("store", store, [invoices_stage, "reconciled"]),
+        PipelineStage("cube", build_cube, ["reconciled"]),
+        PipelineStage("summary", analyze_summary, ["reconciled"]),
+        PipelineStage("duplicates", analyze_duplicates, [invoices_stage, "reconciled"]),
+        PipelineStage("aging", analyze_aging, ["reconciled"]),
+        PipelineStage("invoice_matching", analyze_matching, [invoices_stage]),
+        # Exports depend on the analysis, so the previous run is fully read
+        # before an export into the same directory overwrites it
+        PipelineStage("run_diff", diff_runs, ["reconciled"]),
+        PipelineStage(
+            "analysis",
+            merge_analysis,
+            ["summary", "duplicates", "aging", "run_diff", "invoice_matching"],
+        ),
+        PipelineStage("statements", write_statements, ["reconciled"]),
+    ]
+    if fuzzy_matching:
+        stages.append(
+            PipelineStage(
+                "matched_invoices",
+                match_invoices,
+                ["claims", "invoices"],
+                checkpoint=is_eager,
+                cpu_threads=full_share,
+            )
+        )
+    if html_report:
+        stages += [
+            PipelineStage("chart", create_pie_chart, ["analysis"], cpu_threads=1),
+            PipelineStage(
+                "table",
+                generate_table_section_data,
+                ["reconciled"],
+                cpu_threads=half_share,
+            ),
+            PipelineStage(
+                "report",
+                render_report,
+                ["reconciled", "analysis", "chart", "table", "cube"],
+                cpu_threads=1,
+            ),
+        ]
+    if export_dir:
+        stages.append(
+            PipelineStage("exports", export_results, ["reconciled", "analysis"])
+        )
+    # The stream has to reach its consumer on every run, resumed or not
+    if stream_sink is not None:
+        stages.append(
+            PipelineStage(
+                "stream",
+                stream_results,
+                ["reconciled", "analysis"],
+                checkpoint=False,
+            )
+        )
+
+    executor = PipelineExecutor(
+        stages,
+        max_concurrency=max_concurrency,
+        checkpoint_store=checkpoint_store,
+        resume=resume,
+        cpu_threads=cpu_threads,
+    )
+    with spill_stack:
+        report_path = executor.run().get("report")
+
+    if executor.restored_stages:
+        print(
+            f"♻️ Resumed {len(executor.restored_stages)} stages from checkpoints: "
+            + ", ".join(executor.restored_stages)
+        )
+
+    if executor.stage_timings:
+        slowest_stages = sorted(
+            executor.stage_timings.items(), key=lambda item: item[1], reverse=True
+        )
+        print(
+            "⏱️ Stage timings: "
+            + ", ".join(f"{name} {seconds}s" for name, seconds in slowest_stages)
+        )
+        print(_cpu_utilisation_note(executor, cpu_threads or pl.thread_pool_size()))
     print(f"✅ Full reconciliation completed successfully!")
-    print(f"📄 Report available at: {report_path}")
+    if report_path:
+        print(f"📄 Report available at: {report_path}")
+
+    return report_path
+
+
+def run_reconciliation_preview(
+    claims_file_path: str,
+    invoices_file_path: str,
+    output_file_path: str,
+    sample_fraction: float,
+    seed: int = 0,
+) -> str:
+    if not 1 / SAMPLE_HASH_BUCKETS <= sample_fraction <= 1:
+        raise ValueError(
+            f"Preview sample fraction must be between {1 / SAMPLE_HASH_BUCKETS} and 1"
+        )
+
+    print(f"🔎 Starting reconciliation preview on a {sample_fraction:.2%} sample...")
+
+    # Step 1: Load the claims whose hashed claim_id falls in the sample, along
+    # with all of their invoices, and validate the sample
+    project_root = get_project_root()
+    claims_path = os.path.join(project_root, claims_file_path)
+    invoices_path = os.path.join(project_root, invoices_file_path)
+
+    claims_df = ClaimsLoader(claims_path).load_sample(sample_fraction, seed)
+    invoices_df = InvoicesLoader(invoices_path).load_sample(sample_fraction, seed)
+    print(f"✅ Sampled {claims_df.height} claims and {invoices_df.height} invoices")
+
+    # Step 2: Reconcile the sample and scale it up to population estimates
+    sampled_fraction = (
+        round(sample_fraction * SAMPLE_HASH_BUCKETS) / SAMPLE_HASH_BUCKETS
+    )
+    reconciled_df = reconcile_claims(claims_df, invoices_df)
+    estimates = estimate_reconciliation_results(
+        reconciled_df, sampled_fraction, invoices_df.height
+    )
+    print(
+        f"✅ Estimated results for ~{estimates['total_claims']['estimate']:,.0f} claims"
+    )
+
+    # Step 3: Generate the preview report
+    report_path = generate_preview_report(estimates, output_file_path)
+
+    print(f"✅ Reconciliation preview completed!")
+    print(f"📄 Preview report available at: {report_path}")
 
     return report_path
@@ -1,3 +1,23 @@
-from .report_generator import generate_report
+from .report_generator import (
+    generate_report,
+    create_pie_chart,
+    generate_table_section_data,
+    generate_html_report,
+    render_html_report,
+    write_report,
+)
+from .report_assets import write_report_assets
+from .preview_report import generate_preview_report
+from .statements import generate_patient_statements
 
-__all__ = ["generate_report"]
+__all__ = [
+    "generate_report",
+    "create_pie_chart",
+    "generate_table_section_data",
+    "generate_html_report",
+    "render_html_report",
+    "write_report_assets",
+    "write_report",
+    "generate_preview_report",
+    "generate_patient_statements",
+]
@@ -0,0 +1,123 @@
+import os
+
+from utils import get_project_root, ensure_directory_exists
+from .report_generator import format_currency
+
+
+def _format_range(estimate: dict, formatter) -> str:
+    return f"{formatter(estimate['low'])} – {formatter(estimate['high'])}"
+
+
+def _format_count(value: float) -> str:
+    return f"{round(value):,}"
+
+
+def _format_percentage(value: float) -> str:
+    return f"{value}%"
+
+
+def generate_preview_card(title: str, status_class: str, estimates: dict) -> str:
+    amount = ""
+    if "amount" in estimates:
+        amount = f"""
+            <div class="amount">≈ {format_currency(estimates['amount']['estimate'])}</div>
+            <div class="range">{_format_range(estimates['amount'], format_currency)}</div>
+        """
+
+    return f"""
+        <div class="card {status_class}">
+            <h3>{title}</h3>
+            <div class="number">≈ {_format_count(estimates['count']['estimate'])}</div>
+            <div class="range">{_format_range(estimates['count'], _format_count)}</div>
+            <div class="percentage">≈ {estimates['percentage']['estimate']}%
+                ({_format_range(estimates['percentage'], _format_percentage)})</div>
+            {amount}
+        </div>
+    """
+
+
+def generate_preview_html(estimates: dict) -> str:
+    sample = estimates["sample"]
+    confidence = round(sample["confidence"] * 100)
+
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>PREVIEW - Insurance Reconciliation Estimate</title>
+    <style>
+        body {{
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            color: #333;
+            background-color: #f8f9fa;
+            margin: 0;
+        }}
+        .container {{ max-width: 1000px; margin: 0 auto; padding: 15px; }}
+        .preview-banner {{
+            background: repeating-linear-gradient(45deg, #ffc107, #ffc107 20px, #ffcd38 20px, #ffcd38 40px);
+            color: #333;
+            padding: 1.5rem;
+            border-radius: 10px;
+            text-align: center;
+            margin-bottom: 1.5rem;
+        }}
+        .preview-banner h1 {{ margin: 0 0 0.5rem 0; }}
+        .grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 1rem;
+        }}
+        .card {{
+            background: white;
+            padding: 1.5rem;
+            border-radius: 8px;
+            text-align: center;
+            border-left: 4px solid;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+        }}
+        .card.total {{ border-color: #007bff; }}
+        .card.balanced {{ border-color: #28a745; }}
+        .card.overpaid {{ border-color: #dc3545; }}
+        .card.underpaid {{ border-color: #ffc107; }}
+        .card h3 {{ font-size: 0.9rem; color: #666; }}
+        .card .number {{ font-size: 2rem; font-weight: bold; }}
+        .card .amount {{ font-size: 1.1rem; font-weight: bold; margin-top: 0.5rem; }}
+        .card .range, .card .percentage {{ font-size: 0.85rem; color: #666; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="preview-banner">
+            <h1>⚠️ PREVIEW — Estimated Reconciliation Summary</h1>
+            <p>Estimated from a {sample['fraction'] * 100:g}% sample of claims
+            ({sample['claims']:,} claims, {sample['invoices']:,} invoices).
+            Ranges are {confidence}% confidence intervals. Run the full reconciliation for exact figures.</p>
+        </div>
+
+        <div class="grid">
+            <div class="card total">
+                <h3>Total Claims</h3>
+                <div class="number">≈ {_format_count(estimates['total_claims']['estimate'])}</div>
+                <div class="range">{_format_range(estimates['total_claims'], _format_count)}</div>
+            </div>
+            {generate_preview_card("✅ Balanced Claims", "balanced", estimates["balanced"])}
+            {generate_preview_card("⬆️ Overpaid Claims", "overpaid", estimates["overpaid"])}
+            {generate_preview_card("⬇️ Underpaid Claims", "underpaid", estimates["underpaid"])}
+        </div>
+    </div>
+</body>
+</html>
+    """
+
+
+def generate_preview_report(estimates: dict, output_file_path: str) -> str:
+    project_root = get_project_root()
+    absolute_output_path = os.path.join(project_root, output_file_path)
+    ensure_directory_exists(absolute_output_path)
+
+    with open(absolute_output_path, "w", encoding="utf-8") as f:
+        f.write(generate_preview_html(estimates))
+
+    return absolute_output_path
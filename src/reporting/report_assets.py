@@ -0,0 +1,585 @@
+import hashlib
+import os
+import threading
+from typing import Dict
+
+from utils import get_project_root
+
+REPORT_ASSET_NAME = "report"
+
+REPORT_CSS = """
+* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    line-height: 1.6;
+    color: #333;
+    background-color: #f8f9fa;
+}
+
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 15px;
+}
+
+.header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 2rem;
+    border-radius: 10px;
+    margin-bottom: 2rem;
+    text-align: center;
+}
+
+.header h1 {
+    font-size: 2.5rem;
+    margin-bottom: 0.5rem;
+}
+
+.header p {
+    font-size: 1.1rem;
+    opacity: 0.9;
+}
+
+
+.summary-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
+    gap: 1rem;
+    margin-top: 1rem;
+}
+
+.summary-card {
+    padding: 1.5rem;
+    border-radius: 8px;
+    text-align: center;
+    border-left: 4px solid;
+}
+
+.summary-card.total { background: #e8f4fd; border-color: #007bff; }
+.summary-card.balanced { background: #e8f5e8; border-color: #28a745; }
+.summary-card.overpaid { background: #fdeaea; border-color: #dc3545; }
+.summary-card.underpaid { background: #fff3cd; border-color: #ffc107; }
+.summary-card.issues { background: #f8d7da; border-color: #dc3545; }
+
+.summary-card h3 {
+    font-size: 0.9rem;
+    color: #666;
+    margin-bottom: 0.5rem;
+}
+
+.summary-card .number {
+    font-size: 2rem;
+    font-weight: bold;
+    color: #333;
+}
+
+.summary-card .percentage {
+    font-size: 0.9rem;
+    color: #666;
+}
+
+.summary-card .amount {
+    font-size: 1.1rem;
+    font-weight: bold;
+    color: #444;
+    margin-top: 0.25rem;
+}
+
+.summary-section {
+    background: white;
+    padding: 1.5rem;
+    border-radius: 10px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+    margin-bottom: 1.5rem;
+}
+
+.summary-section h2 {
+    text-align: center;
+    margin-bottom: 2rem;
+    color: #333;
+}
+
+.summary-content {
+    display: flex;
+    flex-direction: column;
+    gap: 2rem;
+    align-items: center;
+}
+
+.summary-cards {
+    width: 100%;
+}
+
+.summary-grid {
+    width: 100%;
+    max-width: 1000px;
+    margin: 0 auto;
+}
+
+.chart-container {
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    align-items: center;
+    text-align: center;
+}
+
+.chart-container h2 {
+    margin-bottom: 1rem;
+}
+
+.chart-container img {
+    max-width: 70%;
+    height: auto;
+}
+
+.summary-section h3 {
+    margin: 1.5rem 0 0.75rem 0;
+    color: #444;
+}
+
+.section-note {
+    text-align: center;
+    color: #666;
+    margin: -1.5rem 0 1rem 0;
+}
+
+.analysis-grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(420px, 1fr));
+    gap: 1.5rem;
+}
+
+.analysis-table {
+    max-height: 360px;
+    overflow: auto;
+    border: 1px solid #dee2e6;
+    border-radius: 6px;
+}
+
+.share-bar {
+    display: inline-block;
+    height: 0.6rem;
+    margin-right: 0.5rem;
+    background: #ffc107;
+    border-radius: 3px;
+}
+
+.analysis-table th {
+    position: sticky;
+    top: 0;
+}
+
+.table-section {
+    background: white;
+    border-radius: 10px;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+}
+
+.table-header {
+    padding: 1rem;
+    border-bottom: 1px solid #dee2e6;
+}
+
+.controls {
+    display: flex;
+    gap: 1rem;
+    margin-bottom: 1rem;
+    flex-wrap: wrap;
+}
+
+.filter-group {
+    display: flex;
+    align-items: center;
+    gap: 0.5rem;
+}
+
+.filter-btn {
+    padding: 0.5rem 1rem;
+    border: 2px solid #dee2e6;
+    background: white;
+    border-radius: 6px;
+    cursor: pointer;
+    transition: all 0.3s;
+}
+
+.filter-btn.active {
+    background: #007bff;
+    color: white;
+    border-color: #007bff;
+}
+
+.pagination {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    margin: 1rem 0.5rem 1.5rem 0.5rem;
+    padding: 0.5rem;
+}
+
+.page-info {
+    color: #666;
+}
+
+.page-controls button {
+    padding: 0.5rem 1rem;
+    border: 1px solid #dee2e6;
+    background: white;
+    cursor: pointer;
+    margin: 0 0.25rem;
+    border-radius: 4px;
+}
+
+.page-controls button:hover {
+    background: #f8f9fa;
+}
+
+.page-controls button:disabled {
+    opacity: 0.5;
+    cursor: not-allowed;
+}
+
+table {
+    width: 100%;
+    border-collapse: collapse;
+}
+
+th {
+    background: #f8f9fa;
+    padding: 0.75rem;
+    text-align: left;
+    border-bottom: 2px solid #dee2e6;
+    font-weight: 600;
+    font-size: 0.9rem;
+}
+
+td {
+    padding: 0.5rem 0.75rem;
+    border-bottom: 1px solid #dee2e6;
+    font-size: 0.9rem;
+}
+
+.table-row:hover {
+    background-color: #f8f9fa;
+}
+
+.status-badge {
+    padding: 0.25rem 0.75rem;
+    border-radius: 20px;
+    font-size: 0.85rem;
+    font-weight: 600;
+}
+
+.status-badge.balanced {
+    background: #d4edda;
+    color: #155724;
+}
+
+.status-badge.overpaid {
+    background: #f8d7da;
+    color: #721c24;
+}
+
+.status-badge.underpaid {
+    background: #fff3cd;
+    color: #856404;
+}
+
+th.sortable {
+    cursor: pointer;
+    user-select: none;
+}
+
+th.sortable:hover {
+    background: #e9ecef;
+}
+
+th.sortable .sort-indicator {
+    color: #007bff;
+    margin-left: 0.25rem;
+}
+
+.search-input {
+    padding: 0.5rem 0.75rem;
+    border: 2px solid #dee2e6;
+    border-radius: 6px;
+    min-width: 240px;
+}
+
+.hidden {
+    display: none !important;
+}
+
+/* Responsive design for smaller screens */
+@media (max-width: 768px) {
+    .summary-content {
+        gap: 1rem;
+    }
+
+    .container {
+        padding: 10px;
+    }
+
+    .summary-grid {
+        grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
+        gap: 0.5rem;
+        max-width: 100%;
+    }
+}
+"""
+
+# Expects SORT_PERMUTATIONS, SEARCH_INDEX and CUBE to be defined by the report
+REPORT_JS = """
+const tableBody = document.getElementById('table-body');
+const allRows = Array.from(tableBody.querySelectorAll('.table-row'));
+allRows.forEach(row => row.style.display = 'none');
+
+// Pagination, filtering, sorting and search state
+let currentPage = 1;
+let rowsPerPage = 20;
+let currentFilter = 'all';
+let currentSort = null;
+let sortDescending = false;
+let searchMatches = null;
+let visibleRows = [];
+let shownRows = [];
+
+function lowerBound(keys, query) {
+    let low = 0;
+    let high = keys.length;
+    while (low < high) {
+        const mid = (low + high) >>> 1;
+        if (keys[mid] < query) {
+            low = mid + 1;
+        } else {
+            high = mid;
+        }
+    }
+    return low;
+}
+
+function searchRows(query) {
+    const matches = new Uint8Array(allRows.length);
+    Object.values(SEARCH_INDEX).forEach(index => {
+        for (let i = lowerBound(index.keys, query); i < index.keys.length && index.keys[i].startsWith(query); i++) {
+            matches[index.rows[i]] = 1;
+        }
+    });
+    return matches;
+}
+
+function applyView() {
+    const order = currentSort ? SORT_PERMUTATIONS[currentSort] : null;
+    const totalRows = allRows.length;
+    visibleRows = [];
+
+    for (let i = 0; i < totalRows; i++) {
+        const position = sortDescending ? totalRows - 1 - i : i;
+        const rowIndex = order ? order[position] : position;
+        const row = allRows[rowIndex];
+        if ((currentFilter === 'all' || row.dataset.status === currentFilter) &&
+            (searchMatches === null || searchMatches[rowIndex])) {
+            visibleRows.push(row);
+        }
+    }
+
+    updatePagination();
+}
+
+function filterTable(status) {
+    currentFilter = status;
+    currentPage = 1;
+
+    // Update filter buttons
+    document.querySelectorAll('.filter-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    document.querySelector(`[data-filter="${status}"]`).classList.add('active');
+
+    applyView();
+}
+
+function sortTable(column) {
+    if (currentSort === column) {
+        sortDescending = !sortDescending;
+    } else {
+        currentSort = column;
+        sortDescending = false;
+    }
+    currentPage = 1;
+
+    // Update sort indicators
+    document.querySelectorAll('th.sortable').forEach(th => {
+        th.querySelector('.sort-indicator').textContent =
+            th.dataset.sort === currentSort ? (sortDescending ? '▼' : '▲') : '';
+    });
+
+    applyView();
+}
+
+function updatePagination() {
+    const totalRows = visibleRows.length;
+    const totalPages = Math.ceil(totalRows / rowsPerPage);
+
+    // Hide the previously shown page
+    shownRows.forEach(row => row.style.display = 'none');
+
+    // Show current page rows, moved to the end of the table body so
+    // they appear in the current sort order
+    const startIndex = (currentPage - 1) * rowsPerPage;
+    const endIndex = startIndex + rowsPerPage;
+    shownRows = visibleRows.slice(startIndex, endIndex);
+
+    const fragment = document.createDocumentFragment();
+    shownRows.forEach(row => {
+        row.style.display = '';
+        fragment.appendChild(row);
+    });
+    tableBody.appendChild(fragment);
+
+    // Update pagination info
+    document.getElementById('page-info').textContent = totalRows === 0
+        ? 'Showing 0 of 0 records'
+        : `Showing ${startIndex + 1}-${Math.min(endIndex, totalRows)} of ${totalRows} records`;
+
+    // Update pagination buttons
+    document.getElementById('prev-btn').disabled = currentPage === 1;
+    document.getElementById('next-btn').disabled = currentPage === totalPages || totalPages === 0;
+
+    // Update page numbers
+    const pageNumbers = document.getElementById('page-numbers');
+    pageNumbers.innerHTML = '';
+
+    for (let i = 1; i <= totalPages; i++) {
+        if (i === currentPage || i === 1 || i === totalPages || 
+            (i >= currentPage - 1 && i <= currentPage + 1)) {
+            const btn = document.createElement('button');
+            btn.textContent = i;
+            btn.onclick = () => { currentPage = i; updatePagination(); };
+            if (i === currentPage) {
+                btn.style.background = '#007bff';
+                btn.style.color = 'white';
+            }
+            pageNumbers.appendChild(btn);
+        } else if ((i === currentPage - 2 || i === currentPage + 2) && totalPages > 5) {
+            const span = document.createElement('span');
+            span.textContent = '...';
+            span.style.padding = '0.5rem';
+            pageNumbers.appendChild(span);
+        }
+    }
+}
+
+function changePage(direction) {
+    const totalPages = Math.ceil(visibleRows.length / rowsPerPage);
+
+    currentPage += direction;
+    if (currentPage > totalPages) currentPage = totalPages;
+    if (currentPage < 1) currentPage = 1;
+
+    updatePagination();
+}
+
+// Add filter button event listeners
+document.querySelectorAll('.filter-btn').forEach(btn => {
+    btn.addEventListener('click', () => {
+        filterTable(btn.dataset.filter);
+    });
+});
+
+// Add sortable column header event listeners
+document.querySelectorAll('th.sortable').forEach(th => {
+    th.addEventListener('click', () => {
+        sortTable(th.dataset.sort);
+    });
+});
+
+// Search by claim_id or patient_id prefix
+document.getElementById('search-input').addEventListener('input', event => {
+    const query = event.target.value.trim().toUpperCase();
+    searchMatches = query === '' ? null : searchRows(query);
+    currentPage = 1;
+    applyView();
+});
+
+// Drill-downs pick one grouping set of the precomputed cube and filter its
+// cells, so they never touch the claim rows
+const drillFormat = new Intl.NumberFormat('en-US', { style: 'currency', currency: 'USD' });
+const drillSelects = {
+    dimension: document.getElementById('drill-dimension'),
+    reconciliation_status: document.getElementById('drill-status'),
+    type_of_bill: document.getElementById('drill-bill-type'),
+};
+
+function renderDrillDown() {
+    const dimension = drillSelects.dimension.value;
+    const filters = ['reconciliation_status', 'type_of_bill']
+        .map(column => [column, drillSelects[column].value])
+        .filter(([, value]) => value !== 'all');
+    let groupingId = CUBE.dimension_bits[dimension];
+    filters.forEach(([column]) => groupingId |= CUBE.dimension_bits[column]);
+
+    const cells = CUBE.cells;
+    const formatAmount = amount => amount === null ? '—' : drillFormat.format(amount);
+    let html = '';
+    for (let i = 0; i < cells.grouping_id.length; i++) {
+        if (cells.grouping_id[i] !== groupingId) continue;
+        if (filters.some(([column, value]) => cells[column][i] !== value)) continue;
+        html += `<tr><td>${cells[dimension][i]}</td>`
+            + `<td>${cells.claims[i].toLocaleString()}</td>`
+            + `<td>${cells.invoices[i].toLocaleString()}</td>`
+            + `<td>${formatAmount(cells.benefit_amount[i])}</td>`
+            + `<td>${formatAmount(cells.paid_amount[i])}</td>`
+            + `<td>${formatAmount(cells.overpaid_amount[i])}</td>`
+            + `<td>${formatAmount(cells.underpaid_amount[i])}</td></tr>`;
+    }
+    document.getElementById('drill-down-body').innerHTML =
+        html || '<tr><td colspan="7">No claims to show</td></tr>';
+}
+
+Object.values(drillSelects).forEach(select => {
+    select.addEventListener('change', renderDrillDown);
+});
+
+// Initialize the table view and the drill-down
+applyView();
+renderDrillDown();
+"""
+
+
+def report_asset_file_names() -> Dict[str, str]:
+    # Content-hashed names, so a changed stylesheet or script never collides
+    # with the copy an older report links to and both can be cached forever
+    return {
+        "css": f"{REPORT_ASSET_NAME}.{_content_hash(REPORT_CSS)}.css",
+        "js": f"{REPORT_ASSET_NAME}.{_content_hash(REPORT_JS)}.js",
+    }
+
+
+def _content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+
+
+def write_report_assets(assets_dir: str) -> Dict[str, str]:
+    absolute_assets_dir = os.path.join(get_project_root(), assets_dir)
+    os.makedirs(absolute_assets_dir, exist_ok=True)
+
+    asset_paths = {}
+    for asset_type, file_name in report_asset_file_names().items():
+        asset_path = os.path.join(absolute_assets_dir, file_name)
+        # The hash covers the content, so an existing file is already current;
+        # concurrent writers each replace it atomically with identical bytes
+        if not os.path.exists(asset_path):
+            temp_path = f"{asset_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(REPORT_CSS if asset_type == "css" else REPORT_JS)
+            os.replace(temp_path, asset_path)
+        asset_paths[asset_type] = asset_path
+
+    return asset_paths
@@ -1,11 +1,35 @@
 import base64
+import gzip
+import html
+import json
 import os
+import re
+from functools import lru_cache
 from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import polars as pl
 
+try:
+    import brotli
+except ImportError:  # brotli-compressed reports are optional
+    brotli = None
+
+from constants import (
+    BILL_TYPE_COLUMN_PREFIXES,
+    CUBE_DIMENSIONS,
+    INVOICE_MATCH_METHODS,
+    RECONCILIATION_STATUSES,
+    REPORT_COMPRESSION_SUFFIXES,
+)
+from processing import build_aggregate_cube
 from utils import get_project_root, ensure_directory_exists
+from .report_assets import REPORT_CSS, REPORT_JS
+
+REPORT_GZIP_LEVEL = 6
+REPORT_BROTLI_QUALITY = 9
 
 
 def create_pie_chart(analysis_data: dict) -> str:
@@ -17,24 +41,49 @@ def create_pie_chart(analysis_data: dict) -> str:
     ]
     colors = ["#28a745", "#dc3545", "#ffc107"]  # Green, Red, Yellow
 
-    plt.figure(figsize=(5, 3.5))
-    plt.pie(sizes, labels=labels, colors=colors, autopct="%1.1f%%", startangle=90)
-    plt.title(
+    # Use the object-oriented API rather than pyplot so that charts can be
+    # rendered concurrently from several threads without sharing global state
+    figure = Figure(figsize=(5, 3.5))
+    ax = figure.subplots()
+    ax.pie(sizes, labels=labels, colors=colors, autopct="%1.1f%%", startangle=90)
+    ax.set_title(
         "Claims Reconciliation Status Distribution", fontsize=12, fontweight="bold"
     )
-    plt.axis("equal")
+    ax.axis("equal")
 
     # Convert to base64 string
     buffer = BytesIO()
-    plt.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
-    plt.close()
+    figure.savefig(buffer, format="png", dpi=150, bbox_inches="tight")
 
     image_base64 = base64.b64encode(buffer.getvalue()).decode()
     return f"data:image/png;base64,{image_base64}"
 
 
 def format_currency(amount: float) -> str:
-    return f"${amount:,.2f}"
+    # Sign before the dollar sign, and no "-$0.00" for amounts that round to zero
+    amount = round(amount, 2) + 0.0
+    return f"-${-amount:,.2f}" if amount < 0 else f"${amount:,.2f}"
+
+
+def format_patient(patient_id: int, patient_name: Optional[str] = None) -> str:
+    # Names come from the patients file, so they are escaped before reaching HTML
+    if not patient_name:
+        return str(patient_id)
+    return f"{patient_id} · {html.escape(patient_name)}"
+
+
+def generate_bill_type_cards(analysis_data: dict) -> str:
+    return "".join(
+        f"""
+                    <div class="summary-card total">
+                        <h3>💵 {bill_type.title()} Payments</h3>
+                        <div class="number">{breakdown['count']:,}</div>
+                        <div class="percentage">invoices ({breakdown['percentage']}% of paid dollars)</div>
+                        <div class="amount">{format_currency(breakdown['amount'])}</div>
+                    </div>
+        """
+        for bill_type, breakdown in sorted(analysis_data["bill_types"].items())
+    )
 
 
 def generate_summary_section(analysis_data: dict, chart_image: str) -> str:
@@ -76,6 +125,10 @@ def generate_summary_section(analysis_data: dict, chart_image: str) -> str:
                         <div class="amount">{format_currency(analysis_data['total_overpaid_and_underpaid_claims']['amount'])}</div>
                     </div>
                 </div>
+                
+                <div class="summary-grid">
+                    {generate_bill_type_cards(analysis_data)}
+                </div>
             </div>
             
             <div class="chart-container">
@@ -86,18 +139,418 @@ def generate_summary_section(analysis_data: dict, chart_image: str) -> str:
     """
 
 
+def _generate_analysis_table(headers: list, rows: list) -> str:
+    header_cells = "".join(f"<th>{header}</th>" for header in headers)
+    body_rows = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows
+    )
+    if not rows:
+        body_rows = f'<tr><td colspan="{len(headers)}">No claims to show</td></tr>'
+
+    return f"""
+            <div class="analysis-table">
+                <table>
+                    <thead><tr>{header_cells}</tr></thead>
+                    <tbody>{body_rows}</tbody>
+                </table>
+            </div>
+    """
+
+
+def generate_top_discrepancies_section(analysis_data: dict) -> str:
+    claim_headers = [
+        "Claim ID",
+        "Patient ID",
+        "Benefit Amount",
+        "Transaction Total",
+        "Discrepancy",
+    ]
+
+    def claim_rows(claims: list) -> list:
+        return [
+            [
+                claim["claim_id"],
+                claim["patient_id"],
+                format_currency(claim["benefit_amount"]),
+                format_currency(claim["total_transaction_value"]),
+                format_currency(claim["discrepancy_amount"]),
+            ]
+            for claim in claims
+        ]
+
+    patient_rows = [
+        [
+            format_patient(patient["patient_id"], patient.get("patient_name")),
+            f"{patient['discrepant_claims']:,}",
+            format_currency(patient["overpaid_amount"]),
+            format_currency(patient["underpaid_amount"]),
+            format_currency(patient["discrepancy_amount"]),
+        ]
+        for patient in analysis_data["top_patients"]
+    ]
+
+    patients = analysis_data.get("patients")
+    patient_cards = (
+        f"""
+                <div class="summary-card total">
+                    <h3>👤 Patients</h3>
+                    <div class="number">{patients['total_patients']:,}</div>
+                </div>
+                <div class="summary-card issues">
+                    <h3>Patients with Discrepancies</h3>
+                    <div class="number">{patients['with_discrepancies']:,}</div>
+                </div>
+        """
+        if patients
+        else ""
+    )
+
+    pareto_cards = "".join(
+        f"""
+                <div class="summary-card issues">
+                    <h3>Top {entry['claim_percentage']}% of claims ({entry['claim_count']:,})</h3>
+                    <div class="number">{entry['amount_percentage']}%</div>
+                    <div class="amount">{format_currency(entry['amount'])}</div>
+                </div>
+        """
+        for entry in analysis_data["pareto"]
+    )
+
+    return f"""
+    <div class="summary-section">
+        <h2>🎯 Discrepancy Concentration</h2>
+        <div class="summary-grid">
+            {pareto_cards}
+        </div>
+        <div class="analysis-grid">
+            <div>
+                <h3>⬆️ Top {len(analysis_data['top_overpaid_claims'])} Overpaid Claims</h3>
+                {_generate_analysis_table(claim_headers, claim_rows(analysis_data['top_overpaid_claims']))}
+            </div>
+            <div>
+                <h3>⬇️ Top {len(analysis_data['top_underpaid_claims'])} Underpaid Claims</h3>
+                {_generate_analysis_table(claim_headers, claim_rows(analysis_data['top_underpaid_claims']))}
+            </div>
+        </div>
+        <h3>👤 Top Patients by Cumulative Discrepancy</h3>
+        <div class="summary-grid">
+            {patient_cards}
+        </div>
+        {_generate_analysis_table(["Patient", "Discrepant Claims", "Overpaid", "Underpaid", "Total Discrepancy"], patient_rows)}
+    </div>
+    """
+
+
+def generate_duplicate_payments_section(analysis_data: dict) -> str:
+    duplicates = analysis_data.get("duplicate_payments")
+    if duplicates is None:
+        return ""
+
+    window_label = (
+        "same transaction date"
+        if duplicates["date_window_days"] == 0
+        else f"within {duplicates['date_window_days']} days"
+    )
+    claim_rows = [
+        [
+            claim["claim_id"],
+            claim["patient_id"],
+            f"{claim['duplicate_invoices']:,}",
+            format_currency(claim["duplicate_amount"]),
+            format_currency(claim["overpaid_amount"]),
+            format_currency(claim["explained_overpaid_amount"]),
+        ]
+        for claim in duplicates["top_claims"]
+    ]
+
+    return f"""
+    <div class="summary-section">
+        <h2>🔁 Duplicate Payments</h2>
+        <p class="section-note">Invoices repeating the claim, amount and bill type of an earlier invoice ({window_label})</p>
+        <div class="summary-grid">
+            <div class="summary-card total">
+                <h3>Duplicate Invoices</h3>
+                <div class="number">{duplicates['count']:,}</div>
+                <div class="percentage">across {duplicates['claims']:,} claims</div>
+            </div>
+            <div class="summary-card overpaid">
+                <h3>Duplicated Dollars</h3>
+                <div class="amount">{format_currency(duplicates['amount'])}</div>
+            </div>
+            <div class="summary-card issues">
+                <h3>Overpayment Explained</h3>
+                <div class="number">{duplicates['explained_overpaid_percentage']}%</div>
+                <div class="amount">{format_currency(duplicates['explained_overpaid_amount'])}</div>
+            </div>
+        </div>
+        <h3>Claims with the Most Duplicated Dollars</h3>
+        {_generate_analysis_table(["Claim ID", "Patient ID", "Duplicate Invoices", "Duplicated", "Overpaid", "Explained"], claim_rows)}
+    </div>
+    """
+
+
+def generate_invoice_matching_section(analysis_data: dict) -> str:
+    matching = analysis_data.get("invoice_matching")
+    if matching is None:
+        return ""
+
+    method_rows = [
+        [
+            method["method"].replace("_", " + "),
+            f"{method['invoices']:,}",
+            format_currency(method["amount"]),
+            (
+                "n/a"
+                if method["avg_confidence"] is None
+                else f"{method['avg_confidence']:.3f}"
+            ),
+        ]
+        for method in matching["methods"]
+    ]
+    fuzzy_invoices = sum(
+        method["invoices"]
+        for method in matching["methods"]
+        if method["method"] != INVOICE_MATCH_METHODS["EXACT"]
+    )
+
+    return f"""
+    <div class="summary-section">
+        <h2>🧩 Invoice Matching</h2>
+        <p class="section-note">Invoices with a missing or unknown claim_id, matched to a claim of the same patient by payment date and amount</p>
+        <div class="summary-grid">
+            <div class="summary-card balanced">
+                <h3>Fuzzy Matched</h3>
+                <div class="number">{fuzzy_invoices:,}</div>
+            </div>
+            <div class="summary-card issues">
+                <h3>Still Unmatched</h3>
+                <div class="number">{matching['unmatched_invoices']:,}</div>
+                <div class="amount">{format_currency(matching['unmatched_amount'])}</div>
+            </div>
+        </div>
+        {_generate_analysis_table(["Match", "Invoices", "Amount", "Avg. Confidence"], method_rows)}
+    </div>
+    """
+
+
+def generate_aging_section(analysis_data: dict) -> str:
+    aging = analysis_data.get("aging")
+    if aging is None:
+        return ""
+
+    bucket_rows = [
+        [
+            f"{bucket['bucket']} days",
+            f"{bucket['claims']:,}",
+            f"{bucket['unpaid_claims']:,}",
+            format_currency(bucket["balance"]),
+            f'<div class="share-bar" style="width: {bucket["percentage"]}%"></div>'
+            f"{bucket['percentage']}%",
+        ]
+        for bucket in aging["buckets"]
+    ]
+    payment_rows = [
+        [
+            f"{bucket['bucket']} days",
+            f"{bucket['invoices']:,}",
+            format_currency(bucket["amount"]),
+            f'<div class="share-bar" style="width: {bucket["percentage"]}%"></div>'
+            f"{bucket['percentage']}%",
+        ]
+        for bucket in aging["payment_buckets"]
+    ]
+    monthly_rows = [
+        [
+            month["service_month"],
+            f"{month['claims']:,}",
+            format_currency(month["benefit_amount"]),
+            format_currency(month["paid_amount"]),
+            format_currency(month["overpaid_amount"]),
+            format_currency(month["underpaid_amount"]),
+            format_currency(month["net_discrepancy"]),
+        ]
+        for month in aging["monthly"]
+    ]
+
+    def format_days(days) -> str:
+        return "n/a" if days is None else f"{days:,.1f} days"
+
+    return f"""
+    <div class="summary-section">
+        <h2>⏳ Payment Aging</h2>
+        <p class="section-note">Outstanding balances aged from the date of service as of {aging['as_of_date']}</p>
+        <div class="summary-grid">
+            <div class="summary-card underpaid">
+                <h3>Outstanding Balance</h3>
+                <div class="amount">{format_currency(aging['total_balance'])}</div>
+            </div>
+            <div class="summary-card total">
+                <h3>Average Time to Payment</h3>
+                <div class="amount">{format_days(aging['avg_days_to_payment'])}</div>
+            </div>
+            <div class="summary-card total">
+                <h3>Average Time to Last Payment</h3>
+                <div class="amount">{format_days(aging['avg_days_to_last_payment'])}</div>
+            </div>
+        </div>
+        <h3>Outstanding Balance by Age</h3>
+        {_generate_analysis_table(["Age", "Claims with Balance", "Unpaid Claims", "Balance", "Share"], bucket_rows)}
+        <h3>Payments by Time from Service</h3>
+        {_generate_analysis_table(["Paid After", "Invoices", "Paid", "Share"], payment_rows)}
+        <h3>Discrepancies by Service Month</h3>
+        {_generate_analysis_table(["Service Month", "Claims", "Benefit", "Paid", "Overpaid", "Underpaid", "Net Discrepancy"], monthly_rows)}
+    </div>
+    """
+
+
+def generate_drill_down_section() -> str:
+    status_options = "".join(
+        f'<option value="{status}">{status.title()}</option>'
+        for status in RECONCILIATION_STATUSES.values()
+    )
+    bill_type_options = "".join(
+        f'<option value="{bill_type}">{bill_type.title()}</option>'
+        for bill_type in BILL_TYPE_COLUMN_PREFIXES
+    )
+    headers = [
+        "Value",
+        "Claims",
+        "Invoices",
+        "Benefit",
+        "Paid",
+        "Overpaid",
+        "Underpaid",
+    ]
+    header_cells = "".join(f"<th>{header}</th>" for header in headers)
+
+    return f"""
+    <div class="summary-section">
+        <h2>🧊 Drill-Down</h2>
+        <p class="section-note">Totals are read from the precomputed aggregate cube; benefit and discrepancies cannot be split by bill type</p>
+        <div class="controls">
+            <div class="filter-group">
+                <label for="drill-dimension">Break down by:</label>
+                <select id="drill-dimension" class="search-input">
+                    <option value="service_month">Service Month</option>
+                    <option value="reconciliation_status">Status</option>
+                    <option value="type_of_bill">Bill Type</option>
+                </select>
+            </div>
+            <div class="filter-group">
+                <label for="drill-status">Status:</label>
+                <select id="drill-status" class="search-input">
+                    <option value="all">All</option>{status_options}
+                </select>
+            </div>
+            <div class="filter-group">
+                <label for="drill-bill-type">Bill Type:</label>
+                <select id="drill-bill-type" class="search-input">
+                    <option value="all">All</option>{bill_type_options}
+                </select>
+            </div>
+        </div>
+        <div class="analysis-table">
+            <table>
+                <thead><tr>{header_cells}</tr></thead>
+                <tbody id="drill-down-body"></tbody>
+            </table>
+        </div>
+    </div>
+    """
+
+
+def generate_cube_cells(cube_df: pl.DataFrame) -> dict:
+    # Only the grouping sets without patient_id are embedded: they stay small
+    # however many claims there are, and cover every drill-down in the report
+    patient_bit = 1 << CUBE_DIMENSIONS.index("patient_id")
+    cells_df = (
+        cube_df.filter((pl.col("grouping_id") & patient_bit) == 0)
+        .drop("patient_id")
+        .with_columns(pl.col("service_month").dt.strftime("%Y-%m"))
+    )
+    return {
+        "dimension_bits": {
+            dimension: 1 << index for index, dimension in enumerate(CUBE_DIMENSIONS)
+        },
+        "cells": cells_df.to_dict(as_series=False),
+    }
+
+
+def generate_run_diff_section(analysis_data: dict) -> str:
+    run_diff = analysis_data.get("run_diff")
+    if run_diff is None:
+        return ""
+
+    def format_delta(amount: float) -> str:
+        sign = "+" if amount > 0 else "-" if amount < 0 else ""
+        return f"{sign}{format_currency(abs(amount))}"
+
+    change_types = run_diff["change_types"]
+    change_type_rows = [
+        [
+            change_type.replace("_", " ").title(),
+            f"{change['claims']:,}",
+            format_delta(change["dollar_delta"]),
+        ]
+        for change_type, change in change_types.items()
+    ]
+    change_rows = [
+        [
+            change["claim_id"],
+            change["change_type"].replace("_", " ").title(),
+            change["previous_status"] or "—",
+            change["current_status"] or "—",
+            format_delta(change["dollar_delta"]),
+        ]
+        for change in run_diff["top_changes"]
+    ]
+
+    return f"""
+    <div class="summary-section">
+        <h2>🔀 Changes Since the Previous Run</h2>
+        <p class="section-note">Claims whose paid total or reconciliation status differs from the previous run</p>
+        <div class="summary-grid">
+            <div class="summary-card total">
+                <h3>New Claims</h3>
+                <div class="number">{change_types['NEW']['claims']:,}</div>
+            </div>
+            <div class="summary-card balanced">
+                <h3>Resolved</h3>
+                <div class="number">{change_types['RESOLVED']['claims']:,}</div>
+            </div>
+            <div class="summary-card issues">
+                <h3>Newly Discrepant</h3>
+                <div class="number">{change_types['NEWLY_DISCREPANT']['claims']:,}</div>
+            </div>
+            <div class="summary-card underpaid">
+                <h3>Net Paid Change</h3>
+                <div class="amount">{format_delta(run_diff['net_dollar_delta'])}</div>
+                <div class="percentage">across {run_diff['changed_claims']:,} changed claims</div>
+            </div>
+        </div>
+        {_generate_analysis_table(["Change", "Claims", "Paid Change"], change_type_rows)}
+        <h3>Largest Changes</h3>
+        {_generate_analysis_table(["Claim ID", "Change", "Previous Status", "Current Status", "Paid Change"], change_rows)}
+    </div>
+    """
+
+
 def generate_table_data(reconciled_df: pl.DataFrame) -> str:
     rows = []
     for row in reconciled_df.iter_rows(named=True):
         status_class = row["reconciliation_status"].lower()
+        discrepancy = row["total_transaction_value"] - row["benefit_amount"]
         rows.append(
             f"""
             <tr class="table-row {status_class}" data-status="{row['reconciliation_status']}">
                 <td>{row['claim_id']}</td>
-                <td>{row['patient_id']}</td>
+                <td>{format_patient(row['patient_id'], row.get('patient_name'))}</td>
                 <td>{format_currency(row['charges_amount'])}</td>
                 <td>{format_currency(row['benefit_amount'])}</td>
+                <td>{format_currency(row['fee_total'])}</td>
+                <td>{format_currency(row['procedure_payment_total'])}</td>
                 <td>{format_currency(row['total_transaction_value'])}</td>
+                <td>{format_currency(discrepancy)}</td>
                 <td><span class="status-badge {status_class}">{row['reconciliation_status']}</span></td>
             </tr>
         """
@@ -105,287 +558,78 @@ def generate_table_data(reconciled_df: pl.DataFrame) -> str:
     return "".join(rows)
 
 
-def generate_html_report(
-    reconciled_df: pl.DataFrame, analysis_data: dict, chart_image: str
-) -> str:
-    table_rows = generate_table_data(reconciled_df)
-    summary_section = generate_summary_section(analysis_data, chart_image)
+SORTABLE_COLUMNS = {
+    "charges_amount": pl.col("charges_amount"),
+    "benefit_amount": pl.col("benefit_amount"),
+    "total_transaction_value": pl.col("total_transaction_value"),
+    "discrepancy": pl.col("total_transaction_value") - pl.col("benefit_amount"),
+}
+
+SEARCHABLE_COLUMNS = ["claim_id", "patient_id", "patient_name"]
+
+
+def generate_sort_permutations(reconciled_df: pl.DataFrame) -> dict:
+    # Ascending row order for every sortable column, computed once here so the
+    # browser only has to walk a precomputed array (backwards for descending)
+    permutations = reconciled_df.select(
+        [
+            pl.int_range(pl.len(), dtype=pl.UInt32)
+            .sort_by(expr, maintain_order=True)
+            .alias(name)
+            for name, expr in SORTABLE_COLUMNS.items()
+        ]
+    )
+    return {name: permutations[name].to_list() for name in SORTABLE_COLUMNS}
+
+
+def generate_search_index(reconciled_df: pl.DataFrame) -> dict:
+    # Keys sorted lexicographically alongside their row numbers, so a prefix
+    # search is a binary search for the first match followed by a short scan
+    index = {}
+    for column in SEARCHABLE_COLUMNS:
+        if column not in reconciled_df.columns:
+            continue
+
+        sorted_keys = (
+            reconciled_df.select(
+                pl.col(column).cast(pl.Utf8).str.to_uppercase().alias("key"),
+                pl.int_range(pl.len(), dtype=pl.UInt32).alias("row"),
+            )
+            .drop_nulls("key")
+            .sort("key", maintain_order=True)
+        )
+        index[column] = {
+            "keys": sorted_keys["key"].to_list(),
+            "rows": sorted_keys["row"].to_list(),
+        }
+    return index
 
-    html_content = f"""
+
+def _to_script_json(data: dict) -> str:
+    # Prevent a "</script>" sequence inside the data from closing the tag
+    return json.dumps(data, separators=(",", ":")).replace("</", "<\\/")
+
+
+def generate_table_section_data(reconciled_df: pl.DataFrame) -> dict:
+    # Everything the claims table needs from the reconciled frame; independent
+    # of the analysis, so it can be rendered alongside the chart
+    return {
+        "table_rows": generate_table_data(reconciled_df),
+        "sort_permutations": _to_script_json(generate_sort_permutations(reconciled_df)),
+        "search_index": _to_script_json(generate_search_index(reconciled_df)),
+    }
+
+
+# Static markup with $slot placeholders; the stylesheet and the table script
+# are either inlined or linked as shared assets through $styles and $scripts
+REPORT_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Insurance Reconciliation Report</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background-color: #f8f9fa;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 15px;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 2rem;
-            border-radius: 10px;
-            margin-bottom: 2rem;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5rem;
-            margin-bottom: 0.5rem;
-        }}
-        
-        .header p {{
-            font-size: 1.1rem;
-            opacity: 0.9;
-        }}
-        
-        
-        .summary-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-            gap: 1rem;
-            margin-top: 1rem;
-        }}
-        
-        .summary-card {{
-            padding: 1.5rem;
-            border-radius: 8px;
-            text-align: center;
-            border-left: 4px solid;
-        }}
-        
-        .summary-card.total {{ background: #e8f4fd; border-color: #007bff; }}
-        .summary-card.balanced {{ background: #e8f5e8; border-color: #28a745; }}
-        .summary-card.overpaid {{ background: #fdeaea; border-color: #dc3545; }}
-        .summary-card.underpaid {{ background: #fff3cd; border-color: #ffc107; }}
-        .summary-card.issues {{ background: #f8d7da; border-color: #dc3545; }}
-        
-        .summary-card h3 {{
-            font-size: 0.9rem;
-            color: #666;
-            margin-bottom: 0.5rem;
-        }}
-        
-        .summary-card .number {{
-            font-size: 2rem;
-            font-weight: bold;
-            color: #333;
-        }}
-        
-        .summary-card .percentage {{
-            font-size: 0.9rem;
-            color: #666;
-        }}
-        
-        .summary-card .amount {{
-            font-size: 1.1rem;
-            font-weight: bold;
-            color: #444;
-            margin-top: 0.25rem;
-        }}
-        
-        .summary-section {{
-            background: white;
-            padding: 1.5rem;
-            border-radius: 10px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            margin-bottom: 1.5rem;
-        }}
-        
-        .summary-section h2 {{
-            text-align: center;
-            margin-bottom: 2rem;
-            color: #333;
-        }}
-        
-        .summary-content {{
-            display: flex;
-            flex-direction: column;
-            gap: 2rem;
-            align-items: center;
-        }}
-        
-        .summary-cards {{
-            width: 100%;
-        }}
-        
-        .summary-grid {{
-            width: 100%;
-            max-width: 1000px;
-            margin: 0 auto;
-        }}
-        
-        .chart-container {{
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-            align-items: center;
-            text-align: center;
-        }}
-        
-        .chart-container h2 {{
-            margin-bottom: 1rem;
-        }}
-        
-        .chart-container img {{
-            max-width: 70%;
-            height: auto;
-        }}
-        
-        .table-section {{
-            background: white;
-            border-radius: 10px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-        }}
-        
-        .table-header {{
-            padding: 1rem;
-            border-bottom: 1px solid #dee2e6;
-        }}
-        
-        .controls {{
-            display: flex;
-            gap: 1rem;
-            margin-bottom: 1rem;
-            flex-wrap: wrap;
-        }}
-        
-        .filter-group {{
-            display: flex;
-            align-items: center;
-            gap: 0.5rem;
-        }}
-        
-        .filter-btn {{
-            padding: 0.5rem 1rem;
-            border: 2px solid #dee2e6;
-            background: white;
-            border-radius: 6px;
-            cursor: pointer;
-            transition: all 0.3s;
-        }}
-        
-        .filter-btn.active {{
-            background: #007bff;
-            color: white;
-            border-color: #007bff;
-        }}
-        
-        .pagination {{
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            margin: 1rem 0.5rem 1.5rem 0.5rem;
-            padding: 0.5rem;
-        }}
-        
-        .page-info {{
-            color: #666;
-        }}
-        
-        .page-controls button {{
-            padding: 0.5rem 1rem;
-            border: 1px solid #dee2e6;
-            background: white;
-            cursor: pointer;
-            margin: 0 0.25rem;
-            border-radius: 4px;
-        }}
-        
-        .page-controls button:hover {{
-            background: #f8f9fa;
-        }}
-        
-        .page-controls button:disabled {{
-            opacity: 0.5;
-            cursor: not-allowed;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        
-        th {{
-            background: #f8f9fa;
-            padding: 0.75rem;
-            text-align: left;
-            border-bottom: 2px solid #dee2e6;
-            font-weight: 600;
-            font-size: 0.9rem;
-        }}
-        
-        td {{
-            padding: 0.5rem 0.75rem;
-            border-bottom: 1px solid #dee2e6;
-            font-size: 0.9rem;
-        }}
-        
-        .table-row:hover {{
-            background-color: #f8f9fa;
-        }}
-        
-        .status-badge {{
-            padding: 0.25rem 0.75rem;
-            border-radius: 20px;
-            font-size: 0.85rem;
-            font-weight: 600;
-        }}
-        
-        .status-badge.balanced {{
-            background: #d4edda;
-            color: #155724;
-        }}
-        
-        .status-badge.overpaid {{
-            background: #f8d7da;
-            color: #721c24;
-        }}
-        
-        .status-badge.underpaid {{
-            background: #fff3cd;
-            color: #856404;
-        }}
-        
-        .hidden {{
-            display: none !important;
-        }}
-        
-        /* Responsive design for smaller screens */
-        @media (max-width: 768px) {{
-            .summary-content {{
-                gap: 1rem;
-            }}
-            
-            .container {{
-                padding: 10px;
-            }}
-            
-            .summary-grid {{
-                grid-template-columns: repeat(auto-fit, minmax(140px, 1fr));
-                gap: 0.5rem;
-                max-width: 100%;
-            }}
-        }}
-    </style>
+    $styles
 </head>
 <body>
     <div class="container">
@@ -396,7 +640,25 @@ def generate_html_report(
         </div>
         
         <!-- Unified Summary and Chart Section -->
-        {summary_section}
+        $summary_section
+        
+        <!-- Top Discrepancies and Pareto Analysis -->
+        $top_discrepancies_section
+        
+        <!-- Invoice Matching -->
+        $invoice_matching_section
+        
+        <!-- Duplicate Payments -->
+        $duplicate_payments_section
+        
+        <!-- Payment Aging and Monthly Trends -->
+        $aging_section
+        
+        <!-- Drill-Down by Month, Status and Bill Type -->
+        $drill_down_section
+        
+        <!-- Changes Since the Previous Run -->
+        $run_diff_section
         
         <!-- Detailed Table -->
         <div class="table-section">
@@ -405,10 +667,14 @@ def generate_html_report(
                 <div class="controls">
                     <div class="filter-group">
                         <label>Filter by Status:</label>
-                        <button class="filter-btn active" data-filter="all">All ({analysis_data['total_claims']})</button>
-                        <button class="filter-btn" data-filter="BALANCED">Balanced ({analysis_data['balanced']['count']})</button>
-                        <button class="filter-btn" data-filter="OVERPAID">Overpaid ({analysis_data['overpaid']['count']})</button>
-                        <button class="filter-btn" data-filter="UNDERPAID">Underpaid ({analysis_data['underpaid']['count']})</button>
+                        <button class="filter-btn active" data-filter="all">All ($total_claims)</button>
+                        <button class="filter-btn" data-filter="BALANCED">Balanced ($balanced_count)</button>
+                        <button class="filter-btn" data-filter="OVERPAID">Overpaid ($overpaid_count)</button>
+                        <button class="filter-btn" data-filter="UNDERPAID">Underpaid ($underpaid_count)</button>
+                    </div>
+                    <div class="filter-group">
+                        <label for="search-input">Search:</label>
+                        <input type="search" id="search-input" class="search-input" placeholder="Claim ID, Patient ID or name prefix">
                     </div>
                 </div>
             </div>
@@ -418,15 +684,18 @@ def generate_html_report(
                     <thead>
                         <tr>
                             <th>Claim ID</th>
-                            <th>Patient ID</th>
-                            <th>Charges Amount</th>
-                            <th>Benefit Amount</th>
-                            <th>Transaction Total</th>
+                            <th>Patient</th>
+                            <th class="sortable" data-sort="charges_amount">Charges Amount<span class="sort-indicator"></span></th>
+                            <th class="sortable" data-sort="benefit_amount">Benefit Amount<span class="sort-indicator"></span></th>
+                            <th>Fees</th>
+                            <th>Procedure Payments</th>
+                            <th class="sortable" data-sort="total_transaction_value">Transaction Total<span class="sort-indicator"></span></th>
+                            <th class="sortable" data-sort="discrepancy">Discrepancy<span class="sort-indicator"></span></th>
                             <th>Status</th>
                         </tr>
                     </thead>
                     <tbody id="table-body">
-                        {table_rows}
+                        $table_rows
                     </tbody>
                 </table>
             </div>
@@ -442,124 +711,144 @@ def generate_html_report(
         </div>
     </div>
 
+
     <script>
-        // Pagination and filtering logic
-        let currentPage = 1;
-        let rowsPerPage = 20;
-        let currentFilter = 'all';
-        
-        function filterTable(status) {{
-            currentFilter = status;
-            currentPage = 1;
-            
-            // Update filter buttons
-            document.querySelectorAll('.filter-btn').forEach(btn => {{
-                btn.classList.remove('active');
-            }});
-            document.querySelector(`[data-filter="${{status}}"]`).classList.add('active');
-            
-            // Show/hide rows
-            const rows = document.querySelectorAll('.table-row');
-            rows.forEach(row => {{
-                if (status === 'all' || row.dataset.status === status) {{
-                    row.classList.remove('hidden');
-                }} else {{
-                    row.classList.add('hidden');
-                }}
-            }});
-            
-            updatePagination();
-        }}
-        
-        function updatePagination() {{
-            const visibleRows = document.querySelectorAll('.table-row:not(.hidden)');
-            const totalRows = visibleRows.length;
-            const totalPages = Math.ceil(totalRows / rowsPerPage);
-            
-            // Hide all rows first
-            visibleRows.forEach(row => row.style.display = 'none');
-            
-            // Show current page rows
-            const startIndex = (currentPage - 1) * rowsPerPage;
-            const endIndex = startIndex + rowsPerPage;
-            
-            for (let i = startIndex; i < endIndex && i < totalRows; i++) {{
-                if (visibleRows[i]) {{
-                    visibleRows[i].style.display = '';
-                }}
-            }}
-            
-            // Update pagination info
-            document.getElementById('page-info').textContent = 
-                `Showing ${{startIndex + 1}}-${{Math.min(endIndex, totalRows)}} of ${{totalRows}} records`;
-            
-            // Update pagination buttons
-            document.getElementById('prev-btn').disabled = currentPage === 1;
-            document.getElementById('next-btn').disabled = currentPage === totalPages || totalPages === 0;
-            
-            // Update page numbers
-            const pageNumbers = document.getElementById('page-numbers');
-            pageNumbers.innerHTML = '';
-            
-            for (let i = 1; i <= totalPages; i++) {{
-                if (i === currentPage || i === 1 || i === totalPages || 
-                    (i >= currentPage - 1 && i <= currentPage + 1)) {{
-                    const btn = document.createElement('button');
-                    btn.textContent = i;
-                    btn.onclick = () => {{ currentPage = i; updatePagination(); }};
-                    if (i === currentPage) {{
-                        btn.style.background = '#007bff';
-                        btn.style.color = 'white';
-                    }}
-                    pageNumbers.appendChild(btn);
-                }} else if ((i === currentPage - 2 || i === currentPage + 2) && totalPages > 5) {{
-                    const span = document.createElement('span');
-                    span.textContent = '...';
-                    span.style.padding = '0.5rem';
-                    pageNumbers.appendChild(span);
-                }}
-            }}
-        }}
-        
-        function changePage(direction) {{
-            const visibleRows = document.querySelectorAll('.table-row:not(.hidden)');
-            const totalPages = Math.ceil(visibleRows.length / rowsPerPage);
-            
-            currentPage += direction;
-            if (currentPage < 1) currentPage = 1;
-            if (currentPage > totalPages) currentPage = totalPages;
-            
-            updatePagination();
-        }}
-        
-        // Add filter button event listeners
-        document.querySelectorAll('.filter-btn').forEach(btn => {{
-            btn.addEventListener('click', () => {{
-                filterTable(btn.dataset.filter);
-            }});
-        }});
-        
-        // Initialize pagination
-        updatePagination();
+        // Row orders and the ID search index are precomputed when the report
+        // is generated, so sorting and searching never compare rows in the DOM
+        const SORT_PERMUTATIONS = $sort_permutations;
+        const SEARCH_INDEX = $search_index;
+        const CUBE = $cube_cells;
     </script>
+    $scripts
 </body>
 </html>
-    """
+"""
 
-    return html_content
+_TEMPLATE_SLOT_PATTERN = re.compile(r"\$([a-z_]+)")
 
 
-def generate_report(
-    reconciled_df: pl.DataFrame, analysis_data: dict, output_file_path: str
+@lru_cache(maxsize=16)
+def _compile_report_template(
+    styles: str, scripts: str
+) -> Tuple[Tuple[bytes, ...], Tuple[str, ...]]:
+    # Splits the template once into encoded static parts and the names of the
+    # data slots between them. The asset tags are folded into the static
+    # parts, so with inline assets the CSS and JS are encoded only once.
+    asset_tags = {"styles": styles, "scripts": scripts}
+    pieces = _TEMPLATE_SLOT_PATTERN.split(REPORT_TEMPLATE)
+    static_parts, slots = [pieces[0]], []
+    for slot, literal in zip(pieces[1::2], pieces[2::2]):
+        if slot in asset_tags:
+            static_parts[-1] += asset_tags[slot] + literal
+        else:
+            slots.append(slot)
+            static_parts.append(literal)
+    return tuple(part.encode("utf-8") for part in static_parts), tuple(slots)
+
+
+def _report_asset_tags(asset_urls: Optional[Dict[str, str]]) -> Tuple[str, str]:
+    if asset_urls is None:
+        return f"<style>\n{REPORT_CSS}\n</style>", f"<script>\n{REPORT_JS}\n</script>"
+    return (
+        f'<link rel="stylesheet" href="{asset_urls["css"]}">',
+        f'<script src="{asset_urls["js"]}"></script>',
+    )
+
+
+def render_html_report(
+    reconciled_df: pl.DataFrame,
+    analysis_data: dict,
+    chart_image: str,
+    table_section_data: Optional[dict] = None,
+    asset_urls: Optional[Dict[str, str]] = None,
+    cube_df: Optional[pl.DataFrame] = None,
+) -> bytes:
+    table_section_data = table_section_data or generate_table_section_data(
+        reconciled_df
+    )
+    if cube_df is None:
+        cube_df = build_aggregate_cube(reconciled_df)
+    slot_values = {
+        "summary_section": generate_summary_section(analysis_data, chart_image),
+        "top_discrepancies_section": generate_top_discrepancies_section(analysis_data),
+        "duplicate_payments_section": generate_duplicate_payments_section(
+            analysis_data
+        ),
+        "invoice_matching_section": generate_invoice_matching_section(analysis_data),
+        "aging_section": generate_aging_section(analysis_data),
+        "drill_down_section": generate_drill_down_section(),
+        "run_diff_section": generate_run_diff_section(analysis_data),
+        "total_claims": str(analysis_data["total_claims"]),
+        "balanced_count": str(analysis_data["balanced"]["count"]),
+        "overpaid_count": str(analysis_data["overpaid"]["count"]),
+        "underpaid_count": str(analysis_data["underpaid"]["count"]),
+        "table_rows": table_section_data["table_rows"],
+        "sort_permutations": table_section_data["sort_permutations"],
+        "search_index": table_section_data["search_index"],
+        "cube_cells": _to_script_json(generate_cube_cells(cube_df)),
+    }
+
+    static_parts, slots = _compile_report_template(*_report_asset_tags(asset_urls))
+    chunks = [static_parts[0]]
+    for slot, static_part in zip(slots, static_parts[1:]):
+        chunks.append(slot_values[slot].encode("utf-8"))
+        chunks.append(static_part)
+
+    return b"".join(chunks)
+
+
+def generate_html_report(
+    reconciled_df: pl.DataFrame,
+    analysis_data: dict,
+    chart_image: str,
+    table_section_data: Optional[dict] = None,
+    asset_urls: Optional[Dict[str, str]] = None,
+    cube_df: Optional[pl.DataFrame] = None,
 ) -> str:
+    return render_html_report(
+        reconciled_df,
+        analysis_data,
+        chart_image,
+        table_section_data,
+        asset_urls,
+        cube_df,
+    ).decode("utf-8")
+
+
+def compress_report(html_content: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        # A fixed mtime keeps the output identical for identical reports
+        return gzip.compress(html_content, compresslevel=REPORT_GZIP_LEVEL, mtime=0)
+    if brotli is None:
+        raise ImportError(
+            "Writing .br reports requires the brotli package (pip install brotli)"
+        )
+    return brotli.compress(
+        html_content, mode=brotli.MODE_TEXT, quality=REPORT_BROTLI_QUALITY
+    )
+
+
+def write_report(html_content: Union[str, bytes], output_file_path: str) -> str:
     project_root = get_project_root()
     absolute_output_path = os.path.join(project_root, output_file_path)
     ensure_directory_exists(absolute_output_path)
 
-    chart_image = create_pie_chart(analysis_data)
-    html_content = generate_html_report(reconciled_df, analysis_data, chart_image)
+    if isinstance(html_content, str):
+        html_content = html_content.encode("utf-8")
+    compression = REPORT_COMPRESSION_SUFFIXES.get(Path(output_file_path).suffix.lower())
+    if compression:
+        html_content = compress_report(html_content, compression)
 
-    with open(absolute_output_path, "w", encoding="utf-8") as f:
+    with open(absolute_output_path, "wb") as f:
         f.write(html_content)
 
     return absolute_output_path
+
+
+def generate_report(
+    reconciled_df: pl.DataFrame, analysis_data: dict, output_file_path: str
+) -> str:
+    chart_image = create_pie_chart(analysis_data)
+    html_content = render_html_report(reconciled_df, analysis_data, chart_image)
+
+    return write_report(html_content, output_file_path)
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from string import Template
+from typing import Optional
+
+import polars as pl
+
+from utils import get_project_root
+from .report_generator import format_currency, format_patient
+
+STATEMENT_FORMATS = {"html", "csv"}
+
+STATEMENT_CSS_FILE_NAME = "statement.css"
+
+# Patients are shipped to the workers in chunks, so each task amortises the
+# cost of pickling a frame over many small statements
+PATIENTS_PER_TASK = 500
+
+STATEMENT_COLUMNS = [
+    "claim_id",
+    "date_of_service",
+    "charges_amount",
+    "benefit_amount",
+    "total_transaction_value",
+    "reconciliation_status",
+]
+
+STATEMENT_CSS = """
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; color: #333; margin: 2rem; }
+h1 { font-size: 1.5rem; margin-bottom: 0.25rem; }
+.subtitle { color: #666; margin-bottom: 1.5rem; }
+.totals { display: flex; gap: 2rem; margin-bottom: 1.5rem; }
+.totals div { font-size: 0.9rem; color: #666; }
+.totals strong { display: block; font-size: 1.2rem; color: #333; }
+table { width: 100%; border-collapse: collapse; }
+th { background: #f8f9fa; text-align: left; padding: 0.5rem; border-bottom: 2px solid #dee2e6; }
+td { padding: 0.5rem; border-bottom: 1px solid #dee2e6; }
+.BALANCED { color: #155724; }
+.OVERPAID { color: #721c24; }
+.UNDERPAID { color: #856404; }
+""".strip()
+
+STATEMENT_TEMPLATE = Template(
+    """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Reconciliation Statement - Patient $patient_id</title>
+<link rel="stylesheet" href="$css_file_name">
+</head>
+<body>
+<h1>Reconciliation Statement</h1>
+<div class="subtitle">Patient $patient_label</div>
+<div class="totals">
+<div>Claims<strong>$claims</strong></div>
+<div>Benefit<strong>$benefit_amount</strong></div>
+<div>Paid<strong>$paid_amount</strong></div>
+<div>Net Discrepancy<strong>$net_discrepancy</strong></div>
+</div>
+<table>
+<thead><tr><th>Claim ID</th><th>Date of Service</th><th>Charges</th><th>Benefit</th><th>Paid</th><th>Status</th></tr></thead>
+<tbody>
+$rows
+</tbody>
+</table>
+</body>
+</html>
+"""
+)
+
+STATEMENT_ROW_TEMPLATE = Template(
+    "<tr><td>$claim_id</td><td>$date_of_service</td><td>$charges_amount</td>"
+    '<td>$benefit_amount</td><td>$total_transaction_value</td><td class="$status">$status</td></tr>'
+)
+
+
+def _render_statement_html(patient_df: pl.DataFrame) -> str:
+    first_row = patient_df.row(0, named=True)
+    patient_label = format_patient(
+        first_row["patient_id"], first_row.get("patient_name")
+    )
+
+    rows = "\n".join(
+        STATEMENT_ROW_TEMPLATE.substitute(
+            claim_id=row["claim_id"],
+            date_of_service=row["date_of_service"],
+            charges_amount=format_currency(row["charges_amount"]),
+            benefit_amount=format_currency(row["benefit_amount"]),
+            total_transaction_value=format_currency(row["total_transaction_value"]),
+            status=row["reconciliation_status"],
+        )
+        for row in patient_df.iter_rows(named=True)
+    )
+    benefit_amount = patient_df["benefit_amount"].sum()
+    paid_amount = patient_df["total_transaction_value"].sum()
+
+    return STATEMENT_TEMPLATE.substitute(
+        patient_id=first_row["patient_id"],
+        patient_label=patient_label,
+        css_file_name=STATEMENT_CSS_FILE_NAME,
+        claims=f"{patient_df.height:,}",
+        benefit_amount=format_currency(benefit_amount),
+        paid_amount=format_currency(paid_amount),
+        net_discrepancy=format_currency(paid_amount - benefit_amount),
+        rows=rows,
+    )
+
+
+def _write_statement_batch(
+    batch_df: pl.DataFrame, output_dir: str, statement_format: str
+) -> int:
+    written = 0
+    for (patient_id,), patient_df in batch_df.partition_by(
+        "patient_id", as_dict=True, maintain_order=True
+    ).items():
+        statement_path = os.path.join(
+            output_dir, f"patient_{patient_id}.{statement_format}"
+        )
+        if statement_format == "csv":
+            patient_df.write_csv(statement_path)
+        else:
+            with open(statement_path, "w", encoding="utf-8") as f:
+                f.write(_render_statement_html(patient_df))
+        written += 1
+
+    return written
+
+
+def generate_patient_statements(
+    reconciled_df: pl.DataFrame,
+    output_dir: str,
+    statement_format: str = "html",
+    max_workers: Optional[int] = None,
+) -> dict:
+    if statement_format not in STATEMENT_FORMATS:
+        raise ValueError(
+            f"Unsupported statement format {statement_format!r}, "
+            f"expected one of {sorted(STATEMENT_FORMATS)}"
+        )
+
+    absolute_output_dir = os.path.join(get_project_root(), output_dir)
+    os.makedirs(absolute_output_dir, exist_ok=True)
+
+    # Every HTML statement links the same stylesheet instead of embedding it
+    if statement_format == "html":
+        with open(
+            os.path.join(absolute_output_dir, STATEMENT_CSS_FILE_NAME),
+            "w",
+            encoding="utf-8",
+        ) as f:
+            f.write(STATEMENT_CSS)
+
+    statement_columns = ["patient_id", *STATEMENT_COLUMNS]
+    if "patient_name" in reconciled_df.columns:
+        statement_columns.append("patient_name")
+
+    batches = (
+        reconciled_df.select(statement_columns)
+        .with_columns(
+            ((pl.col("patient_id").rank("dense") - 1) // PATIENTS_PER_TASK).alias(
+                "batch"
+            )
+        )
+        .partition_by("batch", include_key=False)
+    )
+
+    max_workers = max_workers or os.cpu_count() or 1
+    max_in_flight = max_workers * 2
+    statements_written = 0
+
+    # Spawned workers avoid forking a process that already runs Polars threads
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        in_flight = set()
+        for batch_df in batches:
+            # Bound the number of queued batches so memory stays flat no
+            # matter how many patients there are
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                statements_written += sum(future.result() for future in done)
+
+            in_flight.add(
+                executor.submit(
+                    _write_statement_batch,
+                    batch_df,
+                    absolute_output_dir,
+                    statement_format,
+                )
+            )
+
+        statements_written += sum(future.result() for future in wait(in_flight).done)
+
+    return {
+        "output_dir": absolute_output_dir,
+        "format": statement_format,
+        "statements": statements_written,
+    }
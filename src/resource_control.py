@@ -0,0 +1,97 @@
+import os
+import sys
+from typing import List, Optional, Sequence
+
+# Read by Polars and by the OpenMP/BLAS pools behind NumPy when they are
+# first imported; neither resizes its pool afterwards
+THREAD_COUNT_ENV_VARS = [
+    "POLARS_MAX_THREADS",
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+]
+THREAD_POOL_MODULES = ["polars", "numpy"]
+
+NUMA_NODE_CPULIST_PATH = "/sys/devices/system/node/node{node}/cpulist"
+
+
+def parse_cpu_list(cpu_list: str) -> List[int]:
+    # The kernel's cpulist syntax, e.g. "0-15,32-47"
+    cpus = []
+    for part in cpu_list.strip().split(","):
+        if not part:
+            continue
+        start, _, end = part.partition("-")
+        cpus.extend(range(int(start), int(end or start) + 1))
+    return sorted(set(cpus))
+
+
+def format_cpu_list(cpus: Sequence[int]) -> str:
+    ranges: List[List[int]] = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(
+        str(start) if start == end else f"{start}-{end}" for start, end in ranges
+    )
+
+
+def numa_node_cpus(node: int) -> List[int]:
+    cpulist_path = NUMA_NODE_CPULIST_PATH.format(node=node)
+    if not os.path.exists(cpulist_path):
+        raise ValueError(f"NUMA node {node} does not exist on this host")
+    with open(cpulist_path) as f:
+        return parse_cpu_list(f.read())
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def apply_cpu_budget(
+    cpu_threads: Optional[int] = None,
+    cpus: Optional[Sequence[int]] = None,
+    numa_node: Optional[int] = None,
+) -> int:
+    # Has to run before Polars or NumPy is imported: their thread pools are
+    # sized from the environment on import, and only threads started after
+    # the main thread is pinned inherit its affinity
+    pinned_cpus = None
+    if cpus is not None or numa_node is not None:
+        pinned_cpus = set(available_cpus())
+        if cpus is not None:
+            pinned_cpus &= set(cpus)
+        if numa_node is not None:
+            pinned_cpus &= set(numa_node_cpus(numa_node))
+        if not pinned_cpus:
+            raise ValueError("None of the requested CPUs are available to this run")
+        if not hasattr(os, "sched_setaffinity"):
+            raise ValueError("CPU pinning is not supported on this platform")
+        os.sched_setaffinity(0, pinned_cpus)
+
+    threads = (
+        len(pinned_cpus or available_cpus()) if cpu_threads is None else cpu_threads
+    )
+    if threads < 1:
+        raise ValueError(f"CPU budget must be at least one thread, got {threads}")
+
+    preloaded = [module for module in THREAD_POOL_MODULES if module in sys.modules]
+    if preloaded:
+        print(
+            f"⚠️ {', '.join(preloaded)} already imported; thread pools already "
+            f"started keep their size and CPUs"
+        )
+    for env_var in THREAD_COUNT_ENV_VARS:
+        os.environ[env_var] = str(threads)
+
+    note = f" pinned to CPUs {format_cpu_list(pinned_cpus)}" if pinned_cpus else ""
+    if pinned_cpus and threads > len(pinned_cpus):
+        note += f" (more threads than the {len(pinned_cpus)} pinned CPUs)"
+    print(f"🧵 CPU budget: {threads} threads{note}")
+    return threads
@@ -0,0 +1,17 @@
+from .claim_store import ClaimStore, write_claim_store
+from .arrow_export import (
+    write_ipc_stream,
+    export_reconciliation_results,
+    scan_reconciled_results,
+)
+from .aggregate_cube import AggregateCube, write_aggregate_cube
+
+__all__ = [
+    "ClaimStore",
+    "write_claim_store",
+    "write_ipc_stream",
+    "export_reconciliation_results",
+    "scan_reconciled_results",
+    "AggregateCube",
+    "write_aggregate_cube",
+]
@@ -0,0 +1,39 @@
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import polars as pl
+
+from processing import query_aggregate_cube
+from utils import get_project_root, ensure_directory_exists
+
+
+def write_aggregate_cube(cube_df: pl.DataFrame, cube_file_path: str) -> str:
+    absolute_cube_path = os.path.join(get_project_root(), cube_file_path)
+    ensure_directory_exists(absolute_cube_path)
+
+    # Swapped in whole, so a reader never opens a half-written cube
+    temp_cube_path = f"{absolute_cube_path}.tmp"
+    cube_df.write_parquet(temp_cube_path)
+    os.replace(temp_cube_path, absolute_cube_path)
+
+    return absolute_cube_path
+
+
+class AggregateCube:
+    def __init__(self, cube_file_path: str):
+        absolute_cube_path = os.path.join(get_project_root(), cube_file_path)
+        if not os.path.exists(absolute_cube_path):
+            raise FileNotFoundError(f"Aggregate cube not found: {cube_file_path}")
+
+        # The cube is a small fraction of the claims, so it is held in memory
+        # and every drill-down is answered without touching the file again
+        self._cube_df = pl.read_parquet(absolute_cube_path)
+
+    @property
+    def schema(self) -> pl.Schema:
+        return self._cube_df.schema
+
+    def query(
+        self, group_by: Sequence[str], filters: Optional[Dict[str, Any]] = None
+    ) -> List[dict]:
+        return query_aggregate_cube(self._cube_df, group_by, filters).to_dicts()
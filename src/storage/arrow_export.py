@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+from typing import BinaryIO, Sequence, Union
+
+import polars as pl
+import pyarrow as pa
+
+from utils import get_project_root
+
+EXPORT_FORMATS = {"ipc", "parquet"}
+
+# Schema metadata key under which the analysis dict travels with the frame,
+# so a stream consumer gets both from a single read
+ANALYSIS_METADATA_KEY = b"reconciliation_analysis"
+
+RECONCILED_IPC_FILE_NAME = "reconciled.arrow"
+RECONCILED_PARQUET_DIR_NAME = "reconciled_parquet"
+ANALYSIS_FILE_NAME = "analysis.json"
+
+
+def _to_arrow_table(reconciled_df: pl.DataFrame, analysis_data: dict) -> pa.Table:
+    table = reconciled_df.to_arrow()
+    return table.replace_schema_metadata(
+        {ANALYSIS_METADATA_KEY: json.dumps(analysis_data).encode("utf-8")}
+    )
+
+
+def write_ipc_stream(
+    reconciled_df: pl.DataFrame,
+    analysis_data: dict,
+    sink: Union[str, BinaryIO],
+) -> None:
+    # The sink is either an open binary stream (e.g. stdout) or the path of a
+    # file or named pipe, which blocks until a reader attaches
+    table = _to_arrow_table(reconciled_df, analysis_data)
+    if isinstance(sink, str):
+        with open(os.path.join(get_project_root(), sink), "wb") as f:
+            with pa.ipc.new_stream(f, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        sink.flush()
+
+
+def _remove_output(path: str) -> None:
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def _swap_in_output(tmp_path: str, path: str) -> None:
+    # A directory cannot be os.replace()d over a non-empty one, so the old
+    # output is moved aside first and removed once the new one is in place
+    if os.path.isdir(path):
+        old_path = f"{path}.old"
+        _remove_output(old_path)
+        os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+def export_reconciliation_results(
+    reconciled_df: pl.DataFrame,
+    analysis_data: dict,
+    export_dir: str,
+    export_formats: Sequence[str] = ("ipc", "parquet"),
+) -> dict:
+    unsupported = set(export_formats) - EXPORT_FORMATS
+    if unsupported:
+        raise ValueError(
+            f"Unsupported export formats {sorted(unsupported)}, "
+            f"expected any of {sorted(EXPORT_FORMATS)}"
+        )
+
+    absolute_export_dir = os.path.join(get_project_root(), export_dir)
+    os.makedirs(absolute_export_dir, exist_ok=True)
+    exported = {}
+
+    # Every output is written next to its final path and swapped in, and
+    # outputs of formats not exported this time are removed, so no file or
+    # partition of an earlier export is read back as part of this one
+    analysis_path = os.path.join(absolute_export_dir, ANALYSIS_FILE_NAME)
+    with open(f"{analysis_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(analysis_data, f, indent=2)
+    _swap_in_output(f"{analysis_path}.tmp", analysis_path)
+    exported["analysis"] = analysis_path
+
+    # An uncompressed IPC file can be memory-mapped by consumers as is
+    ipc_path = os.path.join(absolute_export_dir, RECONCILED_IPC_FILE_NAME)
+    if "ipc" in export_formats:
+        table = _to_arrow_table(reconciled_df, analysis_data)
+        with pa.OSFile(f"{ipc_path}.tmp", "wb") as f:
+            with pa.ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        _swap_in_output(f"{ipc_path}.tmp", ipc_path)
+        exported["ipc"] = ipc_path
+    else:
+        _remove_output(ipc_path)
+
+    # Hive-style partitions let BI loaders read a single status directly.
+    # A status without claims in this run must not keep its old partition.
+    parquet_dir = os.path.join(absolute_export_dir, RECONCILED_PARQUET_DIR_NAME)
+    if "parquet" in export_formats:
+        _remove_output(f"{parquet_dir}.tmp")
+        reconciled_df.write_parquet(
+            f"{parquet_dir}.tmp", partition_by="reconciliation_status", mkdir=True
+        )
+        _swap_in_output(f"{parquet_dir}.tmp", parquet_dir)
+        exported["parquet"] = parquet_dir
+    else:
+        _remove_output(parquet_dir)
+
+    return exported
+
+
+def scan_reconciled_results(path: str) -> pl.LazyFrame:
+    # Accepts an export directory, its reconciled.arrow file or its
+    # reconciled_parquet partitions, so earlier runs can be read back lazily
+    absolute_path = os.path.join(get_project_root(), path)
+    if os.path.isdir(absolute_path):
+        ipc_path = os.path.join(absolute_path, RECONCILED_IPC_FILE_NAME)
+        parquet_dir = os.path.join(absolute_path, RECONCILED_PARQUET_DIR_NAME)
+        if os.path.exists(ipc_path):
+            absolute_path = ipc_path
+        elif os.path.isdir(parquet_dir):
+            absolute_path = parquet_dir
+
+    if os.path.isdir(absolute_path):
+        return pl.scan_parquet(
+            os.path.join(absolute_path, "**", "*.parquet"), hive_partitioning=True
+        )
+    if not os.path.exists(absolute_path):
+        raise FileNotFoundError(f"No reconciled results found at {path}")
+    if absolute_path.endswith(".parquet"):
+        return pl.scan_parquet(absolute_path)
+    return pl.scan_ipc(absolute_path)
@@ -0,0 +1,190 @@
+import os
+import sqlite3
+from typing import List, Optional, Union
+
+import polars as pl
+
+from utils import get_project_root, ensure_directory_exists
+
+STORE_INSERT_BATCH_ROWS = 100_000
+
+CLAIMS_TABLE_DDL = """
+CREATE TABLE claims (
+    claim_id TEXT PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    date_of_service TEXT,
+    charges_amount REAL NOT NULL,
+    benefit_amount REAL NOT NULL,
+    total_transaction_value REAL NOT NULL,
+    reconciliation_status TEXT NOT NULL,
+    invoice_count INTEGER NOT NULL,
+    fee_total REAL NOT NULL,
+    fee_count INTEGER NOT NULL,
+    procedure_payment_total REAL NOT NULL,
+    procedure_payment_count INTEGER NOT NULL,
+    first_transaction_date TEXT,
+    last_transaction_date TEXT
+)
+"""
+
+INVOICES_TABLE_DDL = """
+CREATE TABLE invoices (
+    invoice_id TEXT PRIMARY KEY,
+    claim_id TEXT NOT NULL,
+    type_of_bill TEXT NOT NULL,
+    transaction_value REAL NOT NULL,
+    date_of_transaction TEXT
+)
+"""
+
+INDEXES_DDL = [
+    "CREATE INDEX idx_claims_patient_id ON claims (patient_id)",
+    "CREATE INDEX idx_claims_status ON claims (reconciliation_status)",
+    "CREATE INDEX idx_invoices_claim_id ON invoices (claim_id)",
+]
+
+CLAIM_COLUMNS = [
+    "claim_id",
+    "patient_id",
+    "date_of_service",
+    "charges_amount",
+    "benefit_amount",
+    "total_transaction_value",
+    "reconciliation_status",
+    "invoice_count",
+    "fee_total",
+    "fee_count",
+    "procedure_payment_total",
+    "procedure_payment_count",
+    "first_transaction_date",
+    "last_transaction_date",
+]
+
+INVOICE_COLUMNS = [
+    "invoice_id",
+    "claim_id",
+    "type_of_bill",
+    "transaction_value",
+    "date_of_transaction",
+]
+
+
+def _insert_rows(
+    connection: sqlite3.Connection,
+    table: str,
+    df: Union[pl.DataFrame, pl.LazyFrame],
+    columns: List[str],
+) -> None:
+    # SQLite has no native date type, so dates are stored as ISO strings
+    rows = (
+        df.lazy().select(columns).with_columns(pl.col(pl.Date).dt.strftime("%Y-%m-%d"))
+    )
+    # A lazy scan is inserted batch by batch instead of being materialized
+    batches = (
+        rows.collect_batches(chunk_size=STORE_INSERT_BATCH_ROWS)
+        if isinstance(df, pl.LazyFrame)
+        else [rows.collect()]
+    )
+    placeholders = ", ".join("?" for _ in columns)
+    for batch in batches:
+        connection.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            batch.iter_rows(),
+        )
+
+
+def write_claim_store(
+    store_file_path: str,
+    invoices_df: Union[pl.DataFrame, pl.LazyFrame],
+    reconciled_df: pl.DataFrame,
+) -> str:
+    absolute_store_path = os.path.join(get_project_root(), store_file_path)
+    ensure_directory_exists(absolute_store_path)
+
+    # Build into a temporary file and swap it in, so readers never observe a
+    # half-written store
+    temp_store_path = f"{absolute_store_path}.tmp"
+    if os.path.exists(temp_store_path):
+        os.remove(temp_store_path)
+
+    connection = sqlite3.connect(temp_store_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute(CLAIMS_TABLE_DDL)
+        connection.execute(INVOICES_TABLE_DDL)
+
+        _insert_rows(connection, "claims", reconciled_df, CLAIM_COLUMNS)
+        # Invoices left without a claim by fuzzy matching have nothing to be
+        # drilled into from
+        _insert_rows(
+            connection,
+            "invoices",
+            invoices_df.lazy().filter(pl.col("claim_id").is_not_null()),
+            INVOICE_COLUMNS,
+        )
+
+        # Indexes are cheaper to build once after the bulk insert
+        for index_ddl in INDEXES_DDL:
+            connection.execute(index_ddl)
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(temp_store_path, absolute_store_path)
+
+    return absolute_store_path
+
+
+class ClaimStore:
+    def __init__(self, store_file_path: str):
+        absolute_store_path = os.path.join(get_project_root(), store_file_path)
+        if not os.path.exists(absolute_store_path):
+            raise FileNotFoundError(f"Claim store not found: {store_file_path}")
+
+        self._connection = sqlite3.connect(
+            f"file:{absolute_store_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "ClaimStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _fetch_all(self, query: str, params: tuple) -> List[dict]:
+        return [dict(row) for row in self._connection.execute(query, params)]
+
+    def get_claim(self, claim_id: str) -> Optional[dict]:
+        claims = self._fetch_all("SELECT * FROM claims WHERE claim_id = ?", (claim_id,))
+        if not claims:
+            return None
+
+        claim = claims[0]
+        claim["invoices"] = self.get_claim_invoices(claim_id)
+        claim["discrepancy"] = round(
+            claim["total_transaction_value"] - claim["benefit_amount"], 2
+        )
+        return claim
+
+    def get_claim_invoices(self, claim_id: str) -> List[dict]:
+        return self._fetch_all(
+            "SELECT * FROM invoices WHERE claim_id = ? ORDER BY date_of_transaction",
+            (claim_id,),
+        )
+
+    def get_patient_claims(self, patient_id: int) -> List[dict]:
+        return self._fetch_all(
+            "SELECT * FROM claims WHERE patient_id = ? ORDER BY claim_id",
+            (patient_id,),
+        )
+
+    def get_claims_by_status(self, status: str, limit: int = 100) -> List[dict]:
+        return self._fetch_all(
+            "SELECT * FROM claims WHERE reconciliation_status = ? LIMIT ?",
+            (status, limit),
+        )
@@ -3,7 +3,10 @@ from .invoice_reconciliation_strategy import (
     BalancedStrategy,
     UnderpaidStrategy,
     OverpaidStrategy,
+    register_strategy,
     choose_strategy,
+    choose_strategies,
+    calculate_amounts,
 )
 
 __all__ = [
@@ -11,5 +14,8 @@ __all__ = [
     "BalancedStrategy",
     "UnderpaidStrategy",
     "OverpaidStrategy",
+    "register_strategy",
     "choose_strategy",
+    "choose_strategies",
+    "calculate_amounts",
 ]
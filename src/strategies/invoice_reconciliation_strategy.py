@@ -1,8 +1,14 @@
 import random
 from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+import numpy as np
+import polars as pl
 
 from constants import RECONCILIATION_STATUSES
 
+ArrayLike = Union[np.ndarray, pl.Series]
+
 
 class PaymentStatusStrategy(ABC):
     weight: float
@@ -11,6 +17,16 @@ class PaymentStatusStrategy(ABC):
     def calculate_amount(self, benefit_amount: float) -> float:
         pass
 
+    def calculate_amounts(
+        self, benefit_amounts: ArrayLike, rng: np.random.Generator
+    ) -> np.ndarray:
+        # Fallback for strategies that only implement the scalar method;
+        # override this to take part in vectorized generation at full speed
+        return np.array(
+            [self.calculate_amount(amount) for amount in np.asarray(benefit_amounts)],
+            dtype=np.float64,
+        )
+
 
 class BalancedStrategy(PaymentStatusStrategy):
     weight = 0.55
@@ -18,6 +34,11 @@ class BalancedStrategy(PaymentStatusStrategy):
     def calculate_amount(self, benefit_amount: float) -> float:
         return benefit_amount
 
+    def calculate_amounts(
+        self, benefit_amounts: ArrayLike, rng: np.random.Generator
+    ) -> np.ndarray:
+        return np.asarray(benefit_amounts, dtype=np.float64)
+
 
 class UnderpaidStrategy(PaymentStatusStrategy):
     weight = 0.225
@@ -25,6 +46,13 @@ class UnderpaidStrategy(PaymentStatusStrategy):
     def calculate_amount(self, benefit_amount: float) -> float:
         return round(benefit_amount * random.uniform(0.6, 0.95), 2)
 
+    def calculate_amounts(
+        self, benefit_amounts: ArrayLike, rng: np.random.Generator
+    ) -> np.ndarray:
+        benefit_amounts = np.asarray(benefit_amounts, dtype=np.float64)
+        factors = rng.uniform(0.6, 0.95, size=benefit_amounts.shape)
+        return np.round(benefit_amounts * factors, 2)
+
 
 class OverpaidStrategy(PaymentStatusStrategy):
     weight = 0.225
@@ -32,6 +60,13 @@ class OverpaidStrategy(PaymentStatusStrategy):
     def calculate_amount(self, benefit_amount: float) -> float:
         return round(benefit_amount * random.uniform(1.05, 1.4), 2)
 
+    def calculate_amounts(
+        self, benefit_amounts: ArrayLike, rng: np.random.Generator
+    ) -> np.ndarray:
+        benefit_amounts = np.asarray(benefit_amounts, dtype=np.float64)
+        factors = rng.uniform(1.05, 1.4, size=benefit_amounts.shape)
+        return np.round(benefit_amounts * factors, 2)
+
 
 STRATEGIES = {
     RECONCILIATION_STATUSES["BALANCED"]: BalancedStrategy(),
@@ -40,6 +75,37 @@ STRATEGIES = {
 }
 
 
+def register_strategy(name: str, strategy: PaymentStatusStrategy) -> None:
+    # Registered strategies are drawn by weight alongside the built-in ones,
+    # in both the scalar and the vectorized path
+    STRATEGIES[name] = strategy
+
+
 def choose_strategy() -> PaymentStatusStrategy:
     weights = [s.weight for s in STRATEGIES.values()]
     return random.choices(list(STRATEGIES.values()), weights=weights)[0]
+
+
+def choose_strategies(num_of_claims: int, rng: np.random.Generator) -> np.ndarray:
+    # Indices into list(STRATEGIES.values()), drawn for every claim at once
+    weights = np.array([s.weight for s in STRATEGIES.values()], dtype=np.float64)
+    return rng.choice(len(weights), size=num_of_claims, p=weights / weights.sum())
+
+
+def calculate_amounts(
+    benefit_amounts: ArrayLike, rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
+    rng = rng or np.random.default_rng()
+    benefit_amounts = np.asarray(benefit_amounts, dtype=np.float64)
+    strategy_indices = choose_strategies(len(benefit_amounts), rng)
+    amounts = np.empty_like(benefit_amounts)
+
+    # One vectorized call per strategy over all the claims assigned to it
+    for index, strategy in enumerate(STRATEGIES.values()):
+        assigned = strategy_indices == index
+        if assigned.any():
+            amounts[assigned] = strategy.calculate_amounts(
+                benefit_amounts[assigned], rng
+            )
+
+    return amounts
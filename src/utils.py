@@ -10,3 +10,23 @@ def get_project_root() -> str:
 def ensure_directory_exists(file_path: str) -> None:
     directory = os.path.dirname(file_path)
     os.makedirs(directory, exist_ok=True)
+
+
+def parse_memory_size(size: str) -> int:
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    normalized = size.strip().upper()
+    if normalized.endswith("B"):
+        normalized = normalized[:-1]
+
+    if normalized and normalized[-1] in units:
+        return int(float(normalized[:-1]) * units[normalized[-1]])
+
+    return int(normalized)
+
+
+def format_memory_size(num_bytes: int) -> str:
+    for unit in ["B", "K", "M", "G"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}T"
@@ -0,0 +1,479 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import List
+
+import polars as pl
+
+from constants import INBOX_FILE_STATUSES
+from data.compression import COMPRESSION_SUFFIXES, DECOMPRESSION_ERRORS
+from data.loader import ClaimsLoader, InvoicesLoader, DataValidationError
+from models import INVOICES_SCHEMA, InboxFileDict, InboxBatchLogDict
+from pipeline import fingerprint_file
+from processing import reconcile_claims, analyze_reconciliation_results
+from utils import get_project_root, parse_memory_size, format_memory_size
+
+LEDGER_FILE_NAME = "ledger.json"
+SUMMARY_FILE_NAME = "summary.json"
+RUN_LOG_FILE_NAME = "run_log.jsonl"
+INVOICE_PARTS_DIR_NAME = "invoices"
+REJECTED_DIR_NAME = "rejected"
+
+# A file is picked up once it has not been modified for this long, so a file
+# still being copied into the inbox is left alone. Writers that move complete
+# files into the inbox are never delayed by more than this.
+SETTLE_SECONDS = 1.0
+
+# Accepted invoices are kept as one Parquet part per batch; past this many
+# parts they are compacted into one, so each batch scans few files
+MAX_INVOICE_PARTS = 32
+
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def _file_sha256(file_path: Path) -> str:
+    # The full content is hashed: a file dropped again under another name is
+    # still recognised as already processed
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _is_invoice_file(file_path: Path) -> bool:
+    name = file_path.name.lower()
+    if name.startswith(".") or not file_path.is_file():
+        return False
+    return any(name.endswith(".csv" + suffix) for suffix in ["", *COMPRESSION_SUFFIXES])
+
+
+class InboxWatcher:
+    """Apply invoice files dropped into an inbox to a reconciled claims state.
+
+    Every micro-batch only re-reconciles the claims its invoices refer to.
+    The ledger is the single commit point: a batch is applied once it is
+    recorded there, and every file it lists is never applied again.
+    """
+
+    def __init__(
+        self,
+        claims_file_path: str,
+        inbox_dir: str,
+        state_dir: str,
+        archive_dir: str,
+    ):
+        project_root = get_project_root()
+        self._claims_path = os.path.join(project_root, claims_file_path)
+        self._inbox_dir = Path(project_root, inbox_dir)
+        self._state_dir = Path(project_root, state_dir)
+        self._parts_dir = self._state_dir / INVOICE_PARTS_DIR_NAME
+        self._archive_dir = Path(project_root, archive_dir)
+        self._ledger_path = self._state_dir / LEDGER_FILE_NAME
+
+        for directory in [self._inbox_dir, self._parts_dir, self._archive_dir]:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        self._claims_df = ClaimsLoader(self._claims_path).load()
+        self._ledger = self._read_ledger()
+        self._remove_uncommitted_files()
+        self._reconciled_df = self._load_reconciled()
+        self._applied_invoice_ids = (
+            self._scan_invoices(self._ledger["invoice_parts"])
+            .select("invoice_id")
+            .collect()["invoice_id"]
+        )
+
+    def _read_ledger(self) -> dict:
+        if not self._ledger_path.exists():
+            return {
+                "batch": 0,
+                "generation": 0,
+                "claims": None,
+                "as_of_date": None,
+                "reconciled_file": None,
+                "invoice_parts": [],
+                "files": {},
+            }
+        with open(self._ledger_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_ledger(self) -> None:
+        temp_path = f"{self._ledger_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._ledger, f, indent=2)
+        os.replace(temp_path, self._ledger_path)
+
+    def _remove_uncommitted_files(self) -> None:
+        # Parts and reconciled states written by a batch that was interrupted
+        # before its ledger entry are discarded; the batch is redone
+        committed = {
+            *self._ledger["invoice_parts"],
+            self._ledger["reconciled_file"],
+            LEDGER_FILE_NAME,
+            SUMMARY_FILE_NAME,
+            RUN_LOG_FILE_NAME,
+            INVOICE_PARTS_DIR_NAME,
+        }
+        for path in [*self._state_dir.iterdir(), *self._parts_dir.iterdir()]:
+            relative_path = path.relative_to(self._state_dir).as_posix()
+            if path.is_file() and relative_path not in committed:
+                path.unlink()
+
+    def _scan_invoices(self, invoice_parts: List[str]) -> pl.LazyFrame:
+        if not invoice_parts:
+            return pl.LazyFrame(schema=INVOICES_SCHEMA)
+        return pl.scan_parquet([self._state_dir / part for part in invoice_parts])
+
+    def _load_reconciled(self) -> pl.DataFrame:
+        reconciled_file = self._ledger["reconciled_file"]
+        claims_fingerprint = fingerprint_file(self._claims_path)
+        if (
+            reconciled_file is not None
+            and self._ledger["claims"] == claims_fingerprint
+            and self._ledger["as_of_date"] == date.today().isoformat()
+        ):
+            return pl.read_ipc(self._state_dir / reconciled_file, memory_map=False)
+
+        # New claims or a new day: every claim is reconciled against all
+        # invoices applied so far, so the aging columns are current again
+        print("🔁 Reconciling every claim against the applied invoices...")
+        self._ledger["claims"] = claims_fingerprint
+        self._ledger["as_of_date"] = date.today().isoformat()
+        reconciled_df = reconcile_claims(
+            self._claims_df,
+            self._scan_invoices(self._ledger["invoice_parts"]),
+            date.today(),
+        )
+        self._commit(reconciled_df, self._ledger["invoice_parts"], [])
+        return reconciled_df
+
+    def _commit(
+        self,
+        reconciled_df: pl.DataFrame,
+        invoice_parts: List[str],
+        files: List[InboxFileDict],
+    ) -> None:
+        previous_files = [
+            self._ledger["reconciled_file"],
+            *self._ledger["invoice_parts"],
+        ]
+
+        # Every commit writes a new file, so the committed one is never
+        # overwritten before the ledger points away from it
+        self._ledger["generation"] += 1
+        reconciled_file = f"reconciled-{self._ledger['generation']:06d}.arrow"
+        reconciled_df.write_ipc(self._state_dir / reconciled_file)
+
+        self._ledger["reconciled_file"] = reconciled_file
+        self._ledger["invoice_parts"] = invoice_parts
+        for file in files:
+            # A duplicate is only recorded in the run log, so it never
+            # replaces the entry of the file it repeats
+            if file["status"] == INBOX_FILE_STATUSES["DUPLICATE"]:
+                continue
+            self._ledger["files"][file["sha256"]] = {
+                "name": file["name"],
+                "batch": self._ledger["batch"],
+                "status": file["status"],
+            }
+        self._write_ledger()
+
+        for previous_file in previous_files:
+            if previous_file and previous_file not in [
+                reconciled_file,
+                *invoice_parts,
+            ]:
+                (self._state_dir / previous_file).unlink(missing_ok=True)
+
+        # The summary is derived from the committed state, so a crash before
+        # it is rewritten only leaves it one batch behind
+        summary = analyze_reconciliation_results(reconciled_df)
+        summary["watch"] = {
+            "batch": self._ledger["batch"],
+            "as_of_date": self._ledger["as_of_date"],
+            "applied_files": sum(
+                1
+                for entry in self._ledger["files"].values()
+                if entry["status"] == INBOX_FILE_STATUSES["PROCESSED"]
+            ),
+        }
+        temp_path = self._state_dir / f"{SUMMARY_FILE_NAME}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, default=str)
+        os.replace(temp_path, self._state_dir / SUMMARY_FILE_NAME)
+
+    def _compact_invoice_parts(self, invoice_parts: List[str]) -> List[str]:
+        if len(invoice_parts) <= MAX_INVOICE_PARTS:
+            return invoice_parts
+        compacted_part = (
+            f"{INVOICE_PARTS_DIR_NAME}/compacted-{self._ledger['batch']:06d}.parquet"
+        )
+        self._scan_invoices(invoice_parts).sink_parquet(
+            self._state_dir / compacted_part
+        )
+        return [compacted_part]
+
+    def pending_files(self, settle_seconds: float = SETTLE_SECONDS) -> List[Path]:
+        now = time.time()
+        files = [
+            path
+            for path in self._inbox_dir.iterdir()
+            if _is_invoice_file(path) and now - path.stat().st_mtime >= settle_seconds
+        ]
+        return sorted(files, key=lambda path: (path.stat().st_mtime, path.name))
+
+    def _archive(self, file_path: Path, status: str) -> None:
+        archive_dir = self._archive_dir
+        if status == INBOX_FILE_STATUSES["REJECTED"]:
+            archive_dir = archive_dir / REJECTED_DIR_NAME
+            archive_dir.mkdir(exist_ok=True)
+        # Prefixed with the batch, so files dropped under the same name twice
+        # never overwrite each other
+        shutil.move(
+            file_path, archive_dir / f"{self._ledger['batch']:06d}-{file_path.name}"
+        )
+
+    def _is_applied(self, sha256: str) -> bool:
+        entry = self._ledger["files"].get(sha256)
+        return entry is not None and entry["status"] == INBOX_FILE_STATUSES["PROCESSED"]
+
+    def process_batch(self, file_paths: List[Path]) -> InboxBatchLogDict:
+        start_time = time.perf_counter()
+        if self._ledger["as_of_date"] != date.today().isoformat():
+            self._reconciled_df = self._load_reconciled()
+        self._ledger["batch"] += 1
+
+        files: List[InboxFileDict] = []
+        frames = []
+        arrival_times = []
+        for file_path in file_paths:
+            file = InboxFileDict(
+                name=file_path.name,
+                sha256=_file_sha256(file_path),
+                bytes=file_path.stat().st_size,
+                status=INBOX_FILE_STATUSES["PROCESSED"],
+                invoices=0,
+                repeated_invoices=0,
+                unmatched_invoices=0,
+                error=None,
+            )
+            arrival_times.append(file_path.stat().st_mtime)
+            files.append(file)
+
+            # Only content that was applied counts; a file rejected earlier,
+            # e.g. for a transient read error, is tried again
+            if self._is_applied(file["sha256"]) or any(
+                other["sha256"] == file["sha256"]
+                and other["status"] == INBOX_FILE_STATUSES["PROCESSED"]
+                for other in files[:-1]
+            ):
+                file["status"] = INBOX_FILE_STATUSES["DUPLICATE"]
+                continue
+            try:
+                invoices_df = (
+                    InvoicesLoader(str(file_path), allow_unmatched=True)
+                    .load()
+                    .select(list(INVOICES_SCHEMA))
+                )
+            except (
+                DataValidationError,
+                pl.exceptions.PolarsError,
+                *DECOMPRESSION_ERRORS,
+            ) as e:
+                # A bad file is archived as rejected instead of stopping the
+                # watcher, which would otherwise fail on it after every restart
+                file["status"] = INBOX_FILE_STATUSES["REJECTED"]
+                file["error"] = f"{type(e).__name__}: {e}"
+                continue
+            # Rows without a claim_id would need the fuzzy match, which
+            # depends on every invoice of the patient; they are skipped
+            is_unmatched = invoices_df["claim_id"].is_null()
+            file["unmatched_invoices"] = is_unmatched.sum()
+            frames.append(
+                invoices_df.filter(~is_unmatched).with_columns(
+                    pl.lit(len(files) - 1).alias("file_index")
+                )
+            )
+
+        # Exactly once per invoice: an invoice_id applied by an earlier batch
+        # or by an earlier file of this batch is skipped
+        batch_df = pl.concat(frames) if frames else pl.DataFrame()
+        if frames:
+            is_repeated = ~pl.col("invoice_id").is_first_distinct() | pl.col(
+                "invoice_id"
+            ).is_in(self._applied_invoice_ids.implode())
+            repeated_counts = batch_df.filter(is_repeated).group_by("file_index").len()
+            for file_index, repeated in repeated_counts.iter_rows():
+                files[file_index]["repeated_invoices"] = repeated
+            batch_df = batch_df.filter(~is_repeated)
+            for file_index, invoices in (
+                batch_df.group_by("file_index").len().iter_rows()
+            ):
+                files[file_index]["invoices"] = invoices
+            batch_df = batch_df.drop("file_index")
+
+        invoice_parts = self._ledger["invoice_parts"]
+        reconciled_df = self._reconciled_df
+        affected_claims = 0
+        if batch_df.height:
+            batch_part = (
+                f"{INVOICE_PARTS_DIR_NAME}/batch-{self._ledger['batch']:06d}.parquet"
+            )
+            batch_df.write_parquet(self._state_dir / batch_part)
+            invoice_parts = self._compact_invoice_parts([*invoice_parts, batch_part])
+
+            # Only the claims the batch pays are reconciled again, against
+            # every invoice applied to them so far
+            is_affected = pl.col("claim_id").is_in(
+                batch_df["claim_id"].unique().implode()
+            )
+            updated_df = reconcile_claims(
+                self._claims_df.filter(is_affected),
+                self._scan_invoices(invoice_parts).filter(is_affected),
+                date.fromisoformat(self._ledger["as_of_date"]),
+            )
+            affected_claims = updated_df.height
+            reconciled_df = reconciled_df.update(
+                updated_df, on="claim_id", include_nulls=True
+            )
+
+        self._commit(reconciled_df, invoice_parts, files)
+        self._reconciled_df = reconciled_df
+        if batch_df.height:
+            self._applied_invoice_ids = pl.concat(
+                [self._applied_invoice_ids, batch_df["invoice_id"]]
+            )
+        if batch_df.height and batch_part not in invoice_parts:
+            # Compacted together with the earlier parts
+            (self._state_dir / batch_part).unlink()
+
+        # Archived only after the commit: a crash in between leaves files in
+        # the inbox that the ledger already lists, and they are archived as
+        # duplicates on the next pass
+        for file_path, file in zip(file_paths, files):
+            self._archive(file_path, file["status"])
+
+        processing_seconds = time.perf_counter() - start_time
+        committed_at = time.time()
+        invoices = sum(file["invoices"] for file in files)
+        log_entry = InboxBatchLogDict(
+            batch=self._ledger["batch"],
+            committed_at=datetime.fromtimestamp(committed_at, timezone.utc).isoformat(),
+            files=files,
+            invoices=invoices,
+            bytes=sum(file["bytes"] for file in files),
+            affected_claims=affected_claims,
+            processing_seconds=round(processing_seconds, 3),
+            invoices_per_second=round(invoices / processing_seconds, 1),
+            max_latency_seconds=round(committed_at - min(arrival_times), 3),
+            min_latency_seconds=round(committed_at - max(arrival_times), 3),
+        )
+        with open(self._state_dir / RUN_LOG_FILE_NAME, "a", encoding="utf-8") as f:
+            f.write(json.dumps(log_entry) + "\n")
+
+        return log_entry
+
+    def watch(
+        self,
+        poll_seconds: float,
+        batch_seconds: float,
+        batch_bytes: int,
+        once: bool = False,
+    ) -> None:
+        print(f"👀 Watching {self._inbox_dir} (state -> {self._state_dir})")
+        while True:
+            # Without a wait for more files, a one-off pass also takes files
+            # that were modified just now
+            pending = self.pending_files(0 if once else SETTLE_SECONDS)
+            sizes = [path.stat().st_size for path in pending]
+
+            # A batch is closed once it is large enough, or once its oldest
+            # file has waited long enough
+            is_due = pending and (
+                once
+                or sum(sizes) >= batch_bytes
+                or time.time() - pending[0].stat().st_mtime >= batch_seconds
+            )
+            if not is_due:
+                if once:
+                    return
+                time.sleep(poll_seconds)
+                continue
+
+            batch_size = 0
+            batch: List[Path] = []
+            for path, size in zip(pending, sizes):
+                if batch and batch_size + size > batch_bytes:
+                    break
+                batch.append(path)
+                batch_size += size
+
+            log_entry = self.process_batch(batch)
+            rejected = sum(
+                1
+                for file in log_entry["files"]
+                if file["status"] != INBOX_FILE_STATUSES["PROCESSED"]
+            )
+            print(
+                f"✅ Batch {log_entry['batch']}: {log_entry['invoices']} invoices from "
+                f"{len(batch)} file(s) ({format_memory_size(log_entry['bytes'])}, "
+                f"{rejected} rejected or duplicate), {log_entry['affected_claims']} "
+                f"claims updated in {log_entry['processing_seconds']}s, "
+                f"{log_entry['max_latency_seconds']}s after arrival"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Continuously reconcile invoice files dropped into an inbox",
+        epilog="Invoices without a claim_id are skipped and counted in the run log; "
+        "the fuzzy patient, date and amount match is not applied in watch mode.",
+    )
+    parser.add_argument("claims", help="Claims CSV the invoices are reconciled to")
+    parser.add_argument("inbox", help="Directory to watch for invoice CSV files")
+    parser.add_argument("--state-dir", default="output/watch")
+    parser.add_argument("--archive-dir", default="output/watch/archive")
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=2.0,
+        help="How often the inbox is listed",
+    )
+    parser.add_argument(
+        "--batch-seconds",
+        type=float,
+        default=10.0,
+        help="Close a batch once its oldest file has waited this long",
+    )
+    parser.add_argument(
+        "--batch-bytes",
+        default="64M",
+        help="Close a batch once its files add up to this size, e.g. 256M",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Apply the files currently in the inbox and exit",
+    )
+    args = parser.parse_args()
+
+    watcher = InboxWatcher(args.claims, args.inbox, args.state_dir, args.archive_dir)
+    try:
+        watcher.watch(
+            args.poll_seconds,
+            args.batch_seconds,
+            parse_memory_size(args.batch_bytes),
+            once=args.once,
+        )
+    except KeyboardInterrupt:
+        print("🛑 Stopped watching")
+
+
+if __name__ == "__main__":
+    main()
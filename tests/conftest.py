@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# The modules import each other as top-level packages from src/, as they do
+# when the scripts are run directly
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from constants import WORKLOAD_PROFILES  # noqa: E402
+from data import PatientGenerator, ClaimGenerator, InvoiceGenerator  # noqa: E402
+
+NUM_OF_PATIENTS = 50
+SEED = 7
+
+
+@pytest.fixture(scope="session")
+def generated_inputs():
+    patients = PatientGenerator(NUM_OF_PATIENTS, SEED).generate()
+    claims_df = ClaimGenerator(
+        patients, SEED, WORKLOAD_PROFILES["uniform"]
+    ).generate_frame()
+    invoices_df = InvoiceGenerator(
+        claims_df, SEED, WORKLOAD_PROFILES["uniform"]
+    ).generate_frame()
+    return claims_df, invoices_df
+
+
+@pytest.fixture
+def input_files(tmp_path, generated_inputs):
+    claims_df, invoices_df = generated_inputs
+    claims_path = tmp_path / "claims.csv"
+    invoices_path = tmp_path / "invoices.csv"
+    claims_df.write_csv(claims_path)
+    invoices_df.write_csv(invoices_path)
+    return str(claims_path), str(invoices_path)
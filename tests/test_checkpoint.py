@@ -0,0 +1,96 @@
+import polars as pl
+import pytest
+
+from pipeline import CheckpointStore, PipelineExecutor, PipelineStage
+from reconciliation_engine import run_reconciliation_engine
+
+
+def _stages(calls):
+    def claims():
+        calls.append("claims")
+        return pl.DataFrame({"claim_id": ["C1", "C2", "C3"]})
+
+    def summary(claims_df):
+        calls.append("summary")
+        return {"claims": claims_df.height}
+
+    def report(summary_dict):
+        calls.append("report")
+        return summary_dict["claims"]
+
+    return [
+        PipelineStage("claims", claims),
+        PipelineStage("summary", summary, ["claims"]),
+        PipelineStage("report", report, ["summary"], checkpoint=False),
+    ]
+
+
+def _run(tmp_path, calls, fingerprints, resume):
+    store = CheckpointStore(str(tmp_path), "run", fingerprints)
+    executor = PipelineExecutor(_stages(calls), checkpoint_store=store, resume=resume)
+    return executor, executor.run()
+
+
+def test_resume_restores_checkpointed_stages(tmp_path):
+    calls = []
+    _, first = _run(tmp_path, calls, {"inputs": 1}, resume=False)
+    assert calls == ["claims", "summary", "report"]
+
+    calls.clear()
+    executor, resumed = _run(tmp_path, calls, {"inputs": 1}, resume=True)
+
+    # Only the stage that opted out of checkpointing runs again; claims is
+    # not even restored, since nothing that runs consumes it
+    assert calls == ["report"]
+    assert executor.restored_stages == ["summary"]
+    assert resumed["report"] == first["report"] == 3
+
+
+def test_resume_after_interrupted_run_reruns_missing_stages(tmp_path):
+    calls = []
+    store = CheckpointStore(str(tmp_path), "run", {"inputs": 1})
+    store.save("claims", pl.DataFrame({"claim_id": ["C1", "C2"]}))
+
+    executor, results = _run(tmp_path, calls, {"inputs": 1}, resume=True)
+
+    assert calls == ["summary", "report"]
+    assert executor.restored_stages == ["claims"]
+    assert results["summary"] == {"claims": 2}
+
+
+def test_checkpoints_of_other_inputs_are_stale(tmp_path):
+    calls = []
+    _run(tmp_path, calls, {"inputs": 1}, resume=False)
+
+    calls.clear()
+    executor, _ = _run(tmp_path, calls, {"inputs": 2}, resume=True)
+
+    assert calls == ["claims", "summary", "report"]
+    assert executor.restored_stages == []
+
+
+@pytest.mark.parametrize("max_memory", [None, 1])
+def test_resumed_engine_run_matches_full_run(tmp_path, input_files, capsys, max_memory):
+    claims_path, invoices_path = input_files
+    checkpoint_dir = str(tmp_path / "runs")
+
+    def run(resume):
+        run_reconciliation_engine(
+            claims_path,
+            invoices_path,
+            str(tmp_path / "report.html"),
+            checkpoint_dir=checkpoint_dir,
+            resume=resume,
+            export_dir=str(tmp_path / "export"),
+            export_formats=["ipc"],
+            html_report=False,
+            max_memory=max_memory,
+        )
+        return pl.read_ipc(tmp_path / "export" / "reconciled.arrow")
+
+    full_df = run(resume=False)
+    capsys.readouterr()
+    resumed_df = run(resume=True)
+
+    assert "Resumed" in capsys.readouterr().out
+    assert resumed_df.equals(full_df)
@@ -0,0 +1,60 @@
+from datetime import date
+
+import polars as pl
+import pytest
+
+from models import INVOICES_SCHEMA
+from processing import detect_duplicate_payments
+
+
+@pytest.fixture
+def invoices_df():
+    return pl.DataFrame(
+        [
+            ("I1", "C1", "fee", 100.0, date(2024, 3, 1)),
+            # Same payment sent again on the same day
+            ("I2", "C1", "fee", 100.0, date(2024, 3, 1)),
+            # ... and once more three days later
+            ("I3", "C1", "fee", 100.0, date(2024, 3, 4)),
+            # Same amount and date but another bill type
+            ("I4", "C1", "procedure payment", 100.0, date(2024, 3, 1)),
+            ("I5", "C2", "fee", 100.0, date(2024, 3, 1)),
+            ("I6", "C2", "fee", 100.0, date(2024, 4, 1)),
+        ],
+        schema=INVOICES_SCHEMA,
+        orient="row",
+    )
+
+
+def test_exact_duplicates(invoices_df):
+    duplicates_df = detect_duplicate_payments(invoices_df)
+
+    assert duplicates_df.select(
+        "invoice_id", "duplicate_of_invoice_id", "days_since_previous_payment"
+    ).rows() == [("I2", "I1", 0)]
+
+
+def test_near_duplicates_within_the_date_window(invoices_df):
+    duplicates_df = detect_duplicate_payments(invoices_df, date_window_days=5)
+
+    assert duplicates_df.select(
+        "invoice_id", "duplicate_of_invoice_id", "days_since_previous_payment"
+    ).rows() == [("I2", "I1", 0), ("I3", "I2", 3)]
+
+
+def test_streaming_engine_finds_the_same_duplicates(generated_inputs):
+    _, invoices_df = generated_inputs
+    repeated_df = pl.concat(
+        [
+            invoices_df,
+            invoices_df.head(25).with_columns(
+                pl.format("R{}", pl.int_range(pl.len())).alias("invoice_id")
+            ),
+        ]
+    )
+
+    eager_df = detect_duplicate_payments(repeated_df)
+    streaming_df = detect_duplicate_payments(repeated_df.lazy(), engine="streaming")
+
+    assert eager_df.height >= 25
+    assert streaming_df.sort("invoice_id").equals(eager_df.sort("invoice_id"))
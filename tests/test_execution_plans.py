@@ -0,0 +1,91 @@
+import polars as pl
+import pytest
+
+from constants import EXECUTION_MODES, WORKLOAD_PROFILES
+from data import PatientGenerator, ClaimGenerator, InvoiceGenerator
+from pipeline import plan_execution
+from processing import reconcile_claims
+from processing.reconciliation import reconcile_claims_partitioned
+from reconciliation_engine import run_reconciliation_engine
+
+
+@pytest.fixture
+def skewed_input_files(tmp_path):
+    # Orphans, duplicates and unlinked invoices exercise every code path
+    profile = WORKLOAD_PROFILES["skewed"]
+    patients = PatientGenerator(60, 5).generate()
+    claims_df = ClaimGenerator(patients, 5, profile).generate_frame()
+    invoices_df = InvoiceGenerator(claims_df, 5, profile).generate_frame()
+    claims_path = tmp_path / "claims.csv"
+    invoices_path = tmp_path / "invoices.csv"
+    claims_df.write_csv(claims_path)
+    invoices_df.write_csv(invoices_path)
+    return str(claims_path), str(invoices_path)
+
+
+def _budgets(claims_path, invoices_path):
+    plan = plan_execution(claims_path, invoices_path)
+    return {
+        EXECUTION_MODES["EAGER"]: plan["estimated_eager_bytes"],
+        EXECUTION_MODES["STREAMING"]: plan["estimated_streaming_bytes"],
+        EXECUTION_MODES["PARTITIONED"]: 1,
+    }
+
+
+def test_planner_picks_each_mode(input_files):
+    claims_path, invoices_path = input_files
+
+    for mode, budget in _budgets(claims_path, invoices_path).items():
+        assert plan_execution(claims_path, invoices_path, budget)["mode"] == mode
+
+
+def test_planner_reports_missing_inputs(tmp_path, input_files):
+    claims_path, _ = input_files
+
+    with pytest.raises(FileNotFoundError, match="Invoices file not found"):
+        plan_execution(claims_path, str(tmp_path / "missing.csv"), 1)
+
+
+@pytest.mark.parametrize("num_partitions", [1, 4, 16])
+def test_reconciliation_plans_agree(generated_inputs, num_partitions):
+    claims_df, invoices_df = generated_inputs
+
+    eager_df = reconcile_claims(claims_df, invoices_df)
+    streaming_df = reconcile_claims(
+        claims_df.lazy(), invoices_df.lazy(), engine="streaming"
+    )
+    partitioned_df = reconcile_claims_partitioned(
+        claims_df.lazy(), invoices_df.lazy(), num_partitions
+    )
+
+    assert streaming_df.equals(eager_df)
+    assert partitioned_df.equals(eager_df)
+
+
+def test_engine_results_do_not_depend_on_the_plan(tmp_path, skewed_input_files):
+    claims_path, invoices_path = skewed_input_files
+
+    results = {}
+    for mode, budget in _budgets(claims_path, invoices_path).items():
+        export_dir = tmp_path / mode
+        cube_path = tmp_path / f"{mode}_cube.parquet"
+        run_reconciliation_engine(
+            claims_path,
+            invoices_path,
+            str(tmp_path / "report.html"),
+            export_dir=str(export_dir),
+            export_formats=["ipc"],
+            html_report=False,
+            max_memory=budget,
+            fuzzy_matching=True,
+            cube_file_path=str(cube_path),
+        )
+        results[mode] = (
+            pl.read_ipc(export_dir / "reconciled.arrow"),
+            pl.read_parquet(cube_path),
+        )
+
+    eager_df, eager_cube_df = results[EXECUTION_MODES["EAGER"]]
+    for reconciled_df, cube_df in results.values():
+        assert reconciled_df.equals(eager_df)
+        assert cube_df.equals(eager_cube_df)
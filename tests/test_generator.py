@@ -0,0 +1,104 @@
+from datetime import date
+
+import polars as pl
+import pytest
+
+from constants import WORKLOAD_PROFILES
+from data import PatientGenerator, ClaimGenerator, InvoiceGenerator
+
+SKEWED = WORKLOAD_PROFILES["skewed"]
+
+
+def _generate(profile_name, seed, num_of_patients=300):
+    profile = WORKLOAD_PROFILES[profile_name]
+    patients = PatientGenerator(num_of_patients, seed).generate()
+    claims_df = ClaimGenerator(patients, seed, profile).generate_frame()
+    invoices_df = InvoiceGenerator(claims_df, seed, profile).generate_frame()
+    return patients, claims_df, invoices_df
+
+
+@pytest.fixture(scope="module")
+def skewed_inputs():
+    return _generate("skewed", seed=3)
+
+
+@pytest.mark.parametrize("profile_name", sorted(WORKLOAD_PROFILES))
+def test_same_seed_generates_same_data(profile_name):
+    first = _generate(profile_name, seed=11, num_of_patients=40)
+    second = _generate(profile_name, seed=11, num_of_patients=40)
+
+    assert first[0] == second[0]
+    assert first[1].equals(second[1])
+    assert first[2].equals(second[2])
+
+
+def test_skewed_claim_counts_have_a_heavy_tail(skewed_inputs):
+    _, claims_df, _ = skewed_inputs
+    claims_per_patient = claims_df.group_by("patient_id").len()["len"]
+    bounds = SKEWED["claims_per_patient"]
+
+    assert claims_per_patient.min() >= bounds["min"]
+    assert claims_per_patient.max() <= bounds["max"]
+    # A few hot patients hold far more claims than the typical one
+    assert claims_per_patient.max() >= 20 * claims_per_patient.median()
+
+
+def test_skewed_invoice_counts_stay_within_bounds(skewed_inputs):
+    _, claims_df, invoices_df = skewed_inputs
+    bounds = SKEWED["invoices_per_claim"]
+    known_claims = invoices_df.filter(
+        pl.col("claim_id").is_in(claims_df["claim_id"].implode())
+    )
+    invoices_per_claim = known_claims.group_by("claim_id").len()["len"]
+
+    assert invoices_per_claim.max() <= bounds["max"]
+    assert invoices_df["invoice_id"].is_unique().all()
+
+
+def test_skewed_anomaly_rates(skewed_inputs):
+    _, claims_df, invoices_df = skewed_inputs
+    height = invoices_df.height
+    claim_ids = claims_df["claim_id"].implode()
+
+    orphans = invoices_df.filter(
+        pl.col("claim_id").str.starts_with("C") & ~pl.col("claim_id").is_in(claim_ids)
+    ).height
+    missing = invoices_df["claim_id"].null_count()
+    mistyped = invoices_df.filter(~pl.col("claim_id").str.starts_with("C")).height
+    repeated_payments = (
+        height
+        - invoices_df.select(
+            "claim_id", "type_of_bill", "transaction_value", "date_of_transaction"
+        )
+        .unique()
+        .height
+    )
+
+    # Duplicates and orphans are a share of the invoices before they were
+    # added, so they land slightly under their nominal rate
+    assert orphans == pytest.approx(height * SKEWED["orphan_invoice_rate"], rel=0.1)
+    assert repeated_payments >= height * SKEWED["duplicate_invoice_rate"] * 0.9
+    assert missing + mistyped == round(height * SKEWED["unlinked_invoice_rate"])
+    assert missing == pytest.approx(mistyped, abs=1)
+    # Only orphans lack a patient_id; unlinked invoices keep theirs for the
+    # fuzzy match
+    assert (
+        invoices_df.filter(
+            pl.col("patient_id").is_null() & pl.col("claim_id").is_in(claim_ids)
+        ).height
+        == 0
+    )
+
+
+def test_skewed_payments_follow_the_date_of_service(skewed_inputs):
+    _, claims_df, invoices_df = skewed_inputs
+    lags = invoices_df.join(claims_df, on="claim_id").select(
+        (pl.col("date_of_transaction") - pl.col("date_of_service"))
+        .dt.total_days()
+        .alias("lag_days"),
+        pl.col("date_of_transaction"),
+    )
+
+    assert lags["lag_days"].min() >= 0
+    assert lags["date_of_transaction"].max() <= date.today()
+    assert lags["lag_days"].max() >= SKEWED["late_payment_min_days"]
@@ -0,0 +1,109 @@
+import gzip
+
+import polars as pl
+import pytest
+
+from data.compression import resolve_input_files
+from data.ingest import read_csv_strict
+from data.loader import ClaimsLoader, InvoicesLoader, DataValidationError
+from models import CLAIMS_SCHEMA, INVOICES_SCHEMA
+
+CLAIMS_HEADER = "claim_id,patient_id,date_of_service,charges_amount,benefit_amount"
+
+
+def _write(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_bytes", [64, 1000, 64 * 1024 * 1024])
+def test_chunked_parse_matches_the_default_loader(input_files, chunk_bytes):
+    claims_path, invoices_path = input_files
+
+    for file_path, schema, loader in [
+        (claims_path, CLAIMS_SCHEMA, ClaimsLoader(claims_path)),
+        (invoices_path, INVOICES_SCHEMA, InvoicesLoader(invoices_path)),
+    ]:
+        df, stats = read_csv_strict(
+            resolve_input_files(file_path),
+            schema,
+            list(schema),
+            max_workers=4,
+            chunk_bytes=chunk_bytes,
+        )
+
+        assert df.equals(loader.load())
+        assert stats["rows"] == df.height
+        if chunk_bytes < 1000:
+            assert stats["chunks"] > 1
+
+
+def test_strict_loader_reads_compressed_and_multi_file_inputs(tmp_path, input_files):
+    claims_path, _ = input_files
+    expected_df = ClaimsLoader(claims_path).load()
+
+    # The same rows split over a plain and a gzip-compressed part
+    lines = open(claims_path).read().splitlines()
+    half = len(lines) // 2
+    _write(tmp_path / "part_1.csv", lines[:half])
+    with gzip.open(tmp_path / "part_2.csv.gz", "wt") as f:
+        f.write("\n".join([lines[0], *lines[half:]]) + "\n")
+
+    loader = ClaimsLoader(str(tmp_path / "part_*"), strict=True)
+
+    assert loader.load().equals(expected_df)
+    assert loader.ingest_stats["files"] == 2
+
+
+def test_strict_invoices_skip_unused_columns(tmp_path, input_files):
+    _, invoices_path = input_files
+    with_patient_path = tmp_path / "with_patient.csv"
+    lines = open(invoices_path).read().splitlines()
+    _write(
+        with_patient_path,
+        [lines[0] + ",patient_id", *[line + ",1" for line in lines[1:]]],
+    )
+
+    invoices_df = InvoicesLoader(str(with_patient_path), strict=True).load()
+
+    assert invoices_df.columns == list(INVOICES_SCHEMA)
+
+
+def test_bad_date_names_the_column(tmp_path):
+    claims_path = _write(
+        tmp_path / "claims.csv",
+        [CLAIMS_HEADER, "C1,1,2024-01-02,10.0,5.0", "C2,1,01/02/2024,10.0,5.0"],
+    )
+
+    with pytest.raises(DataValidationError, match="date_of_service"):
+        ClaimsLoader(claims_path, strict=True).load()
+
+
+def test_bad_date_in_a_later_chunk_is_reported(tmp_path):
+    rows = [f"C{i},1,2024-01-02,10.0,5.0" for i in range(1, 200)]
+    claims_path = _write(
+        tmp_path / "claims.csv", [CLAIMS_HEADER, *rows, "C200,1,2024-13-40,10.0,5.0"]
+    )
+
+    with pytest.raises(pl.exceptions.PolarsError, match="date_of_service"):
+        read_csv_strict(
+            resolve_input_files(claims_path),
+            CLAIMS_SCHEMA,
+            list(CLAIMS_SCHEMA),
+            chunk_bytes=256,
+        )
+
+
+@pytest.mark.parametrize(
+    "header, message",
+    [
+        ("claim_id,patient_id,date_of_service,charges_amount", "Missing required"),
+        (CLAIMS_HEADER + ",notes", "Unknown columns"),
+    ],
+)
+def test_header_is_checked_before_parsing(tmp_path, header, message):
+    # The body would not parse either; the header error comes first
+    claims_path = _write(tmp_path / "claims.csv", [header, "not,a,valid,row"])
+
+    with pytest.raises(DataValidationError, match=message):
+        ClaimsLoader(claims_path, strict=True).load()
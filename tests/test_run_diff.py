@@ -0,0 +1,61 @@
+import polars as pl
+
+from constants import RUN_DIFF_CHANGE_TYPES
+from processing import analyze_run_diff, diff_reconciliation_runs, reconcile_claims
+
+
+def _run(rows):
+    return pl.DataFrame(
+        rows,
+        schema=["claim_id", "reconciliation_status", "total_transaction_value"],
+        orient="row",
+    )
+
+
+def test_diff_classifies_every_change():
+    previous_df = _run(
+        [
+            ("C1", "BALANCED", 100.0),
+            ("C2", "UNDERPAID", 50.0),
+            ("C3", "BALANCED", 80.0),
+            ("C4", "UNDERPAID", 10.0),
+            ("C5", "OVERPAID", 120.0),
+            ("C6", "UNDERPAID", 30.0),
+        ]
+    )
+    current_df = _run(
+        [
+            ("C1", "BALANCED", 100.0),
+            ("C2", "BALANCED", 100.0),
+            ("C3", "OVERPAID", 95.5),
+            ("C4", "OVERPAID", 210.0),
+            ("C5", "OVERPAID", 130.0),
+            ("C7", "UNDERPAID", 5.0),
+        ]
+    )
+
+    diff_df = diff_reconciliation_runs(previous_df, current_df)
+
+    assert diff_df.select("claim_id", "change_type", "dollar_delta").rows() == [
+        ("C2", RUN_DIFF_CHANGE_TYPES["RESOLVED"], 50.0),
+        ("C3", RUN_DIFF_CHANGE_TYPES["NEWLY_DISCREPANT"], 15.5),
+        ("C4", RUN_DIFF_CHANGE_TYPES["STATUS_CHANGED"], 200.0),
+        ("C5", RUN_DIFF_CHANGE_TYPES["AMOUNT_CHANGED"], 10.0),
+        ("C6", RUN_DIFF_CHANGE_TYPES["REMOVED"], -30.0),
+        ("C7", RUN_DIFF_CHANGE_TYPES["NEW"], 5.0),
+    ]
+
+    summary = analyze_run_diff(diff_df)
+    assert summary["changed_claims"] == 6
+    assert summary["net_dollar_delta"] == 250.5
+    assert summary["top_changes"][0]["claim_id"] == "C4"
+
+
+def test_identical_runs_have_no_changes(generated_inputs):
+    claims_df, invoices_df = generated_inputs
+    reconciled_df = reconcile_claims(claims_df, invoices_df)
+
+    diff_df = diff_reconciliation_runs(reconciled_df, reconciled_df.reverse().lazy())
+
+    assert diff_df.height == 0
+    assert analyze_run_diff(diff_df)["net_dollar_delta"] == 0
@@ -0,0 +1,152 @@
+import json
+
+import polars as pl
+import pytest
+
+from constants import INBOX_FILE_STATUSES
+from processing import reconcile_claims
+from watch_inbox import InboxWatcher
+
+PROCESSED = INBOX_FILE_STATUSES["PROCESSED"]
+DUPLICATE = INBOX_FILE_STATUSES["DUPLICATE"]
+REJECTED = INBOX_FILE_STATUSES["REJECTED"]
+
+
+@pytest.fixture
+def inbox(tmp_path, input_files):
+    claims_path, _ = input_files
+    paths = {name: tmp_path / name for name in ["inbox", "state", "archive"]}
+
+    def start():
+        return InboxWatcher(
+            claims_path, str(paths["inbox"]), str(paths["state"]), str(paths["archive"])
+        )
+
+    def drop(name, invoices_df):
+        path = paths["inbox"] / name
+        invoices_df.write_csv(path)
+        return path
+
+    def reconciled_state():
+        with open(paths["state"] / "ledger.json", encoding="utf-8") as f:
+            ledger = json.load(f)
+        return ledger, pl.read_ipc(paths["state"] / ledger["reconciled_file"])
+
+    return start, drop, reconciled_state
+
+
+def _file_counts(log_entry):
+    return [
+        (
+            file["name"],
+            file["status"],
+            file["invoices"],
+            file["repeated_invoices"],
+            file["unmatched_invoices"],
+        )
+        for file in log_entry["files"]
+    ]
+
+
+def test_each_invoice_is_applied_exactly_once(inbox, generated_inputs):
+    start, drop, reconciled_state = inbox
+    claims_df, invoices_df = generated_inputs
+    watcher = start()
+
+    # c.csv repeats invoices of a.csv within the batch, b.csv resends some
+    # in a later batch
+    first = watcher.process_batch(
+        [
+            drop("a.csv", invoices_df.slice(0, 100)),
+            drop("c.csv", invoices_df.slice(90, 30)),
+        ]
+    )
+    second = watcher.process_batch(
+        [
+            drop(
+                "b.csv",
+                pl.concat([invoices_df.slice(0, 10), invoices_df.slice(120, 40)]),
+            )
+        ]
+    )
+
+    assert _file_counts(first) == [
+        ("a.csv", PROCESSED, 100, 0, 0),
+        ("c.csv", PROCESSED, 20, 10, 0),
+    ]
+    assert _file_counts(second) == [("b.csv", PROCESSED, 40, 10, 0)]
+
+    _, reconciled_df = reconciled_state()
+    expected_df = reconcile_claims(claims_df, invoices_df.head(160))
+    assert reconciled_df.sort("claim_id").equals(expected_df.sort("claim_id"))
+
+
+def test_restarted_watcher_does_not_reapply_invoices(inbox, generated_inputs):
+    start, drop, reconciled_state = inbox
+    claims_df, invoices_df = generated_inputs
+    start().process_batch([drop("a.csv", invoices_df.slice(0, 50))])
+
+    log_entry = start().process_batch([drop("b.csv", invoices_df.slice(40, 20))])
+
+    assert _file_counts(log_entry) == [("b.csv", PROCESSED, 10, 10, 0)]
+    _, reconciled_df = reconciled_state()
+    expected_df = reconcile_claims(claims_df, invoices_df.head(60))
+    assert reconciled_df.sort("claim_id").equals(expected_df.sort("claim_id"))
+
+
+def test_same_content_under_another_name_is_a_duplicate(inbox, generated_inputs):
+    start, drop, reconciled_state = inbox
+    _, invoices_df = generated_inputs
+    watcher = start()
+
+    log_entry = watcher.process_batch(
+        [
+            drop("a.csv", invoices_df.slice(0, 20)),
+            drop("a_copy.csv", invoices_df.slice(0, 20)),
+        ]
+    )
+    later_entry = watcher.process_batch([drop("a_again.csv", invoices_df.slice(0, 20))])
+
+    assert [file["status"] for file in log_entry["files"]] == [PROCESSED, DUPLICATE]
+    assert [file["status"] for file in later_entry["files"]] == [DUPLICATE]
+    # The duplicates never replace the ledger entry of the applied file
+    ledger, _ = reconciled_state()
+    assert [entry["name"] for entry in ledger["files"].values()] == ["a.csv"]
+
+
+def test_rejected_file_is_tried_again(inbox, generated_inputs):
+    start, drop, _ = inbox
+    _, invoices_df = generated_inputs
+    watcher = start()
+    bad_df = invoices_df.slice(0, 20).with_columns(
+        pl.lit(-1.0).alias("transaction_value")
+    )
+    log_entry = watcher.process_batch([drop("bad.csv", bad_df)])
+    # A rejection is not a duplicate: the same content is validated again
+    retry_entry = watcher.process_batch([drop("bad.csv", bad_df)])
+
+    assert [file["status"] for file in log_entry["files"]] == [REJECTED]
+    assert [file["status"] for file in retry_entry["files"]] == [REJECTED]
+    assert log_entry["files"][0]["error"]
+
+
+def test_invoices_without_a_claim_id_are_skipped(inbox, generated_inputs):
+    start, drop, reconciled_state = inbox
+    claims_df, invoices_df = generated_inputs
+    batch_df = invoices_df.slice(0, 30)
+    unlinked_id = batch_df["invoice_id"][5]
+    unlinked_df = batch_df.with_columns(
+        pl.when(pl.col("invoice_id") == unlinked_id)
+        .then(None)
+        .otherwise(pl.col("claim_id"))
+        .alias("claim_id")
+    )
+
+    log_entry = start().process_batch([drop("a.csv", unlinked_df)])
+
+    assert _file_counts(log_entry) == [("a.csv", PROCESSED, 29, 0, 1)]
+    _, reconciled_df = reconciled_state()
+    expected_df = reconcile_claims(
+        claims_df, batch_df.filter(pl.col("invoice_id") != unlinked_id)
+    )
+    assert reconciled_df.sort("claim_id").equals(expected_df.sort("claim_id"))